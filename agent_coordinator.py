@@ -11,11 +11,18 @@ import time
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Set
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from enum import Enum
 import threading
 from collections import defaultdict, deque
+from itertools import islice
 import hashlib
+import heapq
+import math
+
+from rw_lock import ReadWriteLock
+from text_index import TextIndex
+from vector_store import create_vector_store
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -82,13 +89,19 @@ class KnowledgeGraph:
     def __init__(self):
         self.nodes = {}  # concept_id -> concept_data
         self.edges = {}  # (concept1, concept2) -> relationship_data
+        self.adjacency = defaultdict(dict)  # concept_id -> {neighbor_id: strength}
         self.concept_index = defaultdict(set)  # keyword -> concept_ids
-        self.lock = threading.Lock()
+        self.text_index = TextIndex()  # полнотекстовый поиск по имени, ключевым словам и описанию
+        # Обходы и поиск идут параллельно, запись - монопольно
+        self.lock = ReadWriteLock()
+        # Счетчики использования меняются при чтении знаний, поэтому у них своя блокировка
+        self.usage_lock = threading.Lock()
     
     def add_concept(self, concept_id: str, name: str, description: str, 
                    keywords: List[str], agent_id: str, metadata: Dict[str, Any] = None):
         """Добавить концепцию в граф"""
-        with self.lock:
+        with self.lock.write(), self.usage_lock:
+            previous = self.nodes.get(concept_id)
             self.nodes[concept_id] = {
                 "id": concept_id,
                 "name": name,
@@ -97,17 +110,56 @@ class KnowledgeGraph:
                 "created_by": agent_id,
                 "created_at": datetime.now().isoformat(),
                 "metadata": metadata or {},
-                "usage_count": 0
+                "usage_count": previous["usage_count"] if previous else 0
             }
             
             # Индексируем по ключевым словам
             for keyword in keywords:
                 self.concept_index[keyword.lower()].add(concept_id)
+        
+        self.text_index.add(concept_id, " ".join([name, *map(str, keywords), description]))
+    
+    def add_concepts(self, concepts: List[tuple]):
+        """Добавить пачку концепций (concept_id, name, description, keywords, agent_id, metadata)
+        
+        Для массовой загрузки: одна блокировка графа и одна блокировка индекса на пачку.
+        """
+        created_at = datetime.now().isoformat()
+        documents = []
+        with self.lock.write(), self.usage_lock:
+            for concept_id, name, description, keywords, agent_id, metadata in concepts:
+                previous = self.nodes.get(concept_id)
+                self.nodes[concept_id] = {
+                    "id": concept_id,
+                    "name": name,
+                    "description": description,
+                    "keywords": keywords,
+                    "created_by": agent_id,
+                    "created_at": created_at,
+                    "metadata": metadata or {},
+                    "usage_count": previous["usage_count"] if previous else 0
+                }
+                for keyword in keywords:
+                    self.concept_index[keyword.lower()].add(concept_id)
+                documents.append((concept_id, " ".join([name, *map(str, keywords), description])))
+        
+        self.text_index.add_many(documents)
+    
+    def record_usage(self, concept_id: str):
+        """Учесть обращение к концепции (повышает ее ранг в поиске)"""
+        with self.usage_lock:
+            if concept_id in self.nodes:
+                self.nodes[concept_id]["usage_count"] += 1
+    
+    def usage_boost(self, concept_id: str) -> float:
+        """Множитель релевантности по частоте использования концепции"""
+        node = self.nodes.get(concept_id)
+        return 1.0 + 0.1 * math.log1p(node["usage_count"]) if node else 1.0
     
     def add_relationship(self, concept1_id: str, concept2_id: str, 
                         relationship_type: str, strength: float = 1.0):
         """Добавить связь между концепциями"""
-        with self.lock:
+        with self.lock.write():
             edge_key = tuple(sorted([concept1_id, concept2_id]))
             self.edges[edge_key] = {
                 "concept1": concept1_id,
@@ -116,45 +168,87 @@ class KnowledgeGraph:
                 "strength": strength,
                 "created_at": datetime.now().isoformat()
             }
+            self.adjacency[concept1_id][concept2_id] = strength
+            self.adjacency[concept2_id][concept1_id] = strength
+    
+    def _neighbors(self, concept_id: str) -> List[tuple]:
+        """Соседи концепции со силой связи (блокировка берется на одну вершину)"""
+        with self.lock.read():
+            neighbors = self.adjacency.get(concept_id)
+            return list(neighbors.items()) if neighbors else []
     
-    def find_related_concepts(self, concept_id: str, max_depth: int = 2) -> List[str]:
-        """Найти связанные концепции"""
-        with self.lock:
-            related = set()
-            to_explore = [(concept_id, 0)]
+    def find_related_concepts(self, concept_id: str, max_depth: int = 2,
+                              min_strength: float = 0.0) -> List[str]:
+        """Найти связанные концепции (обход в ширину, ближайшие первыми)"""
+        related = []
+        visited = {concept_id}
+        to_explore = deque([(concept_id, 0)])
+        
+        while to_explore:
+            current_id, depth = to_explore.popleft()
+            if depth >= max_depth:
+                continue
             
-            while to_explore:
-                current_id, depth = to_explore.pop(0)
-                if depth >= max_depth:
-                    continue
-                
-                for edge_key, edge_data in self.edges.items():
-                    if current_id in edge_key:
-                        other_id = edge_key[0] if edge_key[1] == current_id else edge_key[1]
-                        if other_id not in related:
-                            related.add(other_id)
-                            to_explore.append((other_id, depth + 1))
+            for other_id, strength in self._neighbors(current_id):
+                if strength >= min_strength and other_id not in visited:
+                    visited.add(other_id)
+                    related.append(other_id)
+                    to_explore.append((other_id, depth + 1))
+        
+        return related
+    
+    def find_weighted_related(self, concept_id: str, max_depth: int = 2,
+                              limit: int = 20) -> List[tuple]:
+        """Связанные концепции по убыванию силы связи: [(concept_id, score)]
+        
+        Оценка пути - произведение сил связей (сила ограничена 1.0),
+        для каждой концепции берется лучший путь не длиннее max_depth.
+        """
+        best = {concept_id: 1.0}
+        heap = [(-1.0, 0, concept_id)]
+        results = []
+        
+        while heap and len(results) < limit:
+            score, depth, current_id = heapq.heappop(heap)
+            score = -score
+            if score < best.get(current_id, 0.0):
+                continue
+            if current_id != concept_id:
+                results.append((current_id, score))
+            if depth >= max_depth:
+                continue
             
-            return list(related)
+            for other_id, strength in self._neighbors(current_id):
+                other_score = score * min(max(strength, 0.0), 1.0)
+                if other_score > best.get(other_id, 0.0):
+                    best[other_id] = other_score
+                    heapq.heappush(heap, (-other_score, depth + 1, other_id))
+        
+        return results
+    
+    def get_neighborhoods(self, concept_ids: List[str], max_depth: int = 1,
+                          weighted: bool = False, limit: int = 20) -> Dict[str, List]:
+        """Окрестности нескольких концепций за один вызов"""
+        neighborhoods = {}
+        for concept_id in dict.fromkeys(concept_ids):
+            if weighted:
+                neighborhoods[concept_id] = self.find_weighted_related(concept_id, max_depth, limit)
+            else:
+                neighborhoods[concept_id] = self.find_related_concepts(concept_id, max_depth)
+        return neighborhoods
     
     def search_concepts(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Поиск концепций по запросу"""
-        with self.lock:
-            query_lower = query.lower()
-            results = []
-            
-            # Поиск по ключевым словам
-            for keyword, concept_ids in self.concept_index.items():
-                if query_lower in keyword:
-                    for concept_id in concept_ids:
-                        if concept_id in self.nodes:
-                            concept = self.nodes[concept_id].copy()
-                            concept["relevance_score"] = 1.0
-                            results.append(concept)
-            
-            # Сортировка по релевантности и использованию
-            results.sort(key=lambda x: (x["relevance_score"], x["usage_count"]), reverse=True)
-            return results[:limit]
+        """Поиск концепций по запросу (BM25 с учетом частоты использования)"""
+        matches = self.text_index.search(query, limit, boost=self.usage_boost)
+        
+        results = []
+        with self.lock.read():
+            for concept_id, score in matches:
+                if concept_id in self.nodes:
+                    concept = self.nodes[concept_id].copy()
+                    concept["relevance_score"] = score
+                    results.append(concept)
+        return results
 
 class EnhancedSharedMemory:
     """Расширенная общая память с графом знаний"""
@@ -169,12 +263,19 @@ class EnhancedSharedMemory:
         self.agent_capabilities = {}
         self.task_history = []
         self.collaboration_patterns = defaultdict(int)
-        self.lock = threading.Lock()
+        # Полнотекстовый индекс элементов базы знаний: (key, номер элемента) -> текст
+        self.text_index = TextIndex()
+        self.concept_ids = {}  # key -> concept_id в графе знаний
+        self.journal = None  # KnowledgeStore: журнал изменений для сохранения на диск
+        # Эмбеддинги знаний для подстановки релевантных фактов в промпты агентов
+        self.vector_store = create_vector_store("enhanced_shared_memory")
+        # Поиски и чтение контекста не ждут друг друга, запись - монопольно
+        self.lock = ReadWriteLock()
     
     def store_knowledge(self, key: str, value: Any, agent_id: str, 
                        keywords: List[str] = None, metadata: Dict[str, Any] = None):
         """Сохранить знание в общей памяти"""
-        with self.lock:
+        with self.lock.write():
             if key not in self.knowledge_base:
                 self.knowledge_base[key] = []
             
@@ -187,87 +288,207 @@ class EnhancedSharedMemory:
             }
             
             self.knowledge_base[key].append(knowledge_item)
+            doc_id = (key, len(self.knowledge_base[key]) - 1)
+            if self.journal:
+                self.journal.record("knowledge", key, knowledge_item)
             
-            # Добавляем в граф знаний
-            concept_id = hashlib.md5(key.encode()).hexdigest()
-            self.knowledge_graph.add_concept(
-                concept_id, key, str(value), keywords or [], agent_id, metadata
-            )
+            concept_id = self._concept_id(key)
+        
+        # Индексы обновляются инкрементально, без блокировки всей памяти
+        self.text_index.add(doc_id, self._index_text(key, value, keywords))
+        self.vector_store.add(f"{key}: {str(value)[:1000]}", {"key": key, "agent_id": agent_id})
+        
+        # Добавляем в граф знаний
+        self.knowledge_graph.add_concept(
+            concept_id, key, str(value), keywords or [], agent_id, metadata
+        )
+    
+    def _concept_id(self, key: str) -> str:
+        concept_id = self.concept_ids.get(key)
+        if concept_id is None:
+            concept_id = self.concept_ids[key] = hashlib.md5(key.encode()).hexdigest()
+        return concept_id
+    
+    @staticmethod
+    def _index_text(key: str, value: Any, keywords: List[str] = None) -> str:
+        return " ".join([key, *map(str, keywords or []), str(value)[:1000]])
+    
+    def attach_journal(self, journal):
+        """Писать изменения памяти в журнал (KnowledgeStore)"""
+        with self.lock.write():
+            self.journal = journal
+    
+    def load_state(self, state: Dict[str, Any]):
+        """Массовая загрузка сохраненного состояния
+        
+        Элементы добавляются в базу как есть (с исходными временными метками),
+        индексы и граф заполняются пачками, концепция строится по последнему
+        элементу ключа - как после последовательных store_knowledge.
+        """
+        knowledge_base = state.get("knowledge_base", {})
+        documents = []
+        concepts = []
+        with self.lock.write():
+            for key, items in knowledge_base.items():
+                if not items:
+                    continue
+                stored = self.knowledge_base.setdefault(key, [])
+                start = len(stored)
+                stored.extend(items)
+                for offset, item in enumerate(items):
+                    documents.append(((key, start + offset),
+                                      self._index_text(key, item["value"], item.get("keywords"))))
+                last = items[-1]
+                concepts.append((self._concept_id(key), key, str(last["value"]), last.get("keywords") or [],
+                                 last["agent_id"], last.get("metadata")))
+            self.conversation_history.extend(state.get("conversation_history", []))
+        
+        self.text_index.add_many(documents)
+        self.knowledge_graph.add_concepts(concepts)
+        # Эмбеддинги - самая дорогая часть загрузки: считаем в фоне, уже сохраненные
+        # на диске векторы пропускаются по хешу текста
+        threading.Thread(target=self._load_vectors, args=(knowledge_base,), daemon=True).start()
+    
+    def _load_vectors(self, knowledge_base: Dict[str, List[Dict[str, Any]]]):
+        try:
+            for key, items in knowledge_base.items():
+                for item in items:
+                    self.vector_store.add(f"{key}: {str(item['value'])[:1000]}",
+                                          {"key": key, "agent_id": item["agent_id"]})
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки эмбеддингов знаний: {e}")
+    
+    def export_state(self) -> tuple:
+        """Полное состояние для снимка и номер последней вошедшей в него записи журнала"""
+        with self.lock.read():
+            state = {
+                "knowledge_base": {key: list(items) for key, items in self.knowledge_base.items()},
+                "conversation_history": list(self.conversation_history),
+                "agent_capabilities": {
+                    agent_id: asdict(capability) for agent_id, capability in self.agent_capabilities.items()
+                },
+                "saved_at": datetime.now().isoformat()
+            }
+            seq = self.journal.seq if self.journal else 0
+        return state, seq
     
     def get_knowledge(self, key: str) -> List[Any]:
         """Получить знания по ключу"""
-        with self.lock:
+        concept_id = self.concept_ids.get(key)
+        if concept_id:
+            self.knowledge_graph.record_usage(concept_id)
+        with self.lock.read():
             return self.knowledge_base.get(key, [])
     
-    def search_knowledge(self, query: str) -> List[Dict[str, Any]]:
+    def search_knowledge(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
         """Поиск знаний по запросу"""
-        with self.lock:
-            # Поиск в графе знаний
-            concepts = self.knowledge_graph.search_concepts(query)
-            
-            # Поиск в базе знаний
-            results = []
-            query_lower = query.lower()
-            
-            for key, items in self.knowledge_base.items():
-                if query_lower in key.lower():
-                    for item in items:
-                        if any(query_lower in str(kw).lower() for kw in item.get("keywords", [])):
-                            results.append({
-                                "key": key,
-                                "value": item["value"],
-                                "agent_id": item["agent_id"],
-                                "timestamp": item["timestamp"],
-                                "relevance": 1.0
-                            })
-            
-            return results + concepts
+        # Поиск в графе знаний
+        concepts = self.knowledge_graph.search_concepts(query)
+        
+        # Поиск в базе знаний по индексу: стоимость зависит от совпадений, а не от размера базы
+        matches = self.text_index.search(
+            query, limit,
+            boost=lambda doc_id: self.knowledge_graph.usage_boost(self.concept_ids.get(doc_id[0], ""))
+        )
+        
+        results = []
+        with self.lock.read():
+            for (key, index), score in matches:
+                item = self.knowledge_base[key][index]
+                results.append({
+                    "key": key,
+                    "value": item["value"],
+                    "agent_id": item["agent_id"],
+                    "timestamp": item["timestamp"],
+                    "relevance": score
+                })
+        
+        return results + concepts
+    
+    def retrieve(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
+        """k знаний, наиболее близких к запросу по смыслу"""
+        return self.vector_store.retrieve(query, k)
     
     def add_conversation(self, message: Dict[str, Any]):
         """Добавить сообщение в историю разговора"""
-        with self.lock:
+        with self.lock.write():
             self.conversation_history.append(message)
+            if self.journal:
+                self.journal.record("conversation", message)
     
     def get_recent_context(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Получить последний контекст разговора"""
-        with self.lock:
-            return list(self.conversation_history)[-limit:]
+        with self.lock.read():
+            if limit <= 0:
+                return list(self.conversation_history)
+            # С конца: копируются только limit сообщений, а не вся история
+            return list(islice(reversed(self.conversation_history), limit))[::-1]
     
     def update_agent_capability(self, agent_id: str, capability: AgentCapability):
         """Обновить возможности агента"""
-        with self.lock:
+        with self.lock.write():
             self.agent_capabilities[agent_id] = capability
     
     def get_agent_capabilities(self) -> Dict[str, AgentCapability]:
         """Получить возможности всех агентов"""
-        with self.lock:
+        with self.lock.read():
             return self.agent_capabilities.copy()
     
     def record_collaboration(self, agent1_id: str, agent2_id: str, success: bool):
         """Записать результат коллаборации"""
-        with self.lock:
+        with self.lock.write():
             key = tuple(sorted([agent1_id, agent2_id]))
             if success:
                 self.collaboration_patterns[key] += 1
     
     def get_collaboration_score(self, agent1_id: str, agent2_id: str) -> int:
         """Получить оценку коллаборации между агентами"""
-        with self.lock:
+        with self.lock.read():
             key = tuple(sorted([agent1_id, agent2_id]))
             return self.collaboration_patterns.get(key, 0)
 
+# Сколько агентов назначать на задачу в зависимости от сложности
+AGENTS_PER_COMPLEXITY = {
+    TaskComplexity.SIMPLE: 1,
+    TaskComplexity.MEDIUM: 2,
+    TaskComplexity.COMPLEX: 3,
+    TaskComplexity.MULTI_AGENT: 5
+}
+
+OVERLOAD_THRESHOLD = 0.8  # выше - агент не получает новых задач и отдает очередь
+IDLE_THRESHOLD = 0.5  # ниже - агент может забирать чужие задачи
+
 class AgentCoordinator:
-    """Координатор агентов"""
+    """Координатор агентов
+    
+    Работает в event loop: у каждого агента своя asyncio.Queue и
+    обработчик, сроки задач - таймеры loop.call_at (куча таймеров
+    asyncio), возможности агентов пересчитываются по событиям
+    (сообщение поставлено/обработано, задача назначена/завершена).
+    Без событий координатор не просыпается.
+    """
     
     def __init__(self, shared_memory: EnhancedSharedMemory):
         self.shared_memory = shared_memory
         self.agents = {}
         self.active_tasks = {}
-        self.message_queue = deque()
+        self.message_queue = deque()  # сообщения до запуска координации
+        self.agent_queues: Dict[str, asyncio.Queue] = {}
+        self.agent_workers: Dict[str, asyncio.Task] = {}
+        self.deadline_timers: Dict[str, asyncio.TimerHandle] = {}
+        self.agent_pending = defaultdict(int)  # сообщения в очереди и в обработке
+        # Инвертированный индекс навыков и кучи (загрузка, -производительность) по навыку.
+        # Записи устаревают лениво: актуальна только запись с последней версией агента
+        self.skill_index: Dict[str, Set[str]] = defaultdict(set)
+        self.skill_heaps: Dict[str, List[tuple]] = defaultdict(list)
+        self._heap_versions: Dict[str, int] = {}
+        self._heap_keys: Dict[str, tuple] = {}
+        self.overloaded: Set[str] = set()
         self.coordination_strategies = {}
         self.task_assignments = {}
         self.running = False
-        self.coordinator_thread = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.routing_stats = {"routed": 0, "total_latency_ms": 0.0, "max_latency_ms": 0.0, "stolen": 0}
         
         # Настройка стратегий координации
         self._setup_coordination_strategies()
@@ -299,72 +520,141 @@ class AgentCoordinator:
         )
         
         self.shared_memory.update_agent_capability(agent.agent_id, capability)
+        for skill in agent.skills:
+            self.skill_index[skill].add(agent.agent_id)
+        self._heap_keys.pop(agent.agent_id, None)
+        self._index_agent(agent.agent_id)
+        if self.running:
+            if self._in_loop():
+                self._start_agent_worker(agent.agent_id)
+            else:
+                self.loop.call_soon_threadsafe(self._start_agent_worker, agent.agent_id)
         
         logger.info(f"📝 Агент {agent.name} зарегистрирован в координаторе")
     
     def start_coordination(self):
-        """Запуск системы координации"""
+        """Запуск системы координации (вызывается из работающего event loop)"""
+        self.loop = asyncio.get_running_loop()
         self.running = True
-        self.coordinator_thread = threading.Thread(target=self._coordination_loop, daemon=True)
-        self.coordinator_thread.start()
+        for agent_id in self.agents:
+            self._start_agent_worker(agent_id)
+        # Сообщения, отправленные до запуска
+        while self.message_queue:
+            self._deliver(self.message_queue.popleft())
         logger.info("🚀 Система координации запущена")
     
     def stop_coordination(self):
         """Остановка системы координации"""
         self.running = False
-        if self.coordinator_thread:
-            self.coordinator_thread.join(timeout=5)
+        if self.loop is None:
+            return
+        if self._in_loop():
+            self._cancel_workers()
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._cancel_workers)
         logger.info("🛑 Система координации остановлена")
     
-    def _coordination_loop(self):
-        """Основной цикл координации"""
-        while self.running:
-            try:
-                # Обработка очереди сообщений
-                self._process_message_queue()
-                
-                # Мониторинг активных задач
-                self._monitor_active_tasks()
-                
-                # Оптимизация распределения ресурсов
-                self._optimize_resource_allocation()
-                
-                # Обновление возможностей агентов
-                self._update_agent_capabilities()
-                
-                time.sleep(1)  # Пауза между итерациями
-                
-            except Exception as e:
-                logger.error(f"❌ Ошибка в цикле координации: {e}")
-                time.sleep(5)
+    def _cancel_workers(self):
+        dropped = sum(queue.qsize() for queue in self.agent_queues.values())
+        for worker in self.agent_workers.values():
+            worker.cancel()
+        for timer in self.deadline_timers.values():
+            timer.cancel()
+        self.agent_workers.clear()
+        self.agent_queues.clear()
+        self.deadline_timers.clear()
+        if dropped:
+            logger.warning(f"⚠️ При остановке отброшено {dropped} недоставленных сообщений")
     
-    def _process_message_queue(self):
-        """Обработка очереди сообщений"""
-        while self.message_queue:
+    def _in_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+    
+    def _start_agent_worker(self, agent_id: str):
+        if agent_id in self.agent_workers:
+            return
+        queue = self.agent_queues[agent_id] = asyncio.Queue()
+        self.agent_workers[agent_id] = self.loop.create_task(self._agent_worker(agent_id, queue))
+    
+    async def _agent_worker(self, agent_id: str, queue: asyncio.Queue):
+        """Доставка сообщений агенту по одному, в порядке поступления"""
+        while True:
+            enqueued_at, message = await queue.get()
             try:
-                message = self.message_queue.popleft()
-                self._route_message(message)
+                latency_ms = (time.perf_counter() - enqueued_at) * 1000
+                self.routing_stats["routed"] += 1
+                self.routing_stats["total_latency_ms"] += latency_ms
+                self.routing_stats["max_latency_ms"] = max(self.routing_stats["max_latency_ms"], latency_ms)
+                
+                result = await self.agents[agent_id].process_message(message)
+                self._on_message_processed(agent_id, message, result)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"❌ Ошибка обработки сообщения: {e}")
+            finally:
+                queue.task_done()
+                self.agent_pending[agent_id] -= 1
+                self._refresh_agent_capability(agent_id)
     
-    def _route_message(self, message: AgentMessage):
-        """Маршрутизация сообщения между агентами"""
-        if message.recipient_id in self.agents:
-            agent = self.agents[message.recipient_id]
-            # Асинхронная обработка сообщения
-            asyncio.create_task(agent.process_message(message))
+    def _enqueue_message(self, message: AgentMessage):
+        """Поставить сообщение в очередь агента из любого потока"""
+        if not self.running:
+            self.message_queue.append(message)
+        elif self._in_loop():
+            self._deliver(message)
         else:
+            self.loop.call_soon_threadsafe(self._deliver, message)
+    
+    def _deliver(self, message: AgentMessage):
+        """Маршрутизация сообщения между агентами"""
+        queue = self.agent_queues.get(message.recipient_id)
+        if queue is None:
             logger.warning(f"⚠️ Агент {message.recipient_id} не найден")
+            return
+        queue.put_nowait((time.perf_counter(), message))
+        self.agent_pending[message.recipient_id] += 1
+        self._refresh_agent_capability(message.recipient_id)
+    
+    def _on_message_processed(self, agent_id: str, message: AgentMessage, result: Any):
+        """Результат агента по задаче координации"""
+        if message.message_type != "new_task":
+            return
+        task = self.active_tasks.get(message.content.get("task_id"))
+        if task is None or agent_id not in task.assigned_agents:
+            return
+        if isinstance(result, dict) and "error" in result:
+            self.fail_task(task.id, result["error"])
+            return
+        if task.results is None:
+            task.results = {}
+        task.results[agent_id] = result
+        task.progress = len(task.results) / len(task.assigned_agents)
+        if all(assigned in task.results for assigned in task.assigned_agents):
+            self.complete_task(task.id)
+    
+    def complete_task(self, task_id: str, results: Dict[str, Any] = None):
+        """Событие: задача выполнена"""
+        task = self.active_tasks.get(task_id)
+        if task is None:
+            return
+        task.status = "completed"
+        task.progress = 1.0
+        if results:
+            task.results = {**(task.results or {}), **results}
+        self._handle_task_completion(task)
     
-    def _monitor_active_tasks(self):
-        """Мониторинг активных задач"""
-        for task_id, task in list(self.active_tasks.items()):
-            if task.status == "completed":
-                self._handle_task_completion(task)
-            elif task.status == "failed":
-                self._handle_task_failure(task)
-            elif self._is_task_overdue(task):
-                self._handle_overdue_task(task)
+    def fail_task(self, task_id: str, error: str = ""):
+        """Событие: задача провалена"""
+        task = self.active_tasks.get(task_id)
+        if task is None:
+            return
+        task.status = "failed"
+        if error:
+            task.results = {**(task.results or {}), "error": error}
+        self._handle_task_failure(task)
     
     def _handle_task_completion(self, task: CoordinationTask):
         """Обработка завершения задачи"""
@@ -375,7 +665,6 @@ class AgentCoordinator:
             if agent_id in self.shared_memory.agent_capabilities:
                 capability = self.shared_memory.agent_capabilities[agent_id]
                 capability.performance_score = min(1.0, capability.performance_score + 0.1)
-                capability.current_load = max(0.0, capability.current_load - 0.2)
                 self.shared_memory.update_agent_capability(agent_id, capability)
         
         # Записываем успешную коллаборацию
@@ -385,7 +674,7 @@ class AgentCoordinator:
                     self.shared_memory.record_collaboration(agent1, agent2, True)
         
         # Удаляем из активных задач
-        del self.active_tasks[task.id]
+        self._finish_task(task)
     
     def _handle_task_failure(self, task: CoordinationTask):
         """Обработка неудачи задачи"""
@@ -405,15 +694,31 @@ class AgentCoordinator:
                     self.shared_memory.record_collaboration(agent1, agent2, False)
         
         # Удаляем из активных задач
-        del self.active_tasks[task.id]
+        self._finish_task(task)
     
-    def _is_task_overdue(self, task: CoordinationTask) -> bool:
-        """Проверка просрочки задачи"""
-        if not task.deadline:
-            return False
-        
-        deadline = datetime.fromisoformat(task.deadline)
-        return datetime.now() > deadline
+    def _finish_task(self, task: CoordinationTask):
+        self.active_tasks.pop(task.id, None)
+        timer = self.deadline_timers.pop(task.id, None)
+        if timer:
+            timer.cancel()
+        for agent_id in task.assigned_agents:
+            self._refresh_agent_capability(agent_id)
+    
+    def _schedule_deadline(self, task: CoordinationTask):
+        """Таймер срока задачи вместо периодической проверки всех задач"""
+        if not task.deadline or self.loop is None:
+            return
+        previous = self.deadline_timers.pop(task.id, None)
+        if previous:
+            previous.cancel()
+        delay = max(0.0, datetime.fromisoformat(task.deadline).timestamp() - time.time())
+        self.deadline_timers[task.id] = self.loop.call_later(delay, self._on_deadline, task.id)
+    
+    def _on_deadline(self, task_id: str):
+        self.deadline_timers.pop(task_id, None)
+        task = self.active_tasks.get(task_id)
+        if task is not None and task.status == "in_progress":
+            self._handle_overdue_task(task)
     
     def _handle_overdue_task(self, task: CoordinationTask):
         """Обработка просроченной задачи"""
@@ -425,53 +730,154 @@ class AgentCoordinator:
     def _redistribute_task(self, task: CoordinationTask):
         """Перераспределение задачи"""
         # Находим более подходящих агентов
+        previous_agents = set(task.assigned_agents)
         new_agents = self._select_agents_for_task(task)
         
         if new_agents:
             task.assigned_agents = new_agents
             task.status = "in_progress"
+            # Новым исполнителям - сообщение о задаче
+            self._notify_agents(task, [agent_id for agent_id in new_agents if agent_id not in previous_agents])
             logger.info(f"🔄 Задача {task.title} перераспределена")
         else:
-            task.status = "failed"
             logger.error(f"❌ Не удалось перераспределить задачу {task.title}")
+            self.fail_task(task.id, "overdue")
     
-    def _optimize_resource_allocation(self):
-        """Оптимизация распределения ресурсов"""
-        # Анализируем загрузку агентов
-        capabilities = self.shared_memory.get_agent_capabilities()
+    def _update_agent_load(self, agent_id: str) -> Optional[AgentCapability]:
+        """Пересчитать доступность и загрузку агента и его место в кучах навыков"""
+        agent = self.agents.get(agent_id)
+        capability = self.shared_memory.agent_capabilities.get(agent_id)
+        if agent is None or capability is None:
+            return None
+        if hasattr(agent, 'get_status'):
+            capability.availability = agent.get_status().get("status") != "error"
+        pending = self.agent_pending[agent_id] + len(getattr(agent, "task_queue", []))
+        capability.current_load = pending / 10.0  # Нормализация
+        self.shared_memory.update_agent_capability(agent_id, capability)
+        self._index_agent(agent_id)
+        return capability
+    
+    def _refresh_agent_capability(self, agent_id: str):
+        """Обновить агента по событию и перераспределить очередь при перегрузке"""
+        capability = self._update_agent_load(agent_id)
+        if capability is None:
+            return
         
-        for agent_id, capability in capabilities.items():
-            if capability.current_load > 0.8:  # Высокая загрузка
-                # Ищем задачи для перераспределения
-                self._balance_agent_load(agent_id, capability)
+        if capability.current_load > OVERLOAD_THRESHOLD:  # Высокая загрузка
+            self.overloaded.add(agent_id)
+            self._balance_agent_load(agent_id, capability)
+        else:
+            self.overloaded.discard(agent_id)
+            # Освободившийся агент забирает работу у перегруженных с общими навыками
+            if capability.current_load < IDLE_THRESHOLD and self.overloaded:
+                for other_id in list(self.overloaded):
+                    other = self.shared_memory.agent_capabilities.get(other_id)
+                    if other and set(other.skills) & set(capability.skills):
+                        self._balance_agent_load(other_id, other)
     
     def _balance_agent_load(self, agent_id: str, capability: AgentCapability):
-        """Балансировка загрузки агента"""
-        # Находим менее загруженных агентов с похожими навыками
-        other_capabilities = {
-            aid: cap for aid, cap in self.shared_memory.get_agent_capabilities().items()
-            if aid != agent_id and cap.current_load < 0.5
-        }
+        """Балансировка загрузки агента: перенос ожидающих задач свободным агентам
         
-        # Ищем агентов с пересекающимися навыками
-        for other_id, other_cap in other_capabilities.items():
-            common_skills = set(capability.skills) & set(other_cap.skills)
-            if common_skills:
-                # Можем перераспределить некоторые задачи
-                logger.info(f"⚖️ Балансировка загрузки между {agent_id} и {other_id}")
-                break
-    
-    def _update_agent_capabilities(self):
-        """Обновление возможностей агентов"""
-        for agent_id, agent in self.agents.items():
-            if hasattr(agent, 'get_status'):
-                status = agent.get_status()
-                
-                capability = self.shared_memory.agent_capabilities.get(agent_id)
-                if capability:
-                    capability.availability = status.get("status") != "error"
-                    capability.current_load = len(agent.task_queue) / 10.0  # Нормализация
-                    self.shared_memory.update_agent_capability(agent_id, capability)
+        Из хвоста очереди перегруженного агента забираются еще не начатые
+        задачи координации и передаются наименее загруженному доступному
+        агенту с нужным навыком, пока тот свободнее отдающего агента.
+        """
+        queue = self.agent_queues.get(agent_id)
+        if not queue or queue.empty():
+            return
+        
+        # Разбираем очередь целиком (порядок сохраняется), чтобы взять задачи с конца
+        items = []
+        while not queue.empty():
+            items.append(queue.get_nowait())
+            queue.task_done()
+        
+        kept = []
+        moved = 0
+        for enqueued_at, message in reversed(items):
+            remaining_load = (self.agent_pending[agent_id] - moved) / 10.0
+            thief_id = self._find_thief(agent_id, message, remaining_load - 0.1)
+            if thief_id is None:
+                kept.append((enqueued_at, message))
+                continue
+            task = self.active_tasks[message.content["task_id"]]
+            task.assigned_agents = [thief_id if assigned == agent_id else assigned
+                                    for assigned in task.assigned_agents]
+            self.agent_queues[thief_id].put_nowait((enqueued_at, replace(message, recipient_id=thief_id)))
+            self.agent_pending[thief_id] += 1
+            self._update_agent_load(thief_id)
+            moved += 1
+            logger.info(f"⚖️ Задача {task.title} передана от {agent_id} агенту {thief_id}")
+        
+        for item in reversed(kept):
+            queue.put_nowait(item)
+        if moved:
+            self.agent_pending[agent_id] -= moved
+            self.routing_stats["stolen"] += moved
+            self._update_agent_load(agent_id)
+            if capability.current_load <= OVERLOAD_THRESHOLD:
+                self.overloaded.discard(agent_id)
+    
+    def _find_thief(self, agent_id: str, message: AgentMessage, max_load: float) -> Optional[str]:
+        """Свободный агент для ожидающей задачи координации (None, если задачу не передать)"""
+        if message.message_type != "new_task":
+            return None
+        task = self.active_tasks.get(message.content.get("task_id"))
+        if task is None:
+            return None
+        exclude = set(task.assigned_agents) | {agent_id}
+        for skill in dict.fromkeys(task.required_skills):
+            for candidate_id, (load, _) in self._best_agents_for_skill(skill, 1, exclude):
+                if load < min(IDLE_THRESHOLD, max_load) and candidate_id in self.agent_queues:
+                    return candidate_id
+        return None
+    
+    def _heap_key(self, agent_id: str) -> Optional[tuple]:
+        capability = self.shared_memory.agent_capabilities.get(agent_id)
+        if capability is None:
+            return None
+        return (capability.current_load, -capability.performance_score)
+    
+    def _index_agent(self, agent_id: str):
+        """Добавить актуальную запись агента в кучи его навыков (если ключ изменился)"""
+        key = self._heap_key(agent_id)
+        if key is None or self._heap_keys.get(agent_id) == key:
+            return
+        version = self._heap_versions.get(agent_id, 0) + 1
+        self._heap_versions[agent_id] = version
+        self._heap_keys[agent_id] = key
+        for skill in self.shared_memory.agent_capabilities[agent_id].skills:
+            heap = self.skill_heaps[skill]
+            heapq.heappush(heap, (*key, version, agent_id))
+            # Сжатие кучи от устаревших записей
+            if len(heap) > 4 * len(self.skill_index[skill]) + 16:
+                heap[:] = [entry for entry in heap if self._heap_versions.get(entry[3]) == entry[2]]
+                heapq.heapify(heap)
+    
+    def _best_agents_for_skill(self, skill: str, limit: int, exclude: Set[str] = frozenset()) -> List[tuple]:
+        """До limit доступных агентов с навыком по возрастанию (загрузка, -производительность)"""
+        heap = self.skill_heaps.get(skill)
+        if not heap:
+            return []
+        popped = []
+        result = []
+        while heap and len(result) < limit:
+            entry = heapq.heappop(heap)
+            load, negative_score, version, agent_id = entry
+            if self._heap_versions.get(agent_id) != version:
+                continue  # есть более новая запись
+            if self._heap_key(agent_id) != (load, negative_score):
+                # Возможности изменены в обход координатора: переиндексируем
+                self._index_agent(agent_id)
+                continue
+            popped.append(entry)
+            capability = self.shared_memory.agent_capabilities[agent_id]
+            if agent_id in exclude or not capability.availability or load > OVERLOAD_THRESHOLD:
+                continue
+            result.append((agent_id, (load, negative_score)))
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return result
     
     async def create_coordination_task(self, title: str, description: str, 
                                      required_skills: List[str], 
@@ -500,6 +906,7 @@ class AgentCoordinator:
         if selected_agents:
             task.status = "in_progress"
             self.active_tasks[task.id] = task
+            self._schedule_deadline(task)
             
             # Создаем сообщения для агентов
             await self._notify_agents_about_task(task)
@@ -512,45 +919,26 @@ class AgentCoordinator:
         return task
     
     def _select_agents_for_task(self, task: CoordinationTask) -> List[str]:
-        """Выбор агентов для задачи"""
-        capabilities = self.shared_memory.get_agent_capabilities()
-        suitable_agents = []
+        """Выбор агентов для задачи
         
-        # Фильтруем агентов по навыкам и доступности
-        for agent_id, capability in capabilities.items():
-            if not capability.availability:
-                continue
-            
-            # Проверяем наличие необходимых навыков
-            has_skills = any(skill in capability.skills for skill in task.required_skills)
-            if not has_skills:
-                continue
-            
-            # Проверяем загрузку
-            if capability.current_load > 0.8:
-                continue
-            
-            suitable_agents.append((agent_id, capability))
+        Кандидаты берутся из куч навыков задачи: для каждого навыка - не больше
+        нужного числа наименее загруженных агентов, без перебора всех агентов.
+        """
+        limit = AGENTS_PER_COMPLEXITY.get(task.complexity, 5)
+        candidates = {}
+        for skill in dict.fromkeys(task.required_skills):
+            for agent_id, key in self._best_agents_for_skill(skill, limit):
+                candidates[agent_id] = key
         
-        # Сортируем по производительности и загрузке
-        suitable_agents.sort(
-            key=lambda x: (x[1].performance_score, -x[1].current_load),
-            reverse=True
-        )
-        
-        # Выбираем количество агентов в зависимости от сложности
-        if task.complexity == TaskComplexity.SIMPLE:
-            return [suitable_agents[0][0]] if suitable_agents else []
-        elif task.complexity == TaskComplexity.MEDIUM:
-            return [agent[0] for agent in suitable_agents[:2]]
-        elif task.complexity == TaskComplexity.COMPLEX:
-            return [agent[0] for agent in suitable_agents[:3]]
-        else:  # MULTI_AGENT
-            return [agent[0] for agent in suitable_agents[:5]]
+        # Наименее загруженные, при равной загрузке - более производительные
+        return [agent_id for agent_id, _ in heapq.nsmallest(limit, candidates.items(), key=lambda item: item[1])]
     
     async def _notify_agents_about_task(self, task: CoordinationTask):
         """Уведомление агентов о новой задаче"""
-        for agent_id in task.assigned_agents:
+        self._notify_agents(task, task.assigned_agents)
+    
+    def _notify_agents(self, task: CoordinationTask, agent_ids: List[str]):
+        for agent_id in agent_ids:
             message = AgentMessage(
                 id=str(uuid.uuid4()),
                 sender_id="coordinator",
@@ -568,7 +956,7 @@ class AgentCoordinator:
                 priority=task.priority
             )
             
-            self.message_queue.append(message)
+            self._enqueue_message(message)
     
     def send_message_to_agent(self, sender_id: str, recipient_id: str, 
                             message_type: str, content: Dict[str, Any],
@@ -585,7 +973,7 @@ class AgentCoordinator:
             requires_response=requires_response
         )
         
-        self.message_queue.append(message)
+        self._enqueue_message(message)
     
     def get_coordination_status(self) -> Dict[str, Any]:
         """Получить статус координации"""
@@ -594,7 +982,14 @@ class AgentCoordinator:
         return {
             "total_agents": len(self.agents),
             "active_tasks": len(self.active_tasks),
-            "message_queue_size": len(self.message_queue),
+            "message_queue_size": len(self.message_queue) + sum(
+                queue.qsize() for queue in list(self.agent_queues.values())
+            ),
+            "routing": {
+                "routed": self.routing_stats["routed"],
+                "avg_latency_ms": self.routing_stats["total_latency_ms"] / max(1, self.routing_stats["routed"]),
+                "max_latency_ms": self.routing_stats["max_latency_ms"]
+            },
             "agent_capabilities": {
                 agent_id: {
                     "skills": cap.skills,
@@ -5,16 +5,49 @@ AI Engine для подключения к языковым моделям
 """
 
 import asyncio
+import contextvars
 import json
 import logging
-import requests
-import subprocess
 import time
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+import weakref
+from typing import Dict, List, Any, Optional, Awaitable, Callable
+from dataclasses import dataclass, asdict, replace
+
+import aiohttp
+
+from ollama_client import OllamaError, get_ollama_client
+from response_cache import ResponseCache, make_cache_key
+from semantic_cache import semantic_cache
+from single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Колбэк для потоковой выдачи токенов: получает очередной фрагмент текста
+TokenCallback = Callable[[str], Awaitable[None]]
+
+# Колбэк текущего запроса пользователя. Устанавливается в BaseAgent.process_message,
+# чтобы обработчики агентов стримили ответ без изменения своих сигнатур
+token_callback: contextvars.ContextVar[Optional[TokenCallback]] = contextvars.ContextVar(
+    "token_callback", default=None
+)
+
+# Релевантные факты из памяти агентов для текущего запроса. Устанавливается в
+# BaseAgent.process_message и добавляется в начало промпта в AIEngine.generate_response
+prompt_context: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "prompt_context", default=None
+)
+
+async def begin_generation(on_token: Optional[TokenCallback]):
+    """Отметить начало новой генерации в потоке токенов
+
+    Обработчик агента может вызвать модель несколько раз подряд (README,
+    затем requirements.txt). Колбэк с методом new_segment узнает о границе
+    между ответами и не склеивает их в один текст
+    """
+    new_segment = getattr(on_token, "new_segment", None)
+    if new_segment is not None:
+        await new_segment()
+
 @dataclass
 class AIResponse:
     """Ответ от AI модели"""
@@ -28,50 +61,76 @@ class AIResponse:
 class OllamaEngine:
     """Движок для работы с Ollama"""
     
-    def __init__(self, base_url: str = "http://localhost:11434", default_model: str = "llama2:latest"):
+    def __init__(self, base_url: str = "http://localhost:11434", default_model: str = "llama2:latest",
+                 health_ttl: float = 10.0, response_cache: ResponseCache = None):
         self.base_url = base_url
         self.default_model = default_model
         self.available_models = []
-        self.response_cache = {}  # Кэш для быстрых ответов
-        self._load_models()
-    
-    def _load_models(self):
-        """Загрузить список доступных моделей"""
-        try:
-            result = subprocess.run(['ollama', 'list'], capture_output=True, text=True)
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')[1:]  # Пропускаем заголовок
-                self.available_models = [line.split()[0] for line in lines if line.strip()]
-                logger.info(f"✅ Загружено {len(self.available_models)} моделей Ollama")
-            else:
-                logger.warning("⚠️ Не удалось получить список моделей Ollama")
-        except Exception as e:
-            logger.error(f"❌ Ошибка загрузки моделей Ollama: {e}")
+        self.response_cache = response_cache or ResponseCache()  # Кэш для быстрых ответов
+        # Одинаковые одновременные запросы выполняются один раз
+        self.single_flight = SingleFlight()
+        self.client = get_ollama_client(base_url)
+        # Последний результат проверки здоровья, обновляется не чаще health_ttl
+        self.health_ttl = health_ttl
+        self.health = {"status": "unknown", "available_models": 0, "checked_at": 0.0}
     
     async def generate_response(self, prompt: str, model: str = None, 
-                              system_prompt: str = None, retry_count: int = 1, **kwargs) -> AIResponse:
-        """Генерация ответа от модели с retry механизмом и кэшированием"""
+                              system_prompt: str = None, retry_count: int = 1,
+                              on_token: Optional[TokenCallback] = None, **kwargs) -> AIResponse:
+        """Генерация ответа от модели с retry механизмом и кэшированием
+        
+        Если передан on_token, ответ запрашивается в потоковом режиме и каждый
+        фрагмент передается в колбэк по мере генерации. Одновременные запросы
+        с тем же ключом кэша ждут одну генерацию и получают тот же поток.
+        """
         start_time = time.time()
         model = model or self.default_model
+        options = self._build_options(**kwargs)
         
         # Проверяем кэш
-        cache_key = f"{prompt[:100]}_{model}_{kwargs.get('temperature', 0.7)}_{kwargs.get('max_tokens', 1000)}"
-        if cache_key in self.response_cache:
+        cache_key = make_cache_key(model, prompt, system_prompt, options)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
             logger.info("✅ Используем кэшированный ответ")
-            cached_response = self.response_cache[cache_key]
-            cached_response.response_time = 0.01  # Быстрый ответ из кэша
+            cached_response = AIResponse(**cached)
+            cached_response.response_time = time.time() - start_time
+            if on_token:
+                await on_token(cached_response.content)
             return cached_response
         
+        response = await self.single_flight.do(
+            cache_key,
+            lambda emit: self._generate_uncached(prompt, model, system_prompt, retry_count,
+                                                 cache_key, start_time, options, emit),
+            on_token=on_token,
+            text_of=lambda result: result.content
+        )
+        # У каждого вызова свой объект ответа и свое время ожидания
+        return replace(response, response_time=time.time() - start_time)
+    
+    async def _generate_uncached(self, prompt: str, model: str, system_prompt: Optional[str],
+                                 retry_count: int, cache_key: str, start_time: float,
+                                 options: Dict[str, Any], on_token: Optional[TokenCallback]) -> AIResponse:
+        """Запрос к модели с повторами; успешный ответ сохраняется в кэш"""
+        # Повтор после уже отправленных токенов продублировал бы текст у клиента
+        emitted = []
+        emit = None
+        if on_token:
+            async def emit(text: str):
+                emitted.append(text)
+                await on_token(text)
+        
         for attempt in range(retry_count + 1):
             try:
-                response = await self._make_request(prompt, model, system_prompt, start_time, **kwargs)
+                response = await self._make_request(prompt, model, system_prompt, start_time,
+                                                     on_token=emit, options=options)
                 # Сохраняем успешный ответ в кэш
                 if response.success and response.content:
-                    self.response_cache[cache_key] = response
+                    self.response_cache.set(cache_key, asdict(response))
                     logger.info("💾 Ответ сохранен в кэш")
                 return response
-            except requests.exceptions.Timeout:
-                if attempt < retry_count:
+            except asyncio.TimeoutError:
+                if attempt < retry_count and not emitted:
                     logger.warning(f"⏰ Попытка {attempt + 1} неудачна, повторяем...")
                     await asyncio.sleep(1)  # Небольшая пауза перед повтором
                     continue
@@ -86,7 +145,7 @@ class OllamaEngine:
                         error="AI timeout - используем fallback ответ"
                     )
             except Exception as e:
-                if attempt < retry_count:
+                if attempt < retry_count and not emitted:
                     logger.warning(f"❌ Попытка {attempt + 1} неудачна: {e}, повторяем...")
                     await asyncio.sleep(1)
                     continue
@@ -100,101 +159,154 @@ class OllamaEngine:
                         error=str(e)
                     )
     
-    async def _make_request(self, prompt: str, model: str, system_prompt: str, start_time: float, **kwargs) -> AIResponse:
-        """Выполнение HTTP запроса к Ollama"""
-        
-        # Подготавливаем данные для запроса с оптимизированными параметрами
-        data = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": kwargs.get("temperature", 0.5),  # Более детерминированные ответы
-                "top_p": kwargs.get("top_p", 0.8),  # Ограниченная выборка для скорости
-                "top_k": 20,  # Ограничение выбора токенов
-                "repeat_penalty": 1.1,  # Предотвращение повторов
-                "num_ctx": 1024,  # Уменьшенное контекстное окно
-                "num_predict": kwargs.get("max_tokens", 100)  # Ограничение генерации
-            }
+    def _build_options(self, **kwargs) -> Dict[str, Any]:
+        """Оптимизированные параметры генерации"""
+        return {
+            "temperature": kwargs.get("temperature", 0.5),  # Более детерминированные ответы
+            "top_p": kwargs.get("top_p", 0.8),  # Ограниченная выборка для скорости
+            "top_k": 20,  # Ограничение выбора токенов
+            "repeat_penalty": 1.1,  # Предотвращение повторов
+            "num_ctx": 1024,  # Уменьшенное контекстное окно
+            "num_predict": kwargs.get("max_tokens", 100)  # Ограничение генерации
         }
+    
+    async def _make_request(self, prompt: str, model: str, system_prompt: str, start_time: float,
+                            on_token: Optional[TokenCallback] = None,
+                            options: Dict[str, Any] = None, **kwargs) -> AIResponse:
+        """Выполнение HTTP запроса к Ollama"""
+        options = options or self._build_options(**kwargs)
         
-        if system_prompt:
-            data["system"] = system_prompt
-        
-        # Отправляем запрос с оптимизированным таймаутом для AI ответов
-        response = requests.post(
-            f"{self.base_url}/api/generate",
-            json=data,
-            timeout=60  # Восстановлен стабильный таймаут
-        )
+        if on_token:
+            return await self._make_stream_request(prompt, model, system_prompt, start_time, options, on_token)
         
-        if response.status_code == 200:
-            result = response.json()
-            response_time = time.time() - start_time
-            
-            return AIResponse(
-                content=result.get("response", ""),
-                model=model,
-                tokens_used=len(result.get("response", "").split()),
-                response_time=response_time,
-                success=True
+        # Запрос через общий пул соединений
+        try:
+            result = await self.client.generate(
+                model,
+                prompt,
+                system=system_prompt,
+                options=options,
+                timeout=60  # Восстановлен стабильный таймаут
             )
-        else:
+        except OllamaError as e:
             return AIResponse(
                 content="",
                 model=model,
                 response_time=time.time() - start_time,
                 success=False,
-                error=f"HTTP {response.status_code}: {response.text}"
+                error=str(e)
             )
+        
+        return AIResponse(
+            content=result.get("response", ""),
+            model=model,
+            tokens_used=len(result.get("response", "").split()),
+            response_time=time.time() - start_time,
+            success=True
+        )
     
-    def is_available(self) -> bool:
-        """Проверка доступности Ollama"""
+    async def _make_stream_request(self, prompt: str, model: str, system_prompt: str, start_time: float,
+                                   options: Dict[str, Any], on_token: TokenCallback) -> AIResponse:
+        """Потоковый запрос к Ollama с передачей фрагментов в колбэк"""
+        parts = []
+        tokens_used = 0
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+            async for chunk in self.client.generate_stream(
+                model,
+                prompt,
+                system=system_prompt,
+                options=options,
+                timeout=60
+            ):
+                text = chunk.get("response", "")
+                if text:
+                    parts.append(text)
+                    await on_token(text)
+                if chunk.get("done"):
+                    tokens_used = chunk.get("eval_count", 0)
+        except OllamaError as e:
+            return AIResponse(
+                content="".join(parts),
+                model=model,
+                response_time=time.time() - start_time,
+                success=False,
+                error=str(e)
+            )
+        
+        content = "".join(parts)
+        return AIResponse(
+            content=content,
+            model=model,
+            tokens_used=tokens_used or len(content.split()),
+            response_time=time.time() - start_time,
+            success=True
+        )
     
-    def get_health_status(self) -> Dict[str, Any]:
-        """Получение статуса здоровья AI движка"""
+    async def check_health(self) -> Dict[str, Any]:
+        """Проверка Ollama через /api/tags с коротким таймаутом"""
+        start_time = time.time()
         try:
-            # Проверяем доступность
-            response = requests.get(f"{self.base_url}/api/tags", timeout=10)
-            if response.status_code == 200:
-                models = response.json().get("models", [])
-                return {
-                    "status": "healthy",
-                    "available_models": len(models),
-                    "default_model": self.default_model,
-                    "response_time": response.elapsed.total_seconds()
-                }
-            else:
-                return {
-                    "status": "unhealthy",
-                    "error": f"HTTP {response.status_code}",
-                    "available_models": 0
-                }
-        except requests.exceptions.Timeout:
-            return {
+            self.available_models = await self.client.list_models(timeout=5)
+            self.health = {
+                "status": "healthy",
+                "available_models": len(self.available_models),
+                "default_model": self.default_model,
+                "response_time": time.time() - start_time
+            }
+        except asyncio.TimeoutError:
+            self.health = {
                 "status": "timeout",
                 "error": "Connection timeout",
                 "available_models": 0
             }
+        except OllamaError as e:
+            self.health = {
+                "status": "unhealthy",
+                "error": f"HTTP {e.status}",
+                "available_models": 0
+            }
         except Exception as e:
-            return {
+            self.health = {
                 "status": "error",
                 "error": str(e),
                 "available_models": 0
             }
+        self.health["checked_at"] = time.time()
+        return self.health
+    
+    async def is_available(self) -> bool:
+        """Проверка доступности Ollama"""
+        health = await self.get_health_status()
+        return health["status"] == "healthy"
+    
+    async def get_health_status(self) -> Dict[str, Any]:
+        """Получение статуса здоровья AI движка"""
+        if time.time() - self.health["checked_at"] > self.health_ttl:
+            await self.check_health()
+        return dict(self.health)
 
 class OpenAIEngine:
     """Движок для работы с OpenAI API"""
     
-    def __init__(self, api_key: str = None, default_model: str = "gpt-3.5-turbo"):
+    def __init__(self, api_key: str = None, default_model: str = "gpt-3.5-turbo", max_in_flight: int = 4):
         self.api_key = api_key or self._get_api_key()
         self.default_model = default_model
         self.base_url = "https://api.openai.com/v1"
+        self.max_in_flight = max_in_flight
+        # Сессия и семафор на каждый event loop
+        self._loop_state = weakref.WeakKeyDictionary()
+    
+    def _get_loop_state(self) -> Dict[str, Any]:
+        """Пул соединений и семафор текущего event loop"""
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None or state["session"].closed:
+            state = {
+                "session": aiohttp.ClientSession(),
+                "in_flight": asyncio.Semaphore(self.max_in_flight)
+            }
+            self._loop_state[loop] = state
+        return state
     
     def _get_api_key(self) -> Optional[str]:
         """Получить API ключ из переменных окружения"""
@@ -202,8 +314,9 @@ class OpenAIEngine:
         return os.getenv("OPENAI_API_KEY")
     
     async def generate_response(self, prompt: str, model: str = None,
-                              system_prompt: str = None, **kwargs) -> AIResponse:
-        """Генерация ответа от OpenAI"""
+                              system_prompt: str = None,
+                              on_token: Optional[TokenCallback] = None, **kwargs) -> AIResponse:
+        """Генерация ответа от OpenAI (в потоковом режиме ответ отдается одним фрагментом)"""
         if not self.api_key:
             return AIResponse(
                 content="",
@@ -238,33 +351,36 @@ class OpenAIEngine:
                 "top_p": 0.9  # Ядерная выборка
             }
             
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=150  # Увеличенный таймаут для стабильности
-            )
+            state = self._get_loop_state()
+            async with state["in_flight"]:
+                async with state["session"].post(
+                    f"{self.base_url}/chat/completions",
+                    headers=headers,
+                    json=data,
+                    timeout=aiohttp.ClientTimeout(total=150)  # Увеличенный таймаут для стабильности
+                ) as response:
+                    if response.status != 200:
+                        return AIResponse(
+                            content="",
+                            model=model,
+                            response_time=time.time() - start_time,
+                            success=False,
+                            error=f"HTTP {response.status}: {await response.text()}"
+                        )
+                    result = await response.json()
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result["choices"][0]["message"]["content"]
-                response_time = time.time() - start_time
-                
-                return AIResponse(
-                    content=content,
-                    model=model,
-                    tokens_used=result.get("usage", {}).get("total_tokens", 0),
-                    response_time=response_time,
-                    success=True
-                )
-            else:
-                return AIResponse(
-                    content="",
-                    model=model,
-                    response_time=time.time() - start_time,
-                    success=False,
-                    error=f"HTTP {response.status_code}: {response.text}"
-                )
+            content = result["choices"][0]["message"]["content"]
+            response_time = time.time() - start_time
+            if on_token:
+                await on_token(content)
+            
+            return AIResponse(
+                content=content,
+                model=model,
+                tokens_used=result.get("usage", {}).get("total_tokens", 0),
+                response_time=response_time,
+                success=True
+            )
                 
         except Exception as e:
             logger.error(f"❌ Ошибка генерации ответа OpenAI: {e}")
@@ -276,7 +392,7 @@ class OpenAIEngine:
                 error=str(e)
             )
     
-    def is_available(self) -> bool:
+    async def is_available(self) -> bool:
         """Проверка доступности OpenAI API"""
         return self.api_key is not None
 
@@ -287,22 +403,34 @@ class AIEngine:
         self.ollama = OllamaEngine()
         self.openai = OpenAIEngine()
         self.default_engine = None
-        self._select_default_engine()
     
-    def _select_default_engine(self):
+    async def _select_default_engine(self):
         """Выбор движка по умолчанию"""
-        if self.ollama.is_available():
+        if await self.ollama.is_available():
             self.default_engine = self.ollama
             logger.info("🤖 Выбран Ollama как основной движок AI")
-        elif self.openai.is_available():
+        elif await self.openai.is_available():
             self.default_engine = self.openai
             logger.info("🤖 Выбран OpenAI как основной движок AI")
         else:
             logger.warning("⚠️ Ни один AI движок не доступен")
     
     async def generate_response(self, prompt: str, model: str = None,
-                              system_prompt: str = None, engine: str = None, **kwargs) -> AIResponse:
-        """Генерация ответа от AI"""
+                              system_prompt: str = None, engine: str = None,
+                              on_token: Optional[TokenCallback] = None, **kwargs) -> AIResponse:
+        """Генерация ответа от AI
+        
+        on_token - колбэк потоковой выдачи; если не передан, берется из token_callback.
+        Факты из prompt_context добавляются перед промптом.
+        """
+        on_token = on_token or token_callback.get()
+        await begin_generation(on_token)
+        context = prompt_context.get()
+        if context:
+            prompt = f"{context}\n\n{prompt}"
+        if not self.default_engine:
+            await self._select_default_engine()
+        
         if not self.default_engine:
             return AIResponse(
                 content="Извините, AI движок недоступен",
@@ -312,9 +440,9 @@ class AIEngine:
             )
         
         # Выбираем движок
-        if engine == "ollama" and self.ollama.is_available():
+        if engine == "ollama" and await self.ollama.is_available():
             selected_engine = self.ollama
-        elif engine == "openai" and self.openai.is_available():
+        elif engine == "openai" and await self.openai.is_available():
             selected_engine = self.openai
         else:
             selected_engine = self.default_engine
@@ -323,39 +451,90 @@ class AIEngine:
             prompt=prompt,
             model=model,
             system_prompt=system_prompt,
+            on_token=on_token,
             **kwargs
         )
     
     def get_available_models(self) -> Dict[str, List[str]]:
-        """Получить список доступных моделей"""
+        """Получить список доступных моделей (по последней проверке здоровья)"""
         models = {}
         
-        if self.ollama.is_available():
+        if self.ollama.health["status"] == "healthy":
             models["ollama"] = self.ollama.available_models
         
-        if self.openai.is_available():
+        if self.openai.api_key is not None:
             models["openai"] = ["gpt-3.5-turbo", "gpt-4", "gpt-4-turbo"]
         
         return models
     
     def get_status(self) -> Dict[str, Any]:
-        """Получить статус AI движков"""
+        """Получить статус AI движков без сетевых запросов"""
         return {
-            "ollama_available": self.ollama.is_available(),
-            "openai_available": self.openai.is_available(),
+            "ollama_available": self.ollama.health["status"] == "healthy",
+            "openai_available": self.openai.api_key is not None,
             "default_engine": "ollama" if self.default_engine == self.ollama else "openai" if self.default_engine == self.openai else "none",
-            "available_models": self.get_available_models()
+            "available_models": self.get_available_models(),
+            "ollama_client": self.ollama.client.get_stats(),
+            "response_cache": self.ollama.response_cache.get_stats(),
+            "single_flight": self.ollama.single_flight.get_stats(),
+            "semantic_cache": semantic_cache.get_stats()
         }
+    
+    async def refresh_status(self) -> Dict[str, Any]:
+        """Обновить проверку здоровья движков и вернуть статус"""
+        await self.ollama.check_health()
+        if not self.default_engine:
+            await self._select_default_engine()
+        return self.get_status()
 
 # Глобальный экземпляр AI движка
 ai_engine = AIEngine()
 
 # Функции для удобного использования
 async def generate_ai_response(prompt: str, system_prompt: str = None, **kwargs) -> str:
-    """Простая функция для генерации ответа от AI"""
+    """Простая функция для генерации ответа от AI
+    
+    Перед обращением к модели ищет ответ на похожий промпт в семантическом кэше.
+    Ответ зависит не только от промпта: факты из prompt_context и параметры
+    генерации входят в пространство имен кэша
+    """
+    options = {key: value for key, value in kwargs.items() if key != "on_token"}
+    context_key = make_cache_key(kwargs.get("model") or "", prompt_context.get() or "", system_prompt, options)
+    namespace = f"{kwargs.get('model') or ''}|{system_prompt or ''}|{context_key[:16]}"
+    cached = await semantic_cache.lookup(prompt, namespace)
+    if cached is not None:
+        logger.info("✅ Ответ найден в семантическом кэше")
+        on_token = kwargs.get("on_token") or token_callback.get()
+        if on_token:
+            await begin_generation(on_token)
+            await on_token(cached)
+        return cached
+    
     response = await ai_engine.generate_response(prompt, system_prompt=system_prompt, **kwargs)
+    if response.success and response.content:
+        await semantic_cache.add(prompt, response.content, namespace, response.response_time)
     return response.content if response.success else f"Ошибка: {response.error}"
 
+async def cancel_on_disconnect(request, coro: Awaitable, poll_interval: float = 0.5):
+    """Выполнить генерацию, отменив ее при отключении HTTP клиента
+    
+    request - объект с корутиной is_disconnected() (starlette Request).
+    Возвращает None, если клиент отключился до завершения.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info("🔌 Клиент отключился, генерация отменена")
+                task.cancel()
+                return None
+    finally:
+        if not task.done():
+            task.cancel()
+
 async def generate_code(prompt: str, language: str = "python") -> str:
     """Генерация кода"""
     system_prompt = f"""Ты эксперт-программист. Создавай качественный, рабочий код на {language}.
@@ -385,7 +564,7 @@ if __name__ == "__main__":
     async def test_ai():
         print("🧪 Тестирование AI движка...")
         
-        status = ai_engine.get_status()
+        status = await ai_engine.refresh_status()
         print(f"Статус: {status}")
         
         if status["default_engine"] != "none":
@@ -30,6 +30,10 @@ class BaseAIProvider(ABC):
         """Проверка доступности модели"""
         pass
     
+    async def probe(self) -> bool:
+        """Дешевая проверка доступности; не должна загружать модели"""
+        return await self.is_model_available()
+    
     def get_provider_name(self) -> str:
         """Получение имени провайдера"""
         return self.__class__.__name__
@@ -39,6 +43,6 @@ class BaseAIProvider(ABC):
         return {
             "provider": self.get_provider_name(),
             "model": self.model_name,
-            "available": await self.is_model_available(),
+            "available": await self.probe(),
             "status": "healthy" if self.is_available else "unavailable"
         }
@@ -0,0 +1,147 @@
+"""
+Выбор модели Ollama по намерению и сложности задачи
+Простые запросы идут к маленькой модели (2-3B быстрее 7B в 3-5 раз на CPU),
+большая модель используется для сложных задач или когда ответ маленькой
+не проходит проверку качества
+"""
+
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Уровни от меньшей модели к большей; эскалация идет по этому порядку
+TIER_ORDER = ("small", "medium", "large")
+
+DEFAULT_TIER_MODELS = {
+    "small": "gemma:2b",
+    "medium": "phi",
+    "large": "llama2"
+}
+
+# Категория задачи (TaskAnalyzer) -> сложность -> уровень модели
+ROUTING_TABLE = {
+    "general": {"simple": "small", "medium": "small", "complex": "large"},
+    "text_processing": {"simple": "small", "medium": "medium", "complex": "large"},
+    "summarization": {"simple": "small", "medium": "small", "complex": "medium"},
+    "translation": {"simple": "small", "medium": "medium", "complex": "large"},
+    "research": {"simple": "small", "medium": "medium", "complex": "large"},
+    "data_analysis": {"simple": "medium", "medium": "medium", "complex": "large"},
+    "creative": {"simple": "medium", "medium": "large", "complex": "large"},
+    # Маленькие модели плохо пишут код
+    "code_generation": {"simple": "medium", "medium": "large", "complex": "large"}
+}
+
+REFUSAL_MARKERS = (
+    "не знаю", "не могу ответить", "не уверен", "i don't know", "i do not know",
+    "i'm not sure", "i cannot", "as an ai"
+)
+
+
+def answer_quality(prompt: str, answer: Optional[str]) -> float:
+    """Эвристическая оценка ответа от 0 до 1
+
+    Снижается за слишком короткий ответ, отказ, зацикливание
+    и повтор промпта
+    """
+    text = (answer or "").strip()
+    if not text:
+        return 0.0
+
+    score = 1.0
+    words = text.lower().split()
+    if len(words) < 3:
+        score -= 0.5
+    lowered = text.lower()
+    if any(marker in lowered for marker in REFUSAL_MARKERS):
+        score -= 0.5
+    # Маленькие модели часто зацикливаются на одной фразе
+    if len(words) >= 20 and len(set(words)) / len(words) < 0.3:
+        score -= 0.5
+    if lowered == prompt.strip().lower():
+        score -= 0.5
+    return max(0.0, score)
+
+
+class ModelTierRouter:
+    """Таблица маршрутизации по уровням моделей и статистика по уровням"""
+
+    def __init__(self, tier_models: Dict[str, str] = None, routing_table: Dict[str, Dict[str, str]] = None,
+                 quality_threshold: float = 0.6):
+        self.tier_models = {**DEFAULT_TIER_MODELS, **(tier_models or {})}
+        self.routing_table = routing_table or ROUTING_TABLE
+        self.quality_threshold = quality_threshold
+        # Установленные в Ollama модели; None - список неизвестен, считаем доступными все
+        self.installed: Optional[set] = None
+        self.stats = {
+            tier: {"requests": 0, "failures": 0, "escalations": 0, "total_latency": 0.0, "quality_sum": 0.0}
+            for tier in TIER_ORDER
+        }
+
+    def set_installed(self, models: Optional[Iterable[str]]):
+        self.installed = set(models) if models is not None else None
+
+    def is_installed(self, model: str) -> bool:
+        if self.installed is None:
+            return True
+        return model in self.installed or f"{model}:latest" in self.installed
+
+    def select_tier(self, intent: str = None, complexity: str = None) -> str:
+        table = self.routing_table.get(intent) or self.routing_table["general"]
+        return table.get(complexity or "medium", "large")
+
+    def escalation_chain(self, tier: str) -> List[Tuple[str, str]]:
+        """Уровни от выбранного и выше, только с установленными моделями"""
+        start = TIER_ORDER.index(tier) if tier in TIER_ORDER else len(TIER_ORDER) - 1
+        chain = [(name, self.tier_models[name]) for name in TIER_ORDER[start:]
+                 if self.tier_models.get(name) and self.is_installed(self.tier_models[name])]
+        if not chain:
+            # Хотя бы большая модель: она проверяется при старте провайдера
+            chain = [("large", self.tier_models["large"])]
+        return chain
+
+    async def generate(self, prompt: str, call: Callable[[str], Awaitable[Dict[str, Any]]],
+                       intent: str = None, complexity: str = None) -> Dict[str, Any]:
+        """Запрос к модели выбранного уровня с эскалацией на более крупную"""
+        chain = self.escalation_chain(self.select_tier(intent, complexity))
+        result = None
+        for index, (tier, model) in enumerate(chain):
+            stats = self.stats[tier]
+            stats["requests"] += 1
+            start = time.monotonic()
+            result = await call(model)
+            stats["total_latency"] += time.monotonic() - start
+
+            if not result.get("success"):
+                stats["failures"] += 1
+                continue
+            if result.get("model") != model:
+                # Ответил другой провайдер, уровни модели к нему не относятся
+                return result
+
+            quality = answer_quality(prompt, result.get("result"))
+            stats["quality_sum"] += quality
+            result.update({"tier": tier, "quality": quality, "escalated": index > 0})
+            if quality >= self.quality_threshold or index == len(chain) - 1:
+                return result
+            stats["escalations"] += 1
+            logger.info(f"Model {model} answer quality {quality:.2f} is low, escalating")
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        tiers = {}
+        for tier in TIER_ORDER:
+            stats = self.stats[tier]
+            answered = stats["requests"] - stats["failures"]
+            tiers[tier] = {
+                "model": self.tier_models.get(tier),
+                "installed": self.is_installed(self.tier_models[tier]) if self.tier_models.get(tier) else False,
+                "requests": stats["requests"],
+                "failures": stats["failures"],
+                "escalations": stats["escalations"],
+                "escalation_rate": stats["escalations"] / answered if answered else 0.0,
+                "avg_latency_ms": stats["total_latency"] * 1000 / stats["requests"] if stats["requests"] else 0.0,
+                "avg_quality": stats["quality_sum"] / answered if answered else 0.0
+            }
+        return tiers
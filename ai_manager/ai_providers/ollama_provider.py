@@ -3,6 +3,7 @@ Ollama AI Provider - бесплатные локальные модели
 """
 
 import aiohttp
+import asyncio
 import json
 from typing import Dict, Any, Optional
 from .base_provider import BaseAIProvider
@@ -34,25 +35,43 @@ class OllamaProvider(BaseAIProvider):
             self.is_available = False
             return False
     
+    async def _list_models(self) -> Optional[list]:
+        """Установленные модели или None, если сервер не ответил"""
+        if not self.session:
+            self.session = aiohttp.ClientSession()
+        
+        async with self.session.get(f"{self.base_url}/api/tags", timeout=aiohttp.ClientTimeout(total=5)) as response:
+            if response.status != 200:
+                return None
+            data = await response.json()
+            return [model["name"] for model in data.get("models", [])]
+    
+    def _has_model(self, models: list) -> bool:
+        # Ollama возвращает имена с тегом: llama2 -> llama2:latest
+        return self.model_name in models or f"{self.model_name}:latest" in models
+    
+    async def probe(self) -> bool:
+        """Проверка без загрузки модели: сервер отвечает и модель уже установлена"""
+        try:
+            models = await self._list_models()
+        except Exception:
+            return False
+        return models is not None and self._has_model(models)
+    
     async def is_model_available(self) -> bool:
         """Проверка доступности модели Ollama"""
         try:
-            if not self.session:
-                self.session = aiohttp.ClientSession()
-            
             # Проверяем список доступных моделей
-            async with self.session.get(f"{self.base_url}/api/tags") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    models = [model["name"] for model in data.get("models", [])]
-                    
-                    # Проверяем, есть ли наша модель
-                    if self.model_name in models:
-                        return True
-                    
-                    # Если модели нет, пытаемся загрузить её
-                    return await self._pull_model()
+            models = await self._list_models()
+            if models is None:
                 return False
+            
+            # Проверяем, есть ли наша модель
+            if self._has_model(models):
+                return True
+            
+            # Если модели нет, пытаемся загрузить её
+            return await self._pull_model()
         except Exception as e:
             logger.error(f"Error checking Ollama model availability: {e}")
             return False
@@ -86,9 +105,12 @@ class OllamaProvider(BaseAIProvider):
             if not self.session:
                 self.session = aiohttp.ClientSession()
             
+            # Модель можно переопределить для запроса (выбор по уровню сложности)
+            model = kwargs.get("model") or self.model_name
+            
             # Параметры для генерации
             payload = {
-                "model": self.model_name,
+                "model": model,
                 "prompt": prompt,
                 "stream": False,
                 "options": {
@@ -108,7 +130,7 @@ class OllamaProvider(BaseAIProvider):
                     return {
                         "success": True,
                         "result": data.get("response", ""),
-                        "model": self.model_name,
+                        "model": model,
                         "provider": "ollama"
                     }
                 else:
@@ -4,11 +4,14 @@
 
 from typing import Dict, Any, List, Optional
 import asyncio
+import json
 import logging
 from .base_provider import BaseAIProvider
 from .ollama_provider import OllamaProvider
 from .huggingface_provider import HuggingFaceProvider
 from .local_provider import LocalProvider
+from .routing import ProviderRouter
+from .model_tiers import ModelTierRouter
 
 logger = logging.getLogger(__name__)
 
@@ -16,10 +19,17 @@ logger = logging.getLogger(__name__)
 class AIProviderManager:
     """Менеджер AI провайдеров"""
     
-    def __init__(self):
+    def __init__(self, router: ProviderRouter = None):
         self.providers: Dict[str, BaseAIProvider] = {}
-        self.default_provider = None
         self.initialized = False
+        # Выбор провайдера по здоровью и задержке
+        self.router = router or ProviderRouter()
+        # Выбор модели Ollama по намерению и сложности
+        self.model_tiers = ModelTierRouter()
+        # Одинаковые одновременные запросы ждут одну генерацию
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self.coalesced_requests = 0
     
     async def initialize_providers(self, config: Dict[str, Any] = None):
         """Инициализация всех доступных провайдеров"""
@@ -28,6 +38,8 @@ class AIProviderManager:
         
         config = config or {}
         logger.info("Initializing AI providers...")
+        # Страховочные запросы включаются долей допустимой дополнительной нагрузки
+        self.router.hedge_ratio = config.get("hedge_ratio", self.router.hedge_ratio)
         
         # Инициализируем провайдеры в порядке приоритета
         providers_to_init = [
@@ -41,55 +53,92 @@ class AIProviderManager:
         
         for name, provider in providers_to_init:
             try:
-                if await provider.initialize():
-                    self.providers[name] = provider
-                    if not self.default_provider:
-                        self.default_provider = provider
-                    logger.info(f"Provider {name} initialized successfully")
-                else:
-                    logger.warning(f"Provider {name} failed to initialize")
+                ready = await provider.initialize()
             except Exception as e:
                 logger.error(f"Error initializing provider {name}: {e}")
+                ready = False
+            if ready:
+                logger.info(f"Provider {name} initialized successfully")
+            else:
+                logger.warning(f"Provider {name} failed to initialize")
+            self.register_provider(name, provider, healthy=ready, fallback=name == "local")
         
-        # Устанавливаем локальный провайдер как fallback
-        if not self.default_provider and "local" in self.providers:
-            self.default_provider = self.providers["local"]
+        await self._configure_model_tiers(config)
         
+        # Недоступные при старте провайдеры подключатся после фоновой проверки
+        self.router.start_probes()
         self.initialized = True
         logger.info(f"AI Provider Manager initialized with {len(self.providers)} providers")
     
+    async def _configure_model_tiers(self, config: Dict[str, Any]):
+        """Модели уровней: большая - основная модель Ollama, остальные - если установлены"""
+        ollama = self.providers.get("ollama")
+        self.model_tiers.tier_models.update(config.get("tier_models", {}))
+        if ollama is None:
+            return
+        self.model_tiers.tier_models["large"] = ollama.model_name
+        try:
+            self.model_tiers.set_installed(await ollama._list_models())
+        except Exception as e:
+            logger.warning(f"Could not list Ollama models for tier routing: {e}")
+    
+    def register_provider(self, name: str, provider: BaseAIProvider, healthy: bool = True, fallback: bool = False):
+        """Подключение провайдера к маршрутизации"""
+        self.providers[name] = provider
+        self.router.add(name, provider, healthy=healthy, fallback=fallback)
+    
     async def generate_response(self, prompt: str, provider_name: str = None, **kwargs) -> Dict[str, Any]:
-        """Генерация ответа через указанный или лучший доступный провайдер"""
-        if not self.initialized:
-            await self.initialize_providers()
+        """Генерация ответа через указанный или лучший доступный провайдер
         
-        # Выбираем провайдер
-        if provider_name and provider_name in self.providers:
-            provider = self.providers[provider_name]
-        elif self.default_provider:
-            provider = self.default_provider
+        Если такой же запрос уже выполняется, ответ берется из него
+        """
+        key = json.dumps({"provider": provider_name, "prompt": prompt.strip(), "params": kwargs},
+                         sort_keys=True, ensure_ascii=False, default=str)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate_response(prompt, provider_name, **kwargs))
+            self._in_flight[key] = task
+            self._waiters[task] = 0
+            task.add_done_callback(lambda done: self._in_flight.pop(key, None)
+                                   if self._in_flight.get(key) is done else None)
         else:
-            return {
-                "success": False,
-                "error": "No AI providers available",
-                "result": None
-            }
+            self.coalesced_requests += 1
+            logger.debug("Joined in-flight request for the same prompt")
+        
+        # Отмена одного из ожидающих не прерывает генерацию для остальных,
+        # отмена последнего - прерывает запрос к провайдеру
+        self._waiters[task] += 1
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if self._waiters[task] == 0:
+                del self._waiters[task]
+                if not task.done():
+                    task.cancel()
+                    if self._in_flight.get(key) is task:
+                        del self._in_flight[key]
+        return dict(result)
+    
+    async def _generate_response(self, prompt: str, provider_name: str = None, **kwargs) -> Dict[str, Any]:
+        """Генерация через самого быстрого здорового провайдера с переходом на следующие
+        
+        С указанной сложностью (complexity, intent) модель Ollama выбирается по уровню
+        """
+        if not self.initialized:
+            await self.initialize_providers()
         
-        # Генерируем ответ
+        intent = kwargs.pop("intent", None)
+        complexity = kwargs.pop("complexity", None)
         try:
-            result = await provider.generate_response(prompt, **kwargs)
-            
-            # Если первый провайдер не сработал, пробуем другие
-            if not result.get("success") and len(self.providers) > 1:
-                for fallback_provider in self.providers.values():
-                    if fallback_provider != provider:
-                        logger.info(f"Trying fallback provider: {fallback_provider.get_provider_name()}")
-                        result = await fallback_provider.generate_response(prompt, **kwargs)
-                        if result.get("success"):
-                            break
-            
-            return result
-            
+            if complexity and provider_name in (None, "ollama") and "ollama" in self.router.routes:
+                return await self.model_tiers.generate(
+                    prompt,
+                    lambda model: self.router.route(prompt, preferred="ollama", model=model, **kwargs),
+                    intent=intent,
+                    complexity=complexity
+                )
+            return await self.router.route(prompt, preferred=provider_name, **kwargs)
         except Exception as e:
             logger.error(f"Error in generate_response: {e}")
             return {
@@ -99,38 +148,26 @@ class AIProviderManager:
             }
     
     async def get_provider_health(self) -> Dict[str, Any]:
-        """Получение статуса всех провайдеров"""
+        """Получение статуса всех провайдеров по результатам фоновых проверок и запросов"""
         if not self.initialized:
             await self.initialize_providers()
         
-        health_status = {}
-        for name, provider in self.providers.items():
-            try:
-                health_status[name] = await provider.health_check()
-            except Exception as e:
-                health_status[name] = {
-                    "provider": provider.get_provider_name(),
-                    "model": provider.model_name,
-                    "available": False,
-                    "status": f"error: {str(e)}"
-                }
-        
-        return health_status
+        return self.router.get_stats()
     
     def get_available_providers(self) -> List[str]:
         """Получение списка доступных провайдеров"""
-        return list(self.providers.keys())
+        return [name for name, route in self.router.routes.items() if route.healthy]
     
     def get_default_provider_name(self) -> str:
-        """Получение имени провайдера по умолчанию"""
-        if self.default_provider:
-            for name, provider in self.providers.items():
-                if provider == self.default_provider:
-                    return name
+        """Имя провайдера, который маршрутизация выберет первым"""
+        for route in self.router.candidates():
+            if route.breaker.state != route.breaker.OPEN:
+                return route.name
         return "none"
     
     async def close_all(self):
         """Закрытие всех провайдеров"""
+        await self.router.stop_probes()
         for provider in self.providers.values():
             try:
                 if hasattr(provider, 'close'):
@@ -139,7 +176,7 @@ class AIProviderManager:
                 logger.error(f"Error closing provider {provider.get_provider_name()}: {e}")
         
         self.providers.clear()
-        self.default_provider = None
+        self.router.routes.clear()
         self.initialized = False
         logger.info("All AI providers closed")
 
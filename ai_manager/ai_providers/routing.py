@@ -0,0 +1,344 @@
+"""
+Маршрутизация запросов между AI провайдерами с учетом их здоровья
+Для каждого провайдера - автомат отключения (circuit breaker) по доле
+ошибок в скользящем окне, сглаженная задержка (EWMA) и результат
+последней фоновой проверки. Запрос идет к самому быстрому здоровому
+провайдеру, отключенные пропускаются без ожидания таймаута.
+При включенной страховке (hedge_ratio > 0) запрос, не ответивший за p95
+обычной задержки провайдера, дублируется на следующего; побеждает первый
+успешный ответ, остальные отменяются
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Автомат отключения: closed -> open -> half_open -> closed"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_rate: float = 0.5, window: int = 20, min_requests: int = 4,
+                 open_timeout: float = 30.0):
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.open_timeout = open_timeout
+        # Исходы последних запросов: True - успех
+        self.outcomes = deque(maxlen=window)
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.trips = 0
+
+    def allow_request(self) -> bool:
+        """Можно ли отправить запрос; в half_open пропускается один пробный"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.open_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+        return True
+
+    def record_success(self):
+        if self.state == self.HALF_OPEN:
+            self.state = self.CLOSED
+            self.outcomes.clear()
+            logger.info("Circuit closed after successful probe")
+        self.probe_in_flight = False
+        self.outcomes.append(True)
+
+    def record_failure(self):
+        self.probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            self._trip()
+            return
+        self.outcomes.append(False)
+        if len(self.outcomes) >= self.min_requests and self.error_rate() >= self.failure_rate:
+            self._trip()
+
+    def _trip(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.trips += 1
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "error_rate": self.error_rate(),
+            "window": len(self.outcomes),
+            "trips": self.trips
+        }
+
+
+class ProviderRoute:
+    """Состояние маршрута к одному провайдеру"""
+
+    def __init__(self, name: str, provider, priority: int, fallback: bool = False,
+                 ewma_alpha: float = 0.3, breaker: CircuitBreaker = None):
+        self.name = name
+        self.provider = provider
+        self.priority = priority
+        # Резервный провайдер используется, только если основные недоступны
+        self.fallback = fallback
+        self.ewma_alpha = ewma_alpha
+        self.latency_ewma: Optional[float] = None
+        # Последние задержки для квантиля страховочной задержки
+        self.latencies = deque(maxlen=100)
+        self.breaker = breaker or CircuitBreaker()
+        self.healthy = True
+        self.last_probe = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def record_latency(self, seconds: float):
+        self.latencies.append(seconds)
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma = self.ewma_alpha * seconds + (1 - self.ewma_alpha) * self.latency_ewma
+
+    def record_censored_latency(self, seconds: float):
+        """Отмененный запрос: ожидание - нижняя граница задержки, только для квантиля"""
+        self.latencies.append(seconds)
+
+    def latency_quantile(self, quantile: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * quantile))]
+
+    def sort_key(self):
+        # Провайдер без замеров пробуется первым, чтобы получить оценку задержки
+        return (self.fallback, self.latency_ewma if self.latency_ewma is not None else 0.0, self.priority)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider.get_provider_name(),
+            "model": self.provider.model_name,
+            "available": self.healthy and self.breaker.state != CircuitBreaker.OPEN,
+            "status": "healthy" if self.healthy else "unavailable",
+            "fallback": self.fallback,
+            "latency_ewma": self.latency_ewma,
+            "requests": self.requests,
+            "failures": self.failures,
+            "last_probe": self.last_probe,
+            "circuit": self.breaker.get_stats()
+        }
+
+
+class ProviderRouter:
+    """Выбор провайдера и фоновые проверки здоровья"""
+
+    def __init__(self, request_timeout: float = 60.0, probe_interval: float = 15.0,
+                 probe_timeout: float = 3.0, breaker_options: Dict[str, Any] = None,
+                 hedge_ratio: float = 0.0, hedge_quantile: float = 0.95, hedge_default_delay: float = 5.0,
+                 hedge_min_samples: int = 10):
+        self.routes: Dict[str, ProviderRoute] = {}
+        self.request_timeout = request_timeout
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.breaker_options = breaker_options or {}
+        self._probe_task: Optional[asyncio.Task] = None
+        # Страховочные запросы: доля от числа обычных не больше hedge_ratio
+        self.hedge_ratio = hedge_ratio
+        self.hedge_quantile = hedge_quantile
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_tokens = 0.0
+        self.hedge_stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0, "censored": 0}
+
+    def add(self, name: str, provider, healthy: bool = True, fallback: bool = False):
+        self.routes[name] = ProviderRoute(name, provider, priority=len(self.routes), fallback=fallback,
+                                          breaker=CircuitBreaker(**self.breaker_options))
+        self.routes[name].healthy = healthy
+
+    def candidates(self, preferred: str = None) -> List[ProviderRoute]:
+        """Здоровые провайдеры в порядке выбора; запрошенный явно - первым"""
+        routes = sorted((route for route in self.routes.values() if route.healthy), key=ProviderRoute.sort_key)
+        if preferred in self.routes and self.routes[preferred].healthy:
+            routes.remove(self.routes[preferred])
+            routes.insert(0, self.routes[preferred])
+        return routes
+
+    async def call(self, route: ProviderRoute, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Запрос к провайдеру с учетом задержки и исхода"""
+        route.requests += 1
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(route.provider.generate_response(prompt, **kwargs),
+                                            timeout=self.request_timeout)
+        except asyncio.CancelledError:
+            # Отмененный пробный запрос не должен навсегда занять half_open
+            route.breaker.probe_in_flight = False
+            # Медленный проигравший страховки тоже попадает в квантиль, иначе задержка
+            # страховки строится по быстрым ответам и сокращается; короткое ожидание
+            # о хвосте ничего не говорит
+            elapsed = time.monotonic() - start
+            if elapsed >= self.hedge_delay(route):
+                route.record_censored_latency(elapsed)
+                self.hedge_stats["censored"] += 1
+            raise
+        except asyncio.TimeoutError:
+            result = {"success": False, "error": f"{route.name} request timeout", "result": None}
+        except Exception as e:
+            result = {"success": False, "error": str(e), "result": None}
+
+        if result.get("success"):
+            route.record_latency(time.monotonic() - start)
+            route.breaker.record_success()
+        else:
+            route.failures += 1
+            route.breaker.record_failure()
+            if route.breaker.state == CircuitBreaker.OPEN:
+                logger.warning(f"Circuit open for provider {route.name}: {result.get('error')}")
+        return result
+
+    async def route(self, prompt: str, preferred: str = None, **kwargs) -> Dict[str, Any]:
+        """Запрос к первому доступному провайдеру, при ошибке - к следующему"""
+        if self.hedge_ratio > 0:
+            return await self.route_hedged(prompt, preferred, **kwargs)
+        result = None
+        for route in self.candidates(preferred):
+            if not route.breaker.allow_request():
+                continue
+            result = await self.call(route, prompt, **kwargs)
+            if result.get("success"):
+                result.setdefault("routed_to", route.name)
+                return result
+            logger.info(f"Provider {route.name} failed, trying next")
+        return result or {
+            "success": False,
+            "error": "No healthy AI providers available",
+            "result": None
+        }
+
+    def hedge_delay(self, route: ProviderRoute) -> float:
+        """Сколько ждать ответа провайдера до страховочного запроса"""
+        if len(route.latencies) < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return route.latency_quantile(self.hedge_quantile)
+
+    async def route_hedged(self, prompt: str, preferred: str = None, **kwargs) -> Dict[str, Any]:
+        """Маршрутизация со страховкой: медленный провайдер дублируется следующим"""
+        self.hedge_stats["requests"] += 1
+        self.hedge_tokens = min(5.0, self.hedge_tokens + self.hedge_ratio)
+        loop = asyncio.get_running_loop()
+        pending = iter(self.candidates(preferred))
+        running: Dict[asyncio.Future, Any] = {}
+        result = None
+        can_hedge = True
+
+        def launch(hedge: bool) -> Optional[asyncio.Future]:
+            for route in pending:
+                if route.breaker.allow_request():
+                    task = asyncio.ensure_future(self.call(route, prompt, **kwargs))
+                    running[task] = (route, hedge, loop.time())
+                    return task
+            return None
+
+        # Страховка ждет только самый поздний запрос, пока он не ответил
+        newest = launch(hedge=False)
+        try:
+            while running:
+                timeout = None
+                if can_hedge and newest in running:
+                    route, _, started = running[newest]
+                    timeout = max(0.0, self.hedge_delay(route) - (loop.time() - started))
+
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if self.hedge_tokens < 1.0:
+                        self.hedge_stats["budget_denied"] += 1
+                        can_hedge = False
+                        continue
+                    slow = running[newest][0]
+                    newest = launch(hedge=True)
+                    if newest is None:
+                        can_hedge = False
+                        continue
+                    self.hedge_tokens -= 1.0
+                    self.hedge_stats["hedged"] += 1
+                    logger.info(f"Provider {slow.name} is slow, hedging to {running[newest][0].name}")
+                    continue
+
+                for task in done:
+                    route, hedge, _ = running.pop(task)
+                    result = task.result()
+                    if result.get("success"):
+                        if hedge:
+                            self.hedge_stats["hedge_wins"] += 1
+                        result.setdefault("routed_to", route.name)
+                        return result
+                    logger.info(f"Provider {route.name} failed, trying next")
+                if not running:
+                    newest = launch(hedge=False)
+        finally:
+            # Проигравшие запросы отменяются, соединения с провайдерами закрываются
+            for task in running:
+                task.cancel()
+
+        return result or {
+            "success": False,
+            "error": "No healthy AI providers available",
+            "result": None
+        }
+
+    def get_hedge_stats(self) -> Dict[str, Any]:
+        return {"enabled": self.hedge_ratio > 0, "budget_ratio": self.hedge_ratio, **self.hedge_stats}
+
+    async def probe(self, route: ProviderRoute) -> bool:
+        """Дешевая проверка провайдера без загрузки моделей"""
+        try:
+            healthy = await asyncio.wait_for(route.provider.probe(), timeout=self.probe_timeout)
+        except Exception:
+            healthy = False
+        if healthy != route.healthy:
+            logger.info(f"Provider {route.name} is now {'healthy' if healthy else 'unavailable'}")
+        route.healthy = healthy
+        route.provider.is_available = healthy
+        route.last_probe = time.time()
+        return healthy
+
+    async def probe_all(self):
+        await asyncio.gather(*(self.probe(route) for route in self.routes.values()))
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"Provider health probe failed: {e}")
+
+    def start_probes(self):
+        """Запуск фоновых проверок в текущем event loop"""
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.ensure_future(self._probe_loop())
+
+    async def stop_probes(self):
+        if self._probe_task:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: route.get_stats() for name, route in self.routes.items()}
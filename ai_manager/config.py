@@ -60,6 +60,8 @@ class Config:
     # Настройки производительности
     TASK_TIMEOUT = int(os.getenv("TASK_TIMEOUT", 300))  # 5 минут
     AGENT_RESPONSE_TIMEOUT = int(os.getenv("AGENT_RESPONSE_TIMEOUT", 60))  # 1 минута
+    # Доля страховочных запросов к AI провайдерам, 0 - выключено
+    AI_HEDGE_RATIO = float(os.getenv("AI_HEDGE_RATIO", "0"))
     
     @classmethod
     def validate_config(cls):
@@ -10,6 +10,12 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Общий маршрутизатор намерений JARVIS (доступен, если AI Manager запущен из корня проекта)
+try:
+    from intent_router import get_intent_router
+except ImportError:
+    get_intent_router = None
+
 
 class TaskAnalyzer:
     """Анализатор задач для определения стратегии решения"""
@@ -106,6 +112,9 @@ class TaskAnalyzer:
     
     def _detect_category(self, description: str) -> str:
         """Определение категории задачи"""
+        if get_intent_router is not None:
+            return get_intent_router().best(description, "task_category", "general")
+        
         description_lower = description.lower()
         
         for category, patterns in self.skill_patterns.items():
@@ -144,9 +144,12 @@ class TaskExecutor:
             if not provider_manager.initialized:
                 await provider_manager.initialize_providers()
             
-            # Генерируем ответ через AI провайдер
+            # Генерируем ответ через AI провайдер; модель выбирается по сложности задачи
+            analysis = task.analysis or {}
             ai_response = await provider_manager.generate_response(
                 prompt=prompt,
+                intent=analysis.get("category"),
+                complexity=analysis.get("complexity"),
                 temperature=agent.config.get("temperature", 0.7),
                 max_tokens=agent.config.get("max_tokens", 1000),
                 top_p=agent.config.get("top_p", 0.9)
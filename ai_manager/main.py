@@ -16,6 +16,7 @@ from core.task_executor import TaskExecutor
 from models.task import Task, TaskStatus
 from models.agent import Agent, AgentType
 from database.database import init_db
+from config import config
 
 
 @asynccontextmanager
@@ -31,7 +32,7 @@ async def lifespan(app: FastAPI):
     
     # Инициализация AI провайдеров
     from ai_providers.provider_manager import provider_manager
-    await provider_manager.initialize_providers()
+    await provider_manager.initialize_providers({"hedge_ratio": config.AI_HEDGE_RATIO})
     
     yield
     
@@ -150,6 +151,8 @@ async def get_system_stats():
     
     stats["ai_providers"] = provider_stats
     stats["default_provider"] = provider_manager.get_default_provider_name()
+    stats["provider_hedging"] = provider_manager.router.get_hedge_stats()
+    stats["model_tiers"] = provider_manager.model_tiers.get_stats()
     
     return stats
 
@@ -8,6 +8,7 @@ import asyncio
 from datetime import datetime
 from typing import Dict, Any, Optional
 from database.database import db_manager
+from monitoring.system_metrics import get_system_sampler
 import sys
 import traceback
 
@@ -200,29 +201,24 @@ class PerformanceMonitor:
         })
     
     async def record_system_metrics(self):
-        """Запись системных метрик"""
-        import psutil
-        
-        # CPU использование
-        cpu_percent = psutil.cpu_percent()
+        """Запись системных метрик из общего сборщика"""
+        snapshot = get_system_sampler().sample()
+        cpu_percent = snapshot["cpu_usage"]
+        memory_percent = snapshot["memory_usage"]
+        disk_percent = snapshot["disk_usage"]
+
         await self.logger.log_performance_metric("cpu_usage", cpu_percent)
-        
-        # Использование памяти
-        memory = psutil.virtual_memory()
-        await self.logger.log_performance_metric("memory_usage", memory.percent)
-        
-        # Использование диска
-        disk = psutil.disk_usage('/')
-        await self.logger.log_performance_metric("disk_usage", (disk.used / disk.total) * 100)
-        
+        await self.logger.log_performance_metric("memory_usage", memory_percent)
+        await self.logger.log_performance_metric("disk_usage", disk_percent)
+
         # Обновляем внутренние метрики
         if "system_metrics" not in self.metrics:
             self.metrics["system_metrics"] = []
         
         self.metrics["system_metrics"].append({
             "cpu_usage": cpu_percent,
-            "memory_usage": memory.percent,
-            "disk_usage": (disk.used / disk.total) * 100,
+            "memory_usage": memory_percent,
+            "disk_usage": disk_percent,
             "timestamp": datetime.now()
         })
         
@@ -0,0 +1,112 @@
+"""
+Общий сборщик системных метрик AI Manager
+Читает /proc и statvfs без запуска процессов и без блокирующего
+psutil.cpu_percent; psutil используется только там, где нет /proc.
+Снимок кэшируется на max_age секунд, все потребители получают один и тот же
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+class SystemSampler:
+    """Снимки CPU, памяти и диска; CPU считается по разнице между снимками"""
+
+    def __init__(self, max_age: float = 5.0, disk_path: str = "/"):
+        self.max_age = max_age
+        self.disk_path = disk_path
+        self.use_proc = os.path.exists("/proc/stat") and os.path.exists("/proc/meminfo")
+        if not self.use_proc and psutil is None:
+            logger.warning("No /proc and no psutil, system metrics are unavailable")
+        self._lock = threading.Lock()
+        self._last_cpu = self._read_cpu_times() if self.use_proc else None
+        if not self.use_proc and psutil is not None:
+            # Первый вызов без интервала запоминает отсчет и не блокирует
+            psutil.cpu_percent(interval=None)
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self.samples_taken = 0
+
+    @staticmethod
+    def _read_cpu_times():
+        with open("/proc/stat") as f:
+            values = [int(v) for v in f.readline().split()[1:]]
+        idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+        return sum(values), idle
+
+    def _cpu_percent(self) -> float:
+        total, idle = self._read_cpu_times()
+        last_total, last_idle = self._last_cpu
+        self._last_cpu = (total, idle)
+        if total <= last_total:
+            return 0.0
+        return 100.0 * (1 - (idle - last_idle) / (total - last_total))
+
+    @staticmethod
+    def _memory_percent() -> float:
+        meminfo = {}
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                meminfo[key] = int(value.split()[0])
+        total = meminfo["MemTotal"]
+        available = meminfo.get("MemAvailable", meminfo.get("MemFree", 0))
+        return 100.0 * (total - available) / total if total else 0.0
+
+    def _disk_percent(self) -> float:
+        disk = os.statvfs(self.disk_path)
+        total = disk.f_blocks * disk.f_frsize
+        used = (disk.f_blocks - disk.f_bfree) * disk.f_frsize
+        return 100.0 * used / total if total else 0.0
+
+    def _read(self) -> Dict[str, Any]:
+        if self.use_proc:
+            return {
+                "cpu_usage": self._cpu_percent(),
+                "memory_usage": self._memory_percent(),
+                "disk_usage": self._disk_percent()
+            }
+        if psutil is not None:
+            return {
+                "cpu_usage": psutil.cpu_percent(interval=None),
+                "memory_usage": psutil.virtual_memory().percent,
+                "disk_usage": psutil.disk_usage(self.disk_path).percent
+            }
+        return {"cpu_usage": 0.0, "memory_usage": 0.0, "disk_usage": 0.0}
+
+    def sample(self) -> Dict[str, Any]:
+        """Снимок метрик; свежий снимок отдается из кэша без обращения к системе"""
+        with self._lock:
+            now = time.monotonic()
+            if self._snapshot is not None and now - self._snapshot["sampled_at"] < self.max_age:
+                return dict(self._snapshot)
+            try:
+                metrics = self._read()
+            except Exception as e:
+                logger.error(f"System metrics read failed: {e}")
+                metrics = {"cpu_usage": 0.0, "memory_usage": 0.0, "disk_usage": 0.0}
+            self._snapshot = {**metrics, "sampled_at": now}
+            self.samples_taken += 1
+            return dict(self._snapshot)
+
+
+_sampler: Optional[SystemSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_system_sampler() -> SystemSampler:
+    """Общий сборщик метрик процесса"""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = SystemSampler()
+        return _sampler
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Тесты выбора модели Ollama по намерению и сложности
+"""
+
+import asyncio
+import os
+import sys
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_providers.model_tiers import ModelTierRouter, answer_quality
+from ai_providers.provider_manager import AIProviderManager
+from ai_providers.routing import ProviderRouter
+from test_provider_routing import FakeProvider
+
+
+class TieredOllama(FakeProvider):
+    """Поддельная Ollama: ответы зависят от запрошенной модели"""
+
+    def __init__(self, answers: dict):
+        super().__init__("ollama")
+        self.model_name = "llama2"
+        self.answers = answers
+        self.models = []
+
+    async def generate_response(self, prompt: str, **kwargs):
+        model = kwargs.get("model") or self.model_name
+        self.models.append(model)
+        return {"success": True, "result": self.answers[model], "model": model, "provider": "ollama"}
+
+
+def make_manager(ollama) -> AIProviderManager:
+    manager = AIProviderManager(ProviderRouter())
+    manager.register_provider("ollama", ollama)
+    manager.register_provider("local", FakeProvider("local"), fallback=True)
+    manager.initialized = True
+    return manager
+
+
+def test_routing_table_picks_tier_by_intent_and_complexity():
+    """Простые задачи - маленькая модель, код и сложные задачи - крупнее"""
+    tiers = ModelTierRouter()
+    assert tiers.select_tier("general", "simple") == "small"
+    assert tiers.select_tier("summarization", "medium") == "small"
+    assert tiers.select_tier("code_generation", "simple") == "medium"
+    assert tiers.select_tier("unknown", "complex") == "large"
+
+    # Неустановленные модели пропускаются
+    tiers.set_installed(["gemma:2b", "llama2:latest"])
+    assert tiers.escalation_chain("small") == [("small", "gemma:2b"), ("large", "llama2")]
+    assert tiers.escalation_chain("medium") == [("large", "llama2")]
+
+
+def test_quality_heuristic_flags_weak_answers():
+    assert answer_quality("вопрос", "Столица Франции - Париж, это крупнейший город страны.") == 1.0
+    assert answer_quality("вопрос", "") == 0.0
+    assert answer_quality("вопрос", "Не знаю") < 0.6
+    assert answer_quality("вопрос", "да " * 40) < 0.6
+
+
+def test_weak_small_answer_escalates_to_large_model():
+    """Плохой ответ маленькой модели - повтор на большой; статистика по уровням"""
+    async def scenario():
+        ollama = TieredOllama({
+            "gemma:2b": "Не знаю",
+            "phi": "Я не уверен, не могу ответить",
+            "llama2": "Подробный и полезный ответ на заданный вопрос."
+        })
+        manager = make_manager(ollama)
+
+        result = await manager.generate_response("кратко о погоде", intent="general", complexity="simple")
+        assert result["result"] == "Подробный и полезный ответ на заданный вопрос."
+        assert (result["tier"], result["escalated"]) == ("large", True)
+        assert ollama.models == ["gemma:2b", "phi", "llama2"]
+
+        ollama.answers["gemma:2b"] = "Сегодня солнечно, до двадцати градусов тепла."
+        result = await manager.generate_response("и завтра?", intent="general", complexity="simple")
+        assert (result["tier"], result["escalated"]) == ("small", False)
+
+        # Без сложности - прежняя модель провайдера
+        await manager.generate_response("обычный запрос")
+        assert ollama.models[-1] == "llama2"
+
+        stats = manager.model_tiers.get_stats()
+        assert stats["small"]["requests"] == 2 and stats["small"]["escalations"] == 1
+        assert stats["small"]["escalation_rate"] == 0.5
+        assert stats["large"]["avg_quality"] == 1.0
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_routing_table_picks_tier_by_intent_and_complexity()
+    test_quality_heuristic_flags_weak_answers()
+    test_weak_small_answer_escalates_to_large_model()
+    print("✅ Выбор модели по сложности работает корректно")
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Тесты общего сборщика системных метрик AI Manager
+"""
+
+import os
+import sys
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from monitoring.system_metrics import SystemSampler, get_system_sampler
+
+
+def test_snapshot_is_shared_while_fresh():
+    """Повторный запрос в пределах max_age не обращается к системе"""
+    sampler = SystemSampler(max_age=60.0)
+    first = sampler.sample()
+    second = sampler.sample()
+    assert first == second
+    assert sampler.samples_taken == 1
+    for key in ("cpu_usage", "memory_usage", "disk_usage"):
+        assert 0.0 <= first[key] <= 100.0
+
+    sampler.max_age = 0.0
+    sampler.sample()
+    assert sampler.samples_taken == 2
+    assert get_system_sampler() is get_system_sampler()
+
+
+if __name__ == "__main__":
+    test_snapshot_is_shared_while_fresh()
+    print("✅ Сборщик системных метрик работает корректно")
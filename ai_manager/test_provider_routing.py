@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Тесты маршрутизации AI провайдеров на поддельных провайдерах
+с заданной задержкой и ошибками
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ai_providers.base_provider import BaseAIProvider
+from ai_providers.ollama_provider import OllamaProvider
+from ai_providers.provider_manager import AIProviderManager
+from ai_providers.routing import CircuitBreaker, ProviderRouter
+
+
+class FakeProvider(BaseAIProvider):
+    """Провайдер с управляемой задержкой, ошибками и зависанием"""
+
+    def __init__(self, name: str, latency: float = 0.0, fail: bool = False, hang: bool = False):
+        super().__init__(f"fake-{name}")
+        self.name = name
+        self.latency = latency
+        self.fail = fail
+        self.hang = hang
+        self.up = True
+        self.calls = 0
+        self.cancelled = 0
+        self.is_available = True
+
+    async def initialize(self) -> bool:
+        return True
+
+    async def is_model_available(self) -> bool:
+        raise AssertionError("проверка здоровья не должна загружать модели")
+
+    async def probe(self) -> bool:
+        return self.up
+
+    async def generate_response(self, prompt: str, **kwargs):
+        self.calls += 1
+        try:
+            if self.hang:
+                await asyncio.sleep(3600)
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            return {"success": False, "error": f"{self.name} failed", "result": None}
+        return {"success": True, "result": f"{self.name}: {prompt}", "provider": self.name}
+
+
+def make_manager(*providers, fallback: str = None, **router_options) -> AIProviderManager:
+    options = {"breaker_options": {"min_requests": 2, "open_timeout": 0.2}, **router_options}
+    manager = AIProviderManager(ProviderRouter(**options))
+    for provider in providers:
+        manager.register_provider(provider.name, provider, fallback=provider.name == fallback)
+    manager.initialized = True
+    return manager
+
+
+def test_fastest_healthy_provider_wins():
+    """После первых замеров запросы идут к самому быстрому, резервный - только последним"""
+    async def scenario():
+        slow, fast, local = FakeProvider("slow", 0.03), FakeProvider("fast", 0.001), FakeProvider("local")
+        manager = make_manager(slow, fast, local, fallback="local")
+        for i in range(6):
+            await manager.generate_response(f"вопрос {i}")
+        assert fast.calls >= 4
+        assert local.calls == 0
+        assert manager.get_default_provider_name() == "fast"
+
+        result = await manager.generate_response("конкретно slow", provider_name="slow")
+        assert result["routed_to"] == "slow"
+
+    asyncio.run(scenario())
+
+
+def test_failing_provider_trips_and_is_skipped_instantly():
+    """Сбойный провайдер отключается и больше не добавляет задержку"""
+    async def scenario():
+        dead = FakeProvider("dead", latency=0.05, fail=True)
+        backup = FakeProvider("backup", latency=0.001)
+        manager = make_manager(dead, backup)
+        manager.router.routes["backup"].latency_ewma = 1.0  # dead выглядит быстрее до первых ошибок
+
+        for i in range(2):
+            result = await manager.generate_response(f"запрос {i}")
+            assert result["routed_to"] == "backup"
+        breaker = manager.router.routes["dead"].breaker
+        assert breaker.state == CircuitBreaker.OPEN
+
+        start = time.monotonic()
+        for i in range(5):
+            await manager.generate_response(f"после отключения {i}")
+        assert dead.calls == 2
+        assert time.monotonic() - start < 0.05
+
+        # Через open_timeout один пробный запрос; успех закрывает автомат
+        dead.fail = False
+        await asyncio.sleep(0.25)
+        result = await manager.generate_response("пробный")
+        assert result["routed_to"] == "dead"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_hanging_provider_times_out_and_half_open_allows_one_probe():
+    """Зависший провайдер ограничен таймаутом; в half_open пропускается один запрос"""
+    async def scenario():
+        stuck = FakeProvider("stuck", hang=True)
+        ok = FakeProvider("ok", latency=0.001)
+        manager = make_manager(stuck, ok, request_timeout=0.05)
+        manager.router.routes["ok"].latency_ewma = 1.0
+        for i in range(2):
+            assert (await manager.generate_response(f"q{i}"))["routed_to"] == "ok"
+        breaker = manager.router.routes["stuck"].breaker
+        assert breaker.state == CircuitBreaker.OPEN
+
+        await asyncio.sleep(0.25)
+        assert breaker.allow_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+    asyncio.run(scenario())
+
+
+def test_background_probes_toggle_health_without_pulling():
+    """Фоновая проверка выключает и возвращает провайдера; статус не ходит в сеть"""
+    async def scenario():
+        primary, local = FakeProvider("primary"), FakeProvider("local")
+        manager = make_manager(primary, local, fallback="local", probe_interval=0.02)
+        manager.router.start_probes()
+        try:
+            primary.up = False
+            await asyncio.sleep(0.06)
+            assert manager.get_available_providers() == ["local"]
+            assert (await manager.generate_response("a"))["routed_to"] == "local"
+            assert primary.calls == 0
+
+            primary.up = True
+            await asyncio.sleep(0.06)
+            assert (await manager.generate_response("b"))["routed_to"] == "primary"
+            health = await manager.get_provider_health()
+            assert health["primary"]["available"] and health["primary"]["circuit"]["state"] == "closed"
+        finally:
+            await manager.close_all()
+
+    asyncio.run(scenario())
+
+
+def test_hedged_route_duplicates_slow_provider_within_budget():
+    """Медленный провайдер дублируется следующим; победитель - первый ответ"""
+    async def scenario():
+        slow, fast = FakeProvider("slow", latency=0.5), FakeProvider("fast", latency=0.01)
+        manager = make_manager(slow, fast, hedge_ratio=1.0, hedge_default_delay=0.03)
+        manager.router.routes["fast"].latency_ewma = 1.0
+
+        start = time.monotonic()
+        result = await manager.generate_response("вопрос")
+        assert result["routed_to"] == "fast"
+        assert time.monotonic() - start < 0.3
+        stats = manager.router.get_hedge_stats()
+        assert (stats["hedged"], stats["hedge_wins"]) == (1, 1)
+        # Отмененный проигравший не считается ошибкой провайдера, но его ожидание
+        # попадает в квантиль задержки как нижняя граница
+        # Отмена через wait_for доходит до call за несколько итераций цикла
+        await asyncio.sleep(0.01)
+        slow_route = manager.router.routes["slow"]
+        assert slow_route.failures == 0
+        assert manager.router.get_hedge_stats()["censored"] == 1
+        assert len(slow_route.latencies) == 1 and slow_route.latencies[0] >= 0.03
+        assert slow_route.latency_ewma is None
+
+        # Без бюджета второй провайдер не подключается
+        manager.router.hedge_ratio = 0.1
+        manager.router.hedge_tokens = 0.0
+        result = await manager.generate_response("другой вопрос")
+        assert result["routed_to"] == "slow"
+        assert manager.router.get_hedge_stats()["budget_denied"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_last_caller_cancels_provider_call():
+    """Отмена единственного ожидающего прерывает запрос к провайдеру"""
+    async def scenario():
+        stuck = FakeProvider("stuck", hang=True)
+        manager = make_manager(stuck)
+
+        first = asyncio.ensure_future(manager.generate_response("вопрос"))
+        second = asyncio.ensure_future(manager.generate_response("вопрос"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert len(manager._in_flight) == 1 and stuck.cancelled == 0  # второй еще ждет
+
+        second.cancel()
+        await asyncio.sleep(0.01)
+        assert manager._in_flight == {} and manager._waiters == {}
+        assert (stuck.calls, stuck.cancelled) == (1, 1)
+        assert not manager.router.routes["stuck"].breaker.probe_in_flight
+        assert manager.router.routes["stuck"].failures == 0
+
+    asyncio.run(scenario())
+
+
+def test_ollama_model_names_match_tagged_list():
+    """Модель без тега считается установленной, если есть вариант :latest"""
+    provider = OllamaProvider("llama2")
+    assert provider._has_model(["llama2:latest"])
+    assert not provider._has_model(["mistral:latest"])
+
+
+if __name__ == "__main__":
+    test_fastest_healthy_provider_wins()
+    test_failing_provider_trips_and_is_skipped_instantly()
+    test_hanging_provider_times_out_and_half_open_allows_one_probe()
+    test_background_probes_toggle_health_without_pulling()
+    test_hedged_route_duplicates_slow_provider_within_budget()
+    test_cancelling_last_caller_cancels_provider_call()
+    test_ollama_model_names_match_tagged_list()
+    print("✅ Маршрутизация AI провайдеров работает корректно")
@@ -19,6 +19,8 @@ from datetime import datetime
 
 from multi_agent_system import BaseAgent, AgentType
 from ai_engine import ai_engine, generate_ai_response
+from system_metrics import get_system_sampler
+from model_residency import get_residency_manager, tagged
 
 logger = logging.getLogger(__name__)
 
@@ -175,35 +177,20 @@ class AIManagerAgent(BaseAgent):
             return {"error": str(e)}
     
     async def _handle_optimize_models(self, content: Dict[str, Any]) -> Dict[str, Any]:
-        """Оптимизация моделей"""
+        """Оптимизация моделей: горячие держим в памяти, холодные выгружаем"""
         try:
-            optimization_results = []
+            residency = get_residency_manager()
+            report = await residency.rebalance()
             
+            # Обновляем занимаемую моделями память
+            resident = {model["name"]: model for model in report["resident"]}
             for model_name, model_info in self.models.items():
-                if model_info.status == "installed":
-                    # Тестируем производительность модели
-                    start_time = time.time()
-                    response = await ai_engine.generate_response(
-                        "Тест производительности",
-                        model=model_name,
-                        max_tokens=100
-                    )
-                    response_time = time.time() - start_time
-                    
-                    # Обновляем метрики
-                    model_info.performance_score = 1.0 / max(response_time, 0.1)
-                    model_info.last_used = datetime.now().isoformat()
-                    
-                    optimization_results.append({
-                        "model": model_name,
-                        "response_time": response_time,
-                        "performance_score": model_info.performance_score,
-                        "success": response.success
-                    })
+                model = resident.get(tagged(model_name))
+                model_info.memory_usage = model["size_mb"] if model else 0.0
             
             return {
                 "message": "Оптимизация моделей завершена",
-                "results": optimization_results
+                **report
             }
             
         except Exception as e:
@@ -238,8 +225,11 @@ class AIManagerAgent(BaseAgent):
             return {"error": str(e)}
     
     async def _handle_cleanup_models(self, content: Dict[str, Any]) -> Dict[str, Any]:
-        """Очистка неиспользуемых моделей"""
+        """Очистка неиспользуемых моделей: выгрузка из памяти и удаление с диска"""
         try:
+            residency = get_residency_manager()
+            unloaded_models = await residency.evict_idle(content.get("idle_minutes", 30) * 60)
+            
             cleanup_threshold = content.get("days_unused", 30)
             cutoff_date = datetime.now().timestamp() - (cleanup_threshold * 24 * 3600)
             
@@ -254,7 +244,7 @@ class AIManagerAgent(BaseAgent):
             for model_name in models_to_remove:
                 try:
                     # Удаляем модель
-                    subprocess.run(['ollama', 'rm', model_name], check=True)
+                    await residency.client.delete_model(model_name)
                     del self.models[model_name]
                     removed_models.append(model_name)
                     logger.info(f"🗑️ Удалена неиспользуемая модель: {model_name}")
@@ -263,6 +253,7 @@ class AIManagerAgent(BaseAgent):
             
             return {
                 "message": f"Очистка завершена",
+                "unloaded_models": unloaded_models,
                 "removed_models": removed_models,
                 "models_checked": len(self.models),
                 "models_removed": len(removed_models)
@@ -340,48 +331,15 @@ class AIManagerAgent(BaseAgent):
     
     def _get_memory_usage(self) -> float:
         """Получить использование памяти"""
-        try:
-            result = subprocess.run(['free', '-m'], capture_output=True, text=True)
-            if result.returncode == 0:
-                lines = result.stdout.split('\n')
-                mem_line = lines[1].split()
-                used = int(mem_line[2])
-                total = int(mem_line[1])
-                return (used / total) * 100
-        except:
-            pass
-        return 0.0
+        return get_system_sampler().latest().memory_percent
     
     def _get_cpu_usage(self) -> float:
         """Получить использование CPU"""
-        try:
-            result = subprocess.run(['top', '-bn1'], capture_output=True, text=True)
-            if result.returncode == 0:
-                lines = result.stdout.split('\n')
-                for line in lines:
-                    if 'Cpu(s)' in line:
-                        parts = line.split(',')
-                        if len(parts) > 0:
-                            cpu_part = parts[0].split()[1]
-                            return float(cpu_part.replace('%', ''))
-        except:
-            pass
-        return 0.0
+        return get_system_sampler().latest().cpu_percent
     
     def _get_disk_usage(self) -> float:
         """Получить использование диска"""
-        try:
-            result = subprocess.run(['df', '-h', '/'], capture_output=True, text=True)
-            if result.returncode == 0:
-                lines = result.stdout.split('\n')
-                if len(lines) > 1:
-                    parts = lines[1].split()
-                    if len(parts) > 4:
-                        usage = parts[4].replace('%', '')
-                        return float(usage)
-        except:
-            pass
-        return 0.0
+        return get_system_sampler().latest().disk_percent
     
     async def auto_install_models(self):
         """Автоматическая установка моделей"""
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Движок алертов JARVIS
+Дедупликация по отпечатку, гистерезис порогов, условие длительности
+и период тишины после разрешения: одна проблема - один алерт
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional
+
+LEVELS = {0: None, 1: "warning", 2: "critical"}
+
+
+@dataclass
+class AlertEvent:
+    """Смена состояния алерта"""
+    kind: str  # fired, resolved
+    fingerprint: str
+    severity: Optional[str]
+    message: str
+    value: Optional[float] = None
+
+
+@dataclass
+class AlertState:
+    """Состояние отпечатка"""
+    level: int = 0
+    pending_level: int = 0
+    pending_since: float = 0.0
+    notified_at: float = 0.0
+    notified_level: int = 0
+    # Об активном инциденте было уведомление (не подавлен периодом тишины)
+    notified: bool = False
+    occurrences: int = 0
+    message: str = ""
+
+
+class AlertEngine:
+    """Пороговые алерты с подавлением повторов
+
+    Алерт поднимается, когда значение держится за порогом входа дольше
+    for_duration, и разрешается только после выхода за порог выхода
+    (порог входа, смещенный на hysteresis в сторону нормы). Повторное
+    срабатывание того же отпечатка в течение cooldown после уведомления
+    не порождает нового события.
+    """
+
+    def __init__(self, hysteresis: float = 0.05, for_duration: float = 60.0, cooldown: float = 600.0):
+        self.hysteresis = hysteresis
+        self.for_duration = for_duration
+        self.cooldown = cooldown
+        self.states: Dict[str, AlertState] = {}
+        # Индекс активных алертов: отпечаток -> уровень
+        self.active: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"evaluations": 0, "fired": 0, "resolved": 0, "suppressed": 0}
+
+    @staticmethod
+    def _breached(value: float, threshold: float, below: bool) -> bool:
+        return value <= threshold if below else value >= threshold
+
+    def _exit_threshold(self, threshold: float, below: bool) -> float:
+        shift = abs(threshold) * self.hysteresis
+        return threshold + shift if below else threshold - shift
+
+    def _target_level(self, state: AlertState, value: float, warning: float, critical: float) -> int:
+        """Уровень с учетом гистерезиса: текущий держится до порога выхода"""
+        # Порог критического ниже предупреждения - значит плохо, когда значение падает
+        below = critical < warning
+        thresholds = {1: warning, 2: critical}
+        target = 0
+        for level in (2, 1):
+            if self._breached(value, thresholds[level], below):
+                target = level
+                break
+        for level in range(state.level, target, -1):
+            if self._breached(value, self._exit_threshold(thresholds[level], below), below):
+                return level
+        return target
+
+    def evaluate(self, fingerprint: str, value: float, warning: float, critical: float,
+                 message: str = "", now: Optional[float] = None,
+                 for_duration: Optional[float] = None) -> List[AlertEvent]:
+        """Проверить значение метрики против порогов"""
+        now = time.time() if now is None else now
+        for_duration = self.for_duration if for_duration is None else for_duration
+        with self._lock:
+            self.stats["evaluations"] += 1
+            state = self.states.setdefault(fingerprint, AlertState())
+            target = self._target_level(state, value, warning, critical)
+            return self._transition(fingerprint, state, target, message, value, now, for_duration)
+
+    def raise_alert(self, fingerprint: str, severity: str, message: str,
+                    now: Optional[float] = None) -> List[AlertEvent]:
+        """Условие алерта выполняется сейчас (проверки здоровья и т.п.)"""
+        now = time.time() if now is None else now
+        level = 2 if severity == "critical" else 1
+        with self._lock:
+            state = self.states.setdefault(fingerprint, AlertState())
+            return self._transition(fingerprint, state, max(level, state.level), message, None, now, 0.0)
+
+    def clear(self, fingerprint: str, now: Optional[float] = None) -> List[AlertEvent]:
+        """Условие алерта больше не выполняется"""
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self.states.get(fingerprint)
+            if state is None:
+                return []
+            return self._transition(fingerprint, state, 0, state.message, None, now, 0.0)
+
+    def _transition(self, fingerprint: str, state: AlertState, target: int, message: str,
+                    value: Optional[float], now: float, for_duration: float) -> List[AlertEvent]:
+        if target <= state.level:
+            state.pending_level = 0
+            if target == state.level:
+                return []
+            state.level = target
+            if target:
+                # Снижение с критического до предупреждения - тот же инцидент
+                self.active[fingerprint] = target
+                return []
+            self.active.pop(fingerprint, None)
+            if not state.notified:
+                return []
+            state.notified = False
+            self.stats["resolved"] += 1
+            return [AlertEvent("resolved", fingerprint, None, state.message, value)]
+
+        # Повышение уровня - только если оно держится for_duration
+        if state.pending_level != target:
+            state.pending_level = target
+            state.pending_since = now
+        if now - state.pending_since < for_duration:
+            return []
+
+        state.level = target
+        state.pending_level = 0
+        state.occurrences += 1
+        state.message = message
+        self.active[fingerprint] = target
+        if now - state.notified_at < self.cooldown and target <= state.notified_level:
+            self.stats["suppressed"] += 1
+            return []
+        state.notified_at = now
+        state.notified_level = target
+        state.notified = True
+        self.stats["fired"] += 1
+        return [AlertEvent("fired", fingerprint, LEVELS[target], message, value)]
+
+    def is_active(self, fingerprint: str) -> bool:
+        return fingerprint in self.active
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика движка алертов"""
+        with self._lock:
+            return {
+                **self.stats,
+                "active": len(self.active),
+                "tracked": len(self.states),
+                "hysteresis": self.hysteresis,
+                "for_duration": self.for_duration,
+                "cooldown": self.cooldown
+            }
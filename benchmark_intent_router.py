@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: определение намерений для всех фронтендов чата
+Прежние цепочки any(word in message ...) из пяти мест против одного
+прохода IntentRouter (без кеша и с повторяющимися сообщениями)
+
+Запуск: python benchmark_intent_router.py --messages 10000 --repeat-ratio 0.5
+"""
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, Dict, List
+
+from intent_router import DEFAULT_RULES, IntentRouter
+
+WORDS = ["привет", "статус", "системы", "покажи", "задачи", "анализ", "данные", "продаж", "улучши",
+         "код", "python", "функция", "отчет", "график", "проект", "план", "ошибка", "сервер", "docker",
+         "модель", "помощь", "спасибо", "время", "быстро", "напиши", "переведи", "найди", "таблица",
+         "пожалуйста", "сегодня", "завтра", "клиент", "заказ", "склад", "цена", "доставка"]
+
+
+def legacy_chain(rules: List[Dict]) -> Callable[[str], str]:
+    """Прежняя реализация: по очереди any(word in message) для каждого правила"""
+    def detect(message: str) -> str:
+        message_lower = message.lower()
+        for rule in rules:
+            if any(word in message_lower for word in rule.get("keywords", [])):
+                return rule["intent"]
+        return ""
+    return detect
+
+
+def legacy_regex(rules: List[Dict]) -> Callable[[str], str]:
+    """Прежний TaskAnalyzer._detect_category: re.search по шаблонам категорий"""
+    patterns = [(rule["intent"], r"\b(" + "|".join(rule["words"]) + r")\b") for rule in rules]
+
+    def detect(message: str) -> str:
+        message_lower = message.lower()
+        for category, pattern in patterns:
+            if re.search(pattern, message_lower):
+                return category
+        return "general"
+    return detect
+
+
+def legacy_all(message: str, detectors: List[Callable[[str], str]], skills: List[Dict]) -> List[str]:
+    """Все пять мест определения намерений для одного сообщения"""
+    message_lower = message.lower()
+    required = [skill for rule in skills if rule["keywords"][0] in message_lower for skill in rule["data"]["skills"]]
+    return [detect(message) for detect in detectors] + required
+
+
+def make_messages(count: int, repeat_ratio: float, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    unique = [" ".join(rng.choices(WORDS, k=rng.randint(3, 12))) for _ in range(count)]
+    popular = unique[:50]
+    return [rng.choice(popular) if rng.random() < repeat_ratio else unique[i] for i in range(count)]
+
+
+def measure(name: str, func: Callable[[str], object], messages: List[str]) -> Dict[str, float]:
+    start = time.perf_counter()
+    for message in messages:
+        func(message)
+    elapsed = time.perf_counter() - start
+    return {"path": name, "messages": len(messages), "per_s": len(messages) / elapsed,
+            "us_per_message": elapsed / len(messages) * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк маршрутизатора намерений")
+    parser.add_argument("--messages", type=int, default=10000, help="Количество сообщений")
+    parser.add_argument("--repeat-ratio", type=float, default=0.5, help="Доля повторяющихся сообщений")
+    parser.add_argument("--target", type=float, default=10000, help="Целевая пропускная способность, сообщений/с")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages, args.repeat_ratio, args.seed)
+    detectors = [legacy_chain(DEFAULT_RULES[name]) for name in ("jarvis", "agent", "chat_fallback", "complex_task")]
+    detectors.append(legacy_regex(DEFAULT_RULES["task_category"]))
+
+    uncached = IntentRouter(rules_file=None, cache_size=0)
+    cached = IntentRouter(rules_file=None)
+    results = [
+        measure("legacy_chains", lambda m: legacy_all(m, detectors, DEFAULT_RULES["skills"]), messages),
+        measure("router", uncached.analyze, messages),
+        measure("router_cached", cached.analyze, messages)
+    ]
+
+    print(f"{'path':<16}{'messages':>10}{'msg/s':>12}{'us/msg':>10}")
+    for row in results:
+        print(f"{row['path']:<16}{row['messages']:>10}{row['per_s']:>12.0f}{row['us_per_message']:>10.1f}")
+    slowest = min(row["per_s"] for row in results[1:])
+    print(f"Цель {args.target:.0f} msg/s: {'✅ достигнута' if slowest >= args.target else '❌ не достигнута'}")
+    stats = cached.get_stats()
+    print(f"Кеш: {stats['hits']} попаданий, {stats['misses']} промахов; "
+          f"{stats['phrases']} ключевых фраз в {stats['rulesets']} наборах")
+
+
+if __name__ == "__main__":
+    main()
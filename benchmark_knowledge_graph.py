@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: поиск связанных концепций в KnowledgeGraph
+Списки смежности и обход в ширину на deque против прежнего полного
+перебора self.edges для каждой посещенной вершины
+
+Запуск: python benchmark_knowledge_graph.py --concepts 100000 --edges 1000000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from agent_coordinator import KnowledgeGraph
+
+
+def legacy_find_related(graph: KnowledgeGraph, concept_id: str, max_depth: int = 2) -> List[str]:
+    """Прежняя реализация: O(V·E) на запрос"""
+    with graph.lock:
+        related = set()
+        to_explore = [(concept_id, 0)]
+        while to_explore:
+            current_id, depth = to_explore.pop(0)
+            if depth >= max_depth:
+                continue
+            for edge_key in graph.edges:
+                if current_id in edge_key:
+                    other_id = edge_key[0] if edge_key[1] == current_id else edge_key[1]
+                    if other_id not in related:
+                        related.add(other_id)
+                        to_explore.append((other_id, depth + 1))
+        return list(related)
+
+
+def build_graph(concepts: int, edges: int, seed: int) -> KnowledgeGraph:
+    """Синтетический граф со случайными связями"""
+    rng = random.Random(seed)
+    graph = KnowledgeGraph()
+    for i in range(concepts):
+        graph.add_concept(f"c{i}", f"concept {i}", "", [f"kw{i % 1000}"], "benchmark")
+    types = ["related_to", "part_of", "depends_on"]
+    for _ in range(edges):
+        a, b = rng.randrange(concepts), rng.randrange(concepts)
+        if a != b:
+            graph.add_relationship(f"c{a}", f"c{b}", rng.choice(types), rng.random())
+    return graph
+
+
+def measure(name: str, func: Callable[[str], object], concept_ids: List[str]) -> Dict[str, float]:
+    """Задержка запросов в миллисекундах"""
+    latencies = []
+    for concept_id in concept_ids:
+        start = time.perf_counter()
+        func(concept_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "path": name,
+        "queries": len(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "mean_ms": statistics.mean(latencies)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк обхода графа знаний")
+    parser.add_argument("--concepts", type=int, default=100000, help="Количество концепций")
+    parser.add_argument("--edges", type=int, default=1000000, help="Количество связей")
+    parser.add_argument("--depth", type=int, default=2, help="Глубина обхода")
+    parser.add_argument("--queries", type=int, default=200, help="Запросов к новой реализации")
+    parser.add_argument("--legacy-queries", type=int, default=3, help="Запросов к прежней реализации")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    graph = build_graph(args.concepts, args.edges, args.seed)
+    build_time = time.perf_counter() - start
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+    print(f"Граф: {len(graph.nodes)} концепций, {len(graph.edges)} связей, "
+          f"построение {build_time:.1f} с, память {memory_mb:.0f} МБ")
+
+    rng = random.Random(args.seed + 1)
+    sample = [f"c{rng.randrange(args.concepts)}" for _ in range(args.queries)]
+    batch = sample[:50]
+
+    results = [
+        measure("legacy_scan", lambda c: legacy_find_related(graph, c, args.depth), sample[:args.legacy_queries]),
+        measure("adjacency_bfs", lambda c: graph.find_related_concepts(c, args.depth), sample),
+        measure("weighted", lambda c: graph.find_weighted_related(c, args.depth), sample)
+    ]
+    start = time.perf_counter()
+    graph.get_neighborhoods(batch, max_depth=args.depth)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{'path':<15}{'queries':>10}{'p50, ms':>12}{'p99, ms':>12}{'mean, ms':>12}")
+    for row in results:
+        print(f"{row['path']:<15}{row['queries']:>10}{row['p50_ms']:>12.3f}"
+              f"{row['p99_ms']:>12.3f}{row['mean_ms']:>12.3f}")
+    print(f"get_neighborhoods: {len(batch)} концепций за {batch_ms:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
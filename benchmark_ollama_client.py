@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: пул соединений OllamaClient против запуска процесса на каждое сообщение
+Использует локальный HTTP сервер-заглушку вместо настоящей Ollama
+
+Запуск: python benchmark_ollama_client.py --messages 200 --delay 0.005
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from ollama_client import OllamaClient
+
+# Процесс-заглушка вместо `ollama run`: старт интерпретатора + одно HTTP соединение
+CLI_STUB = """
+import json, sys, urllib.request
+url, model, prompt = sys.argv[1:4]
+data = json.dumps({"model": model, "prompt": prompt, "stream": False}).encode()
+request = urllib.request.Request(url + "/api/generate", data=data,
+                                 headers={"Content-Type": "application/json"})
+with urllib.request.urlopen(request, timeout=120) as response:
+    print(json.loads(response.read())["response"])
+"""
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Заглушка Ollama API с фиксированной задержкой генерации"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    delay = 0.0
+    tokens = ["o", "k"]
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/api/generate" and request.get("stream"):
+            self._stream_generate(request)
+            return
+
+        time.sleep(self.delay)
+
+        if self.path == "/api/chat":
+            body = {"model": request.get("model"), "message": {"role": "assistant", "content": "ok"}, "done": True}
+        else:
+            body = {"model": request.get("model"), "response": "ok", "done": True}
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream_generate(self, request):
+        """Потоковый ответ NDJSON: задержка делится между токенами"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        chunks = [{"model": request.get("model"), "response": token, "done": False} for token in self.tokens]
+        chunks.append({"model": request.get("model"), "response": "", "done": True, "eval_count": len(self.tokens)})
+        for chunk in chunks:
+            time.sleep(self.delay / len(chunks))
+            line = json.dumps(chunk).encode() + b"\n"
+            self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        payload = json.dumps({"models": [{"name": "llama2:latest"}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(delay: float) -> ThreadingHTTPServer:
+    """Запуск сервера-заглушки в фоновом потоке"""
+    StubOllamaHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Перцентиль по отсортированной выборке"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name: str, latencies: List[float]) -> Dict[str, float]:
+    """Сводка задержек в миллисекундах"""
+    return {
+        "path": name,
+        "messages": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000
+    }
+
+
+def bench_subprocess(base_url: str, messages: int) -> List[float]:
+    """Один процесс на каждое сообщение, как `ollama run`"""
+    latencies = []
+    for i in range(messages):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", CLI_STUB, base_url, "llama2", f"Сообщение {i}"],
+                       capture_output=True, text=True, timeout=120, check=True)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def bench_client(base_url: str, messages: int) -> List[float]:
+    """Общий keep-alive пул OllamaClient"""
+    client = OllamaClient(base_url)
+    latencies = []
+    try:
+        for i in range(messages):
+            start = time.perf_counter()
+            await client.generate("llama2", f"Сообщение {i}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        await client.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк OllamaClient против subprocess")
+    parser.add_argument("--messages", type=int, default=100, help="Количество сообщений на каждый путь")
+    parser.add_argument("--delay", type=float, default=0.0, help="Имитация времени генерации, сек")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.delay)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        results = [
+            summarize("subprocess", bench_subprocess(base_url, args.messages)),
+            summarize("pooled_client", asyncio.run(bench_client(base_url, args.messages)))
+        ]
+    finally:
+        server.shutdown()
+
+    print(f"{'path':<15}{'messages':>10}{'p50, ms':>12}{'p99, ms':>12}{'mean, ms':>12}")
+    for row in results:
+        print(f"{row['path']:<15}{row['messages']:>10}{row['p50_ms']:>12.2f}"
+              f"{row['p99_ms']:>12.2f}{row['mean_ms']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
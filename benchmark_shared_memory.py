@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: конкурентный доступ к EnhancedSharedMemory
+Много асинхронных читателей (поиск знаний, недавний контекст, чтение
+по ключу) и фоновый писатель. Блокировки чтения/записи сравниваются
+с прежней схемой, где и чтение, и запись шли через один мьютекс
+
+Запуск: python benchmark_shared_memory.py --readers 32 --duration 5
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List
+
+from agent_coordinator import EnhancedSharedMemory
+
+WORDS = ["python", "docker", "ollama", "модель", "сервер", "тесты", "сборка", "память",
+         "агент", "поиск", "индекс", "метрики", "журнал", "снимок", "запрос", "ответ"]
+
+
+class ExclusiveLock:
+    """Прежняя схема: один мьютекс для чтения и записи"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def read(self):
+        with self._lock:
+            yield
+
+    write = read
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._lock.release()
+
+
+def build_memory(items: int, exclusive: bool, seed: int) -> EnhancedSharedMemory:
+    """Память с синтетическими знаниями и историей разговора"""
+    rng = random.Random(seed)
+    memory = EnhancedSharedMemory()
+    if exclusive:
+        for owner in (memory, memory.knowledge_graph):
+            owner.lock = ExclusiveLock()
+            owner.text_index._lock = ExclusiveLock()
+    for i in range(items):
+        words = rng.sample(WORDS, 4)
+        memory.store_knowledge(f"fact_{i}", " ".join(words) + f" заметка {i}", "benchmark", words[:2])
+    for i in range(1000):
+        memory.add_conversation({"user_id": "user", "message": f"сообщение {i}"})
+    return memory
+
+
+def writer(memory: EnhancedSharedMemory, stop: threading.Event, interval: float, counter: List[int]):
+    """Фоновый писатель: новые знания и сообщения"""
+    rng = random.Random(0)
+    while not stop.is_set():
+        i = counter[0]
+        words = rng.sample(WORDS, 3)
+        memory.store_knowledge(f"live_{i}", " ".join(words), "writer", words[:1])
+        memory.add_conversation({"user_id": "writer", "message": f"live {i}"})
+        counter[0] += 1
+        time.sleep(interval)
+
+
+async def run_readers(memory: EnhancedSharedMemory, readers: int, duration: float,
+                      seed: int) -> Dict[str, List[float]]:
+    """Асинхронные читатели; операции с памятью выполняются в пуле потоков"""
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=readers)
+    latencies: Dict[str, List[float]] = {"search": [], "context": [], "get": []}
+    deadline = time.perf_counter() + duration
+
+    def read_once(rng: random.Random):
+        start = time.perf_counter()
+        operation = rng.random()
+        if operation < 0.4:
+            name = "search"
+            memory.search_knowledge(rng.choice(WORDS), limit=10)
+        elif operation < 0.8:
+            name = "context"
+            memory.get_recent_context(10)
+        else:
+            name = "get"
+            memory.get_knowledge(f"fact_{rng.randrange(100)}")
+        return name, (time.perf_counter() - start) * 1000
+
+    async def reader(index: int):
+        rng = random.Random(seed + index)
+        while time.perf_counter() < deadline:
+            name, latency = await loop.run_in_executor(executor, read_once, rng)
+            latencies[name].append(latency)
+
+    await asyncio.gather(*(reader(i) for i in range(readers)))
+    executor.shutdown()
+    return latencies
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def measure(name: str, args) -> Dict[str, float]:
+    memory = build_memory(args.items, name == "single_lock", args.seed)
+    stop = threading.Event()
+    writes = [0]
+    thread = threading.Thread(target=writer, args=(memory, stop, args.write_interval, writes), daemon=True)
+    thread.start()
+    latencies = asyncio.run(run_readers(memory, args.readers, args.duration, args.seed))
+    stop.set()
+    thread.join()
+    reads = [latency for values in latencies.values() for latency in values]
+    return {
+        "path": name,
+        "reads_per_s": len(reads) / args.duration,
+        "p50_ms": percentile(reads, 0.5),
+        "p99_ms": percentile(reads, 0.99),
+        "context_p99_ms": percentile(latencies["context"], 0.99),
+        "search_p99_ms": percentile(latencies["search"], 0.99),
+        "mean_ms": statistics.mean(reads),
+        "writes": writes[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк конкурентного доступа к общей памяти")
+    parser.add_argument("--items", type=int, default=5000, help="Знаний в памяти перед замером")
+    parser.add_argument("--readers", type=int, default=32, help="Асинхронных читателей")
+    parser.add_argument("--duration", type=float, default=5.0, help="Длительность замера, с")
+    parser.add_argument("--write-interval", type=float, default=0.005, help="Пауза писателя между записями, с")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    results = [measure("single_lock", args), measure("rw_lock", args)]
+
+    print(f"{'path':<13}{'reads/s':>10}{'p50, ms':>10}{'p99, ms':>10}{'mean, ms':>10}"
+          f"{'context p99':>13}{'search p99':>12}{'writes':>8}")
+    for row in results:
+        print(f"{row['path']:<13}{row['reads_per_s']:>10.0f}{row['p50_ms']:>10.3f}"
+              f"{row['p99_ms']:>10.3f}{row['mean_ms']:>10.3f}{row['context_p99_ms']:>13.3f}"
+              f"{row['search_p99_ms']:>12.3f}{row['writes']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ import asyncio
 from datetime import datetime
 import logging
 
+from task_scheduler import QueueFullError
+
 logger = logging.getLogger(__name__)
 
 class ChatMessage(BaseModel):
@@ -43,10 +45,14 @@ class ChatAPI:
                 
                 # Создаем задачу для обработки сообщения
                 from jarvis_core import Task
+                from task_store import new_task_id
                 
                 task = Task(
-                    id=f"chat_{int(time.time())}",
+                    id=new_task_id("chat"),
                     type="user_message",
+                    priority=9,  # Пользователь ждет ответа - выше фоновых задач
+                    status="pending",
+                    created_at=datetime.now().isoformat(),
                     parameters={
                         "message": message.message,
                         "user_id": message.user_id,
@@ -54,7 +60,10 @@ class ChatAPI:
                     }
                 )
                 
-                self.jarvis.tasks_queue.append(task)
+                try:
+                    self.jarvis.submit_task(task)
+                except QueueFullError as e:
+                    raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
                 
                 # Ждем обработки (до 10 секунд)
                 for _ in range(100):
@@ -67,6 +76,8 @@ class ChatAPI:
                 else:
                     raise HTTPException(status_code=408, detail="Таймаут обработки сообщения")
                     
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.error(f"❌ Ошибка отправки сообщения: {e}")
                 raise HTTPException(status_code=500, detail=str(e))
@@ -78,8 +89,8 @@ class ChatAPI:
                 return {
                     "chat_active": True,
                     "websocket_active": False,
-                    "messages_processed": len([t for t in self.jarvis.completed_tasks if t.type == "user_message"]),
-                    "pending_messages": len([t for t in self.jarvis.tasks_queue if t.type == "user_message"]),
+                    "messages_processed": self.jarvis.task_store.count(status="completed", task_type="user_message"),
+                    "pending_messages": len([t for t in self.jarvis.scheduler.pending_tasks() if t.type == "user_message"]),
                     "jarvis_status": self.jarvis.state.system_state if hasattr(self.jarvis, 'state') else "unknown"
                 }
             except Exception as e:
@@ -94,13 +105,15 @@ class ChatAPI:
             """История сообщений"""
             try:
                 history = []
-                for task in self.jarvis.completed_tasks[-10:]:  # Последние 10 сообщений
-                    if task.type == "user_message" and task.result:
+                # Последние 10 сообщений, в хронологическом порядке
+                tasks = self.jarvis.task_store.list_tasks(status="completed", task_type="user_message", limit=10)
+                for task in reversed(tasks):
+                    if task["result"]:
                         history.append({
-                            "timestamp": task.parameters.get("timestamp"),
-                            "user_message": task.parameters.get("message"),
-                            "jarvis_response": task.result.get("message", ""),
-                            "user_id": task.parameters.get("user_id")
+                            "timestamp": task["parameters"].get("timestamp"),
+                            "user_message": task["parameters"].get("message"),
+                            "jarvis_response": task["result"].get("message", ""),
+                            "user_id": task["parameters"].get("user_id")
                         })
                 return {"history": history}
             except Exception as e:
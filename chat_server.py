@@ -9,9 +9,9 @@ import json
 import logging
 import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Awaitable
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -20,6 +20,7 @@ from pathlib import Path
 
 # Импортируем нашу систему агентов
 from multi_agent_system import MultiAgentSystem, AgentType
+from ai_engine import token_callback
 from vision_agent import vision_agent
 
 # Создаем экземпляр системы
@@ -34,6 +35,85 @@ async def process_user_message(message: str, user_id: str = "user") -> Dict[str,
     """Обработка сообщения пользователя (базовая реализация)"""
     return await multi_agent_system.process_user_message(message, user_id)
 
+def format_agent_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Итоговый кадр agent_response из результата обработки сообщения"""
+    response = result.get("response", result.get("error", ""))
+    if isinstance(response, dict):
+        response_text = response.get("response", str(response))
+    else:
+        response_text = str(response)
+    
+    return {
+        "type": "agent_response",
+        "response": response_text,
+        "agent_name": result.get("agent", "Unknown"),
+        "agent_type": result.get("agent_type", "Unknown"),
+        "timestamp": result.get("timestamp", datetime.now().isoformat())
+    }
+
+class TokenStream:
+    """Колбэк потоковой выдачи для одного сообщения пользователя
+    
+    Каждая генерация обработчика - отдельный сегмент черновика: перед первым
+    токеном следующей генерации отправляется кадр agent_segment, и клиент
+    начинает новый блок вместо того, чтобы дописывать в предыдущий.
+    """
+    
+    def __init__(self, send_event: Callable[[Dict[str, Any]], Awaitable[None]], start_time: float):
+        self.send_event = send_event
+        self.start_time = start_time
+        self.tokens = 0
+        self.segments = 0
+        self.first_token_time = None
+        self._segment_pending = False
+    
+    async def new_segment(self):
+        """Началась новая генерация (вызывается из ai_engine.begin_generation)"""
+        self._segment_pending = True
+    
+    async def __call__(self, text: str):
+        if self.first_token_time is None:
+            self.first_token_time = time.time() - self.start_time
+        if self.tokens == 0:
+            self.segments = 1
+        elif self._segment_pending:
+            # Сегмент без токенов не нужен, поэтому кадр отправляется с первым токеном
+            self.segments += 1
+            await self.send_event({"type": "agent_segment", "segment": self.segments})
+        self._segment_pending = False
+        self.tokens += 1
+        await self.send_event({"type": "agent_token", "token": text})
+
+async def stream_user_message(message: str, user_id: str,
+                              send_event: Callable[[Dict[str, Any]], Awaitable[None]]) -> Dict[str, Any]:
+    """Обработка сообщения с потоковой выдачей токенов
+    
+    Каждый фрагмент ответа модели передается в send_event как кадр agent_token,
+    между генерациями обработчика - кадр agent_segment, по завершении
+    возвращается итоговый кадр agent_response со статистикой.
+    Колбэк передается через контекст, поэтому работает и с подмененной
+    process_user_message.
+    """
+    start_time = time.time()
+    stream = TokenStream(send_event, start_time)
+    
+    callback_token = token_callback.set(stream)
+    try:
+        result = await process_user_message(message, user_id)
+    finally:
+        token_callback.reset(callback_token)
+    
+    system_stats["total_messages"] += 1
+    
+    response = format_agent_response(result)
+    response.update({
+        "streamed_tokens": stream.tokens,
+        "streamed_segments": stream.segments,
+        "time_to_first_token": stream.first_token_time,
+        "response_time": time.time() - start_time
+    })
+    return response
+
 # Модели данных
 class ChatMessage(BaseModel):
     message: str
@@ -915,12 +995,42 @@ async def get_chat_interface():
                 }
             }
             
+            // Сообщение агента, которое дописывается по мере генерации
+            let streamingMessage = null;
+            
+            function appendToken(token) {
+                if (!streamingMessage) {
+                    addMessage('agent', '<span class="message-text"></span>');
+                    streamingMessage = document.getElementById('messagesContainer').lastElementChild;
+                }
+                const parts = streamingMessage.querySelectorAll('.message-text');
+                parts[parts.length - 1].textContent += token;
+                const messagesContainer = document.getElementById('messagesContainer');
+                messagesContainer.scrollTop = messagesContainer.scrollHeight;
+            }
+            
             // Обработка входящих сообщений
             function handleMessage(data) {
                 hideTypingIndicator();
                 
                 switch (data.type) {
+                    case 'agent_token':
+                        appendToken(data.token);
+                        break;
+                    case 'agent_segment':
+                        // Следующая генерация обработчика - отдельный блок черновика
+                        if (streamingMessage) {
+                            const parts = streamingMessage.querySelectorAll('.message-text');
+                            parts[parts.length - 1].insertAdjacentHTML(
+                                'afterend', '<hr class="message-separator"><span class="message-text"></span>');
+                        }
+                        break;
                     case 'agent_response':
+                        // Итоговый кадр заменяет черновик полным ответом
+                        if (streamingMessage) {
+                            streamingMessage.remove();
+                            streamingMessage = null;
+                        }
                         addMessage('agent', data.response, data.agent_name);
                         break;
                     case 'system_status':
@@ -1036,29 +1146,13 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
             message_data = json.loads(data)
             
             if message_data["type"] == "user_message":
-                # Обрабатываем сообщение пользователя
-                result = await process_user_message(
-                    message_data["message"], 
-                    user_id
-                )
+                # Обрабатываем сообщение пользователя, отправляя токены по мере генерации
+                async def send_event(event: Dict[str, Any]):
+                    await manager.send_personal_message(json.dumps(event), websocket)
                 
-                system_stats["total_messages"] += 1
-                
-                # Отправляем ответ агенту
-                response_text = ""
-                if isinstance(result["response"], dict):
-                    response_text = result["response"].get("response", str(result["response"]))
-                else:
-                    response_text = str(result["response"])
-                
-                response = {
-                    "type": "agent_response",
-                    "response": response_text,
-                    "agent_name": result.get("agent", "Unknown"),
-                    "agent_type": result.get("agent_type", "Unknown"),
-                    "timestamp": result.get("timestamp", datetime.now().isoformat())
-                }
+                response = await stream_user_message(message_data["message"], user_id, send_event)
                 
+                # Итоговый кадр с полным ответом агента
                 await manager.send_personal_message(json.dumps(response), websocket)
                 
                 # Отправляем обновленный статус системы
@@ -1086,9 +1180,47 @@ async def get_agents():
         logger.error(f"❌ Ошибка получения списка агентов: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def sse_event(event: Dict[str, Any]) -> str:
+    """Кадр Server-Sent Events"""
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+async def stream_chat_events(message: str, user_id: str):
+    """Поток SSE: кадры agent_token и agent_segment, итоговый agent_response и done"""
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(stream_user_message(message, user_id, queue.put))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    
+    try:
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield sse_event(event)
+        
+        try:
+            yield sse_event(task.result())
+        except Exception as e:
+            logger.error(f"❌ Ошибка потоковой обработки сообщения: {e}")
+            yield sse_event({"type": "error", "message": str(e)})
+        yield sse_event({"type": "done"})
+    finally:
+        # Клиент отключился: отменяем генерацию, соединение с Ollama закрывается
+        if not task.done():
+            task.cancel()
+
 @app.post("/api/chat/send")
-async def send_message(message: ChatMessage):
-    """Отправить сообщение агенту через REST API"""
+async def send_message(message: ChatMessage, request: Request, stream: bool = False):
+    """Отправить сообщение агенту через REST API
+    
+    С ?stream=true или Accept: text/event-stream ответ отдается потоком SSE.
+    """
+    if stream or "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            stream_chat_events(message.message, message.user_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
     try:
         result = await process_user_message(
             message.message, 
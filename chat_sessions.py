@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Сессии чата JARVIS
+Контекст разговора хранится отдельно для каждого пользователя, простаивающие
+сессии вытесняются (LRU). История подставляется в промпт в пределах бюджета
+токенов окна модели (num_ctx): новые реплики целиком, старые сворачиваются
+в короткую скользящую сводку
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Длина строки реплики в сводке, символов
+SUMMARY_LINE_CHARS = 120
+
+
+def estimate_tokens(text: str) -> int:
+    """Оценка числа токенов без токенизатора модели
+
+    Около четырех байт UTF-8 на токен: для латиницы это ~4 символа,
+    для кириллицы ~2 символа, что близко к словарям llama
+    """
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def format_turn(turn: Dict[str, Any]) -> str:
+    role = "Пользователь" if turn["role"] == "user" else "JARVIS"
+    return f"{role}: {turn['content']}"
+
+
+def summary_line(turn: Dict[str, Any]) -> str:
+    """Реплика в сводке: одна укороченная строка"""
+    line = format_turn(turn).replace("\n", " ")
+    if len(line) > SUMMARY_LINE_CHARS:
+        line = line[:SUMMARY_LINE_CHARS - 1] + "…"
+    return line
+
+
+class ChatSession:
+    """Контекст разговора одного пользователя"""
+
+    def __init__(self, user_id: str, max_turn_tokens: int = 4096, max_summary_tokens: int = 256):
+        self.user_id = user_id
+        self.max_turn_tokens = max_turn_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self.turns: List[Dict[str, Any]] = []
+        self.turn_tokens = 0
+        self.summary_lines: List[str] = []
+        self.summary_tokens = 0
+        self.created_at = time.time()
+        self.last_active = self.created_at
+
+    def add_turn(self, role: str, content: str):
+        """Добавление реплики; самые старые реплики сворачиваются в сводку"""
+        turn = {
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat()
+        }
+        turn["tokens"] = estimate_tokens(format_turn(turn)) + 1
+        self.turns.append(turn)
+        self.turn_tokens += turn["tokens"]
+        self.last_active = time.time()
+        while len(self.turns) > 1 and self.turn_tokens > self.max_turn_tokens:
+            oldest = self.turns.pop(0)
+            self.turn_tokens -= oldest["tokens"]
+            line = summary_line(oldest)
+            self.summary_lines.append(line)
+            self.summary_tokens += estimate_tokens(line) + 1
+        while self.summary_lines and self.summary_tokens > self.max_summary_tokens:
+            self.summary_tokens -= estimate_tokens(self.summary_lines.pop(0)) + 1
+
+    def context_window(self, budget_tokens: int) -> Tuple[str, int]:
+        """История для промпта в пределах бюджета токенов: (текст, токены)
+
+        Реплики берутся от новых к старым, пока помещаются; старые
+        реплики, не поместившиеся целиком, идут в сводку одной строкой
+        """
+        # Если история не помещается целиком, четверть бюджета отдается сводке
+        overflow = self.turn_tokens + self.summary_tokens > budget_tokens
+        summary_reserve = budget_tokens // 4 if overflow else 0
+        used = 0
+        first = len(self.turns)
+        while first > 0 and used + self.turns[first - 1]["tokens"] <= budget_tokens - summary_reserve:
+            first -= 1
+            used += self.turns[first]["tokens"]
+
+        # Самые свежие строки сводки, помещающиеся в остаток бюджета
+        candidates = self.summary_lines + [summary_line(turn) for turn in self.turns[:first]]
+        lines: List[str] = []
+        summary_used = 4
+        for line in reversed(candidates):
+            tokens = estimate_tokens(line) + 1
+            if used + summary_used + tokens > budget_tokens:
+                break
+            lines.append(line)
+            summary_used += tokens
+
+        parts = []
+        if lines:
+            parts.append("Ранее в разговоре:\n" + "\n".join(reversed(lines)))
+            used += summary_used
+        if first < len(self.turns):
+            parts.append("\n".join(format_turn(turn) for turn in self.turns[first:]))
+        return "\n".join(parts), used
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "turns": [{key: turn[key] for key in ("role", "content", "timestamp")} for turn in self.turns],
+            "summary": self.summary_lines,
+            "last_active": self.last_active
+        }
+
+
+class SessionStore:
+    """Сессии по user_id с вытеснением давно неактивных"""
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 3600.0,
+                 max_turn_tokens: int = 4096, max_summary_tokens: int = 256):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_turn_tokens = max_turn_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self.sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.stats = {"created": 0, "evicted": 0}
+
+    def get(self, user_id: str) -> ChatSession:
+        """Сессия пользователя; создается при первом обращении"""
+        session = self.sessions.get(user_id)
+        if session is not None:
+            self.sessions.move_to_end(user_id)
+            session.last_active = time.time()
+            return session
+
+        self.evict_idle()
+        session = self.sessions[user_id] = ChatSession(user_id, self.max_turn_tokens, self.max_summary_tokens)
+        self.stats["created"] += 1
+        while len(self.sessions) > self.max_sessions:
+            evicted_id, _ = self.sessions.popitem(last=False)
+            self.stats["evicted"] += 1
+            logger.debug(f"Сессия {evicted_id} вытеснена")
+        return session
+
+    def peek(self, user_id: str) -> Optional[ChatSession]:
+        """Сессия без создания и без изменения порядка вытеснения"""
+        return self.sessions.get(user_id)
+
+    def evict_idle(self) -> int:
+        """Удаление сессий, неактивных дольше idle_ttl"""
+        cutoff = time.time() - self.idle_ttl
+        evicted = 0
+        # Сессии упорядочены по последнему обращению: давние в начале
+        while self.sessions:
+            user_id, session = next(iter(self.sessions.items()))
+            if session.last_active >= cutoff:
+                break
+            del self.sessions[user_id]
+            evicted += 1
+        self.stats["evicted"] += evicted
+        return evicted
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "active_sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "idle_ttl": self.idle_ttl
+        }
@@ -11,7 +11,6 @@ import os
 import signal
 import sys
 import time
-import subprocess
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any, Optional
@@ -21,6 +20,7 @@ import schedule
 from integrated_agent_system import integrated_system
 from ai_engine import ai_engine
 from ai_manager_agent import ai_manager
+from system_metrics import get_system_sampler
 
 # Настройка логирования
 logging.basicConfig(
@@ -357,7 +357,8 @@ class CloudAgentSystem:
                 "startup_time": self.startup_time.isoformat() if self.startup_time else None,
                 "last_health_check": self.last_health_check.isoformat() if self.last_health_check else None,
                 "system_status": integrated_system.get_system_status(),
-                "ai_status": ai_engine.get_status()
+                # Обновляем проверку AI движка; поток мониторинга читает кэш
+                "ai_status": await ai_engine.refresh_status()
             }
             
             with open(self.system_state_file, 'w', encoding='utf-8') as f:
@@ -402,32 +403,11 @@ class CloudAgentSystem:
     
     def _get_memory_usage(self) -> float:
         """Получить использование памяти"""
-        try:
-            result = subprocess.run(['free', '-m'], capture_output=True, text=True)
-            if result.returncode == 0:
-                lines = result.stdout.split('\n')
-                mem_line = lines[1].split()
-                used = int(mem_line[2])
-                total = int(mem_line[1])
-                return (used / total) * 100
-        except:
-            pass
-        return 0.0
+        return get_system_sampler().latest().memory_percent
     
     def _get_disk_usage(self) -> float:
         """Получить использование диска"""
-        try:
-            result = subprocess.run(['df', '-h', '/'], capture_output=True, text=True)
-            if result.returncode == 0:
-                lines = result.stdout.split('\n')
-                if len(lines) > 1:
-                    parts = lines[1].split()
-                    if len(parts) > 4:
-                        usage = parts[4].replace('%', '')
-                        return float(usage)
-        except:
-            pass
-        return 0.0
+        return get_system_sampler().latest().disk_percent
     
     def get_status(self) -> Dict[str, Any]:
         """Получить статус облачной системы"""
@@ -236,7 +236,7 @@ class FinalAISystem:
             logger.info("🚀 Запуск финальной AI системы...")
             
             # Проверяем AI движок
-            ai_status = ai_engine.get_status()
+            ai_status = await ai_engine.refresh_status()
             if ai_status.get("default_engine") == "none":
                 logger.error("❌ AI движок недоступен")
                 return
@@ -352,7 +352,7 @@ class FinalAISystem:
         """Проверка здоровья системы"""
         try:
             # Проверяем AI движок
-            ai_status = ai_engine.get_status()
+            ai_status = await ai_engine.refresh_status()
             ai_healthy = ai_status.get("default_engine") != "none"
             
             if ai_healthy:
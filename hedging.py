@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Страховочные (hedged) запросы к моделям
+Если основной запрос не выдал первый токен за время, взятое из p95
+прошлых задержек первого токена, запускается запрос к следующей модели.
+Побеждает первый успешный ответ, остальные запросы отменяются (для Ollama
+отмена разрывает HTTP соединение и генерация прекращается). Число
+страховочных запросов ограничено долей от числа обычных
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Попытка получает событие, которое она устанавливает на первом токене,
+# и возвращает результат или None при неудаче
+Attempt = Callable[[asyncio.Event], Awaitable[Any]]
+
+
+class HedgeBudget:
+    """Бюджет страховочных запросов: не больше ratio от числа обычных
+
+    Каждый запрос добавляет ratio жетона, страховочный запрос тратит
+    один; запас ограничен burst, чтобы простой не копил лишних запросов
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = 0.0
+
+    def deposit(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class Hedger:
+    """Запуск попыток со страховкой по задержке первого токена"""
+
+    def __init__(self, budget_ratio: float = 0.1, quantile: float = 0.95, default_delay: float = 2.0,
+                 min_delay: float = 0.05, max_delay: float = 30.0, window: int = 200, min_samples: int = 20):
+        self.budget = HedgeBudget(budget_ratio)
+        self.quantile = quantile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.min_samples = min_samples
+        # Задержки первого токена по моделям, секунды
+        self.first_token: Dict[str, Deque[float]] = {}
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0, "cancelled": 0,
+                      "censored": 0}
+
+    def record_first_token(self, key: str, seconds: float):
+        samples = self.first_token.get(key)
+        if samples is None:
+            samples = self.first_token[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def record_censored(self, key: str, seconds: float):
+        """Отмененная попытка без первого токена: ожидание - нижняя граница задержки
+
+        Без таких замеров квантиль строится только по быстрым попыткам
+        и задержка страховки постепенно сокращается. Учитывается только
+        ожидание дольше текущей задержки: меньшее о хвосте ничего не говорит
+        """
+        if seconds >= self.hedge_delay(key):
+            self.record_first_token(key, seconds)
+            self.stats["censored"] += 1
+
+    def hedge_delay(self, key: str) -> float:
+        """Задержка перед страховочным запросом: p95 первого токена модели"""
+        samples = self.first_token.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return self.default_delay
+        ordered = sorted(samples)
+        value = ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))]
+        return min(self.max_delay, max(self.min_delay, value))
+
+    async def run(self, attempts: List[Tuple[str, Attempt]],
+                  is_success: Callable[[Any], bool] = None) -> Any:
+        """Выполнить попытки [(модель, попытка)] по порядку со страховкой
+
+        Следующая попытка запускается сразу, если текущие завершились
+        неудачей, или после задержки hedge_delay без первого токена, если
+        позволяет бюджет. Возвращает первый успешный результат или None
+        """
+        is_success = is_success or (lambda result: result is not None)
+        loop = asyncio.get_running_loop()
+        self.stats["requests"] += 1
+        self.budget.deposit()
+
+        # (задача, модель, событие первого токена, ожидание события, время запуска, запущена как страховка)
+        launched: List[Tuple[asyncio.Task, str, asyncio.Event, asyncio.Task, float, bool]] = []
+        next_index = 0
+        hedging_allowed = True
+
+        def launch(hedge: bool):
+            nonlocal next_index
+            key, attempt = attempts[next_index]
+            next_index += 1
+            started = asyncio.Event()
+            start_time = loop.time()
+            task = asyncio.ensure_future(attempt(started))
+            watcher = asyncio.ensure_future(started.wait())
+            watcher.add_done_callback(
+                lambda w: None if w.cancelled() else self.record_first_token(key, loop.time() - start_time))
+            launched.append((task, key, started, watcher, start_time, hedge))
+
+        launch(hedge=False)
+        try:
+            while True:
+                for task, key, _, _, _, hedge in launched:
+                    if task.done() and not task.cancelled() and task.exception() is None \
+                            and is_success(task.result()):
+                        if hedge:
+                            self.stats["hedge_wins"] += 1
+                            logger.info(f"🏁 Страховочный запрос к {key} ответил первым")
+                        return task.result()
+
+                active = [entry for entry in launched if not entry[0].done()]
+                if not active:
+                    if next_index < len(attempts):
+                        launch(hedge=False)
+                        continue
+                    return None
+
+                wait_for = {entry[0] for entry in active}
+                timeout = None
+                newest_task, newest_key, newest_started, newest_watcher, newest_start, _ = launched[-1]
+                if hedging_allowed and next_index < len(attempts) and not newest_task.done() \
+                        and not newest_started.is_set():
+                    timeout = max(0.0, self.hedge_delay(newest_key) - (loop.time() - newest_start))
+                    wait_for.add(newest_watcher)
+
+                done, _ = await asyncio.wait(wait_for, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Первый токен не пришел вовремя
+                    if self.budget.withdraw():
+                        self.stats["hedged"] += 1
+                        launch(hedge=True)
+                    else:
+                        self.stats["budget_denied"] += 1
+                        hedging_allowed = False
+        finally:
+            for task, key, started, watcher, start_time, _ in launched:
+                if not task.done():
+                    task.cancel()
+                    self.stats["cancelled"] += 1
+                    if not started.is_set():
+                        self.record_censored(key, loop.time() - start_time)
+                if not watcher.done():
+                    watcher.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "budget_tokens": self.budget.tokens,
+            "hedge_ratio": self.stats["hedged"] / self.stats["requests"] if self.stats["requests"] else 0.0,
+            "delays": {key: self.hedge_delay(key) for key in self.first_token}
+        }
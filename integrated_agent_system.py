@@ -32,7 +32,10 @@ from agent_coordinator import (
 from chat_server import app, manager, system_stats
 from enhanced_agents import EnhancedCodeDeveloperAgent, EnhancedDataAnalystAgent
 from ai_manager_agent import AIManagerAgent
+from model_residency import get_residency_manager
 from ai_engine import ai_engine
+from knowledge_store import KnowledgeStore, DEFAULT_KNOWLEDGE_DIR
+from intent_router import get_intent_router
 
 # Настройка логирования
 logging.basicConfig(
@@ -53,6 +56,7 @@ class IntegratedAgentSystem:
         self.shared_memory = None
         self.multi_agent_system = None
         self.coordinator = None
+        self.knowledge_store = None
         self.startup_time = None
         
         # Создаем директории
@@ -537,53 +541,36 @@ class IntegratedAgentSystem:
             logger.error(f"❌ Ошибка создания дополнительных агентов: {e}")
     
     async def _load_saved_knowledge(self):
-        """Загрузка сохраненных знаний"""
+        """Загрузка сохраненных знаний (снимок + журнал изменений)"""
         try:
-            knowledge_file = Path("/home/mentor/agent_knowledge/saved_knowledge.json")
+            knowledge_store = KnowledgeStore(DEFAULT_KNOWLEDGE_DIR)
+            state = await asyncio.to_thread(knowledge_store.load)
             
-            if knowledge_file.exists():
-                with open(knowledge_file, 'r', encoding='utf-8') as f:
-                    saved_knowledge = json.load(f)
-                
-                # Восстанавливаем знания
-                for key, items in saved_knowledge.get("knowledge_base", {}).items():
-                    for item in items:
-                        self.shared_memory.store_knowledge(
-                            key, item["value"], item["agent_id"], 
-                            item.get("keywords", []), item.get("metadata", {})
-                        )
-                
-                logger.info(f"✅ Загружено {len(saved_knowledge.get('knowledge_base', {}))} знаний")
+            if state is not None:
+                # Массовая загрузка без повтора store_knowledge для каждого элемента
+                self.shared_memory.load_state(state)
+                logger.info(f"✅ Загружено {len(state['knowledge_base'])} знаний")
             else:
-                logger.info("📝 Файл сохраненных знаний не найден, создаем новый")
+                logger.info("📝 Сохраненные знания не найдены, создаем новые")
+            
+            # С этого момента изменения памяти пишутся в журнал; при ошибке чтения
+            # хранилище не подключается, чтобы не перезаписать снимок пустым состоянием
+            self.knowledge_store = knowledge_store
+            self.shared_memory.attach_journal(knowledge_store)
                 
         except Exception as e:
             logger.error(f"❌ Ошибка загрузки сохраненных знаний: {e}")
     
     async def save_knowledge(self):
-        """Сохранение знаний"""
+        """Сохранение знаний: дозапись журнала, при его росте - новый снимок"""
+        if not self.knowledge_store:
+            return
         try:
-            knowledge_file = Path("/home/mentor/agent_knowledge/saved_knowledge.json")
-            
-            # Сохраняем знания
-            saved_data = {
-                "knowledge_base": self.shared_memory.knowledge_base,
-                "conversation_history": list(self.shared_memory.conversation_history),
-                "agent_capabilities": {
-                    agent_id: {
-                        "skills": cap.skills,
-                        "performance_score": cap.performance_score,
-                        "specialization_areas": cap.specialization_areas
-                    }
-                    for agent_id, cap in self.shared_memory.agent_capabilities.items()
-                },
-                "saved_at": datetime.now().isoformat()
-            }
+            result = await asyncio.to_thread(self.knowledge_store.save, self.shared_memory.export_state)
             
-            with open(knowledge_file, 'w', encoding='utf-8') as f:
-                json.dump(saved_data, f, ensure_ascii=False, indent=2)
-            
-            logger.info("💾 Знания сохранены")
+            if result["wal_bytes"] or result["snapshot_bytes"]:
+                logger.info(f"💾 Знания сохранены: журнал +{result['wal_bytes']} байт, "
+                            f"снимок {result['snapshot_bytes']} байт")
             
         except Exception as e:
             logger.error(f"❌ Ошибка сохранения знаний: {e}")
@@ -614,13 +601,7 @@ class IntegratedAgentSystem:
     
     def _is_complex_task(self, message: str) -> bool:
         """Определение сложности задачи"""
-        complex_keywords = [
-            "создать проект", "разработать приложение", "создать систему",
-            "комплексное решение", "многоэтапная задача", "большой проект"
-        ]
-        
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in complex_keywords)
+        return get_intent_router().best(message, "complex_task") is not None
     
     async def _create_coordination_task(self, message: str, user_id: str):
         """Создание задачи координации"""
@@ -644,22 +625,9 @@ class IntegratedAgentSystem:
     
     def _extract_required_skills(self, message: str) -> List[str]:
         """Извлечение необходимых навыков из сообщения"""
-        skills_mapping = {
-            "код": ["code_generation", "debugging"],
-            "разработка": ["code_generation", "architecture_design"],
-            "анализ": ["data_analysis", "reporting"],
-            "данные": ["data_analysis", "visualization"],
-            "дизайн": ["ui_design", "ux_design"],
-            "тестирование": ["unit_testing", "integration_testing"],
-            "проект": ["project_planning", "task_management"]
-        }
-        
-        message_lower = message.lower()
         required_skills = []
-        
-        for keyword, skills in skills_mapping.items():
-            if keyword in message_lower:
-                required_skills.extend(skills)
+        for match in get_intent_router().match(message, "skills"):
+            required_skills.extend(match.data.get("skills", []))
         
         return list(set(required_skills)) if required_skills else ["general_help"]
     
@@ -721,6 +689,9 @@ class IntegratedAgentSystem:
             # Настраиваем периодическое сохранение знаний
             asyncio.create_task(self._periodic_save())
             
+            # Горячие модели Ollama заранее в памяти, холодные выгружаются
+            asyncio.create_task(self._periodic_model_residency())
+            
             logger.info("✅ Интегрированная система агентов запущена")
             
         except Exception as e:
@@ -757,6 +728,16 @@ class IntegratedAgentSystem:
             except Exception as e:
                 logger.error(f"❌ Ошибка периодического сохранения: {e}")
 
+    async def _periodic_model_residency(self):
+        """Периодическая загрузка горячих и выгрузка холодных моделей"""
+        while self.running:
+            try:
+                await asyncio.sleep(120)
+                if self.running:
+                    await get_residency_manager().rebalance()
+            except Exception as e:
+                logger.error(f"❌ Ошибка управления памятью моделей: {e}")
+
 # Глобальный экземпляр системы (создается лениво)
 integrated_system = None
 
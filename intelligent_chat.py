@@ -3,39 +3,27 @@
 Интеллектуальный чат JARVIS с настоящим AI
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
 import json
 import time
 import asyncio
-import subprocess
 import os
+import re
+import secrets
 import logging
 from datetime import datetime
 from typing import Optional, Dict, Any
 
-logger = logging.getLogger(__name__)
-
-class ChatMessage(BaseModel):
-    message: str
-    user_id: str = "anonymous"
-    context: Optional[str] = None
+from ollama_client import get_ollama_client
+from intent_router import get_intent_router
+from chat_sessions import SessionStore, estimate_tokens
+from hedging import Hedger
 
-app = FastAPI(title="JARVIS Intelligent Chat")
+logger = logging.getLogger(__name__)
 
-class IntelligentChat:
-    def __init__(self):
-        self.conversation_history = []
-        self.max_history = 10
-        self.ai_models = ["llama3.1:8b", "llama2:latest"]
-        self.current_model = self.ai_models[0]
-        
-    def get_ai_response(self, message: str, context: str = "") -> str:
-        """Получение интеллектуального ответа от AI"""
-        try:
-            # Формируем контекст для AI
-            system_prompt = f"""Ты JARVIS - автономная AI-система с продвинутыми возможностями. 
+SYSTEM_PROMPT = """Ты JARVIS - автономная AI-система с продвинутыми возможностями. 
 Твои основные функции:
 - Анализ данных и генерация отчетов
 - Самоулучшение и оптимизация кода
@@ -47,21 +35,85 @@ class IntelligentChat:
 Отвечай на русском языке, будь полезным и конкретным. 
 Если пользователь просит что-то выполнить - предложи конкретные действия.
 Если это вопрос о системе - дай детальный ответ.
-Если это творческая задача - прояви креативность.
+Если это творческая задача - прояви креативность."""
+
+PROMPT_TEMPLATE = SYSTEM_PROMPT + """
 
 Контекст: {context}
-История разговора: {self.get_recent_history()}
-"""
-            
-            user_prompt = f"Пользователь: {message}"
-            
+История разговора: {history}
+
+Пользователь: {message}
+
+JARVIS:"""
+
+# Сессия чата определяется cookie, выданной сервером: user_id из запроса
+# не проверяется и не дает доступа к чужой истории
+SESSION_COOKIE = "jarvis_session"
+SESSION_COOKIE_MAX_AGE = 30 * 24 * 3600
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{22,64}$")
+
+class ChatMessage(BaseModel):
+    message: str
+    # Подпись пользователя в ответе; история привязана к cookie сессии
+    user_id: str = "anonymous"
+    context: Optional[str] = None
+
+def chat_session_id(request: Request, response: Response) -> str:
+    """Идентификатор сессии браузера; новый выдается в cookie"""
+    session_id = request.cookies.get(SESSION_COOKIE)
+    if session_id and _SESSION_ID_RE.match(session_id):
+        return session_id
+    session_id = secrets.token_urlsafe(24)
+    response.set_cookie(SESSION_COOKIE, session_id, max_age=SESSION_COOKIE_MAX_AGE,
+                        httponly=True, samesite="lax")
+    return session_id
+
+app = FastAPI(title="JARVIS Intelligent Chat")
+
+class IntelligentChat:
+    def __init__(self):
+        self.ai_models = ["llama3.1:8b", "llama2:latest"]
+        self.current_model = self.ai_models[0]
+        self.ollama = get_ollama_client()
+        # Окно контекста модели и резерв токенов под ответ
+        self.num_ctx = 2048
+        self.response_tokens = 512
+        self.sessions = SessionStore(max_sessions=1000, idle_ttl=3600, max_turn_tokens=self.num_ctx)
+        self.prompt_stats = {"prompts": 0, "prompt_tokens": 0}
+        # Страховочные запросы к следующей модели, если первый токен задерживается;
+        # включаются явно, доля дополнительной нагрузки - JARVIS_HEDGE_BUDGET
+        self.hedging_enabled = os.getenv("JARVIS_HEDGE_REQUESTS", "").lower() in ("1", "true", "yes")
+        self.hedger = Hedger(budget_ratio=float(os.getenv("JARVIS_HEDGE_BUDGET", "0.1")))
+        
+    def build_prompt(self, message: str, context: str = "", user_id: str = "anonymous") -> str:
+        """Промпт с историей сессии пользователя в пределах окна модели"""
+        fixed_tokens = estimate_tokens(PROMPT_TEMPLATE.format(context=context, history="", message=message))
+        budget = max(0, self.num_ctx - self.response_tokens - fixed_tokens)
+        
+        session = self.sessions.get(user_id)
+        history, history_tokens = session.context_window(budget)
+        
+        self.prompt_stats["prompts"] += 1
+        self.prompt_stats["prompt_tokens"] += fixed_tokens + history_tokens
+        return PROMPT_TEMPLATE.format(context=context, history=history or "Новый разговор", message=message)
+    
+    async def get_ai_response(self, message: str, context: str = "", user_id: str = "anonymous") -> str:
+        """Получение интеллектуального ответа от AI"""
+        try:
             # Формируем полный промпт
-            full_prompt = f"{system_prompt}\n\n{user_prompt}\n\nJARVIS:"
+            full_prompt = self.build_prompt(message, context, user_id)
+            
+            if self.hedging_enabled:
+                response = await self.hedger.run(
+                    [(model, self._stream_attempt(model, full_prompt)) for model in self.ai_models],
+                    is_success=lambda text: bool(text) and len(text) > 10
+                )
+                return response or self.get_fallback_response(message)
             
             # Пробуем разные модели
             for model in self.ai_models:
                 try:
-                    response = self.call_ollama(model, full_prompt)
+                    response = await self.call_ollama(model, full_prompt)
                     if response and len(response.strip()) > 10:
                         return response.strip()
                 except Exception as e:
@@ -75,54 +127,59 @@ class IntelligentChat:
             logger.error(f"Ошибка получения AI ответа: {e}")
             return "Извините, произошла ошибка при обработке запроса. Попробуйте еще раз."
     
-    def call_ollama(self, model: str, prompt: str) -> Optional[str]:
+    async def call_ollama(self, model: str, prompt: str) -> Optional[str]:
         """Вызов Ollama API"""
         try:
-            # Используем ollama run для получения ответа
-            result = subprocess.run([
-                'ollama', 'run', model, prompt
-            ], capture_output=True, text=True, timeout=120)
+            result = await self.ollama.generate(model, prompt, options={"num_ctx": self.num_ctx}, timeout=120)
+            return self.clean_response(result.get("response", ""))
             
-            if result.returncode == 0 and result.stdout.strip():
-                response = result.stdout.strip()
-                
-                # Очищаем ответ от лишних частей и escape-последовательностей
-                response = response.replace('\x1b[?2026h', '').replace('\x1b[?25l', '')
-                response = response.replace('\x1b[?2026l', '').replace('\x1b[?25h', '')
-                response = response.replace('\x1b[1G', '').replace('\x1b[K', '')
-                response = response.replace('\x1b[2K', '').replace('\x1b[?25l', '')
-                response = response.replace('\x1b[?25h', '')
-                
-                # Убираем анимационные символы
-                import re
-                response = re.sub(r'[\u2800-\u28FF]', '', response)  # Braille patterns
-                response = re.sub(r'[⠁-⠿]', '', response)  # Braille characters
-                
-                # Очищаем от лишних частей
-                if "JARVIS:" in response:
-                    response = response.split("JARVIS:")[-1].strip()
-                if "User:" in response:
-                    response = response.split("User:")[0].strip()
-                
-                # Убираем лишние пробелы и переносы
-                response = '\n'.join(line.strip() for line in response.split('\n') if line.strip())
-                
-                return response if response else None
+        except asyncio.TimeoutError:
+            logger.warning(f"Таймаут для модели {model}")
+        except Exception as e:
+            logger.error(f"Ошибка вызова Ollama: {e}")
+        
+        return None
+    
+    async def stream_ollama(self, model: str, prompt: str, started: asyncio.Event) -> Optional[str]:
+        """Потоковый вызов Ollama; started отмечает первый токен для страховки"""
+        try:
+            parts = []
+            async for chunk in self.ollama.generate_stream(model, prompt, options={"num_ctx": self.num_ctx},
+                                                           timeout=120):
+                text = chunk.get("response", "")
+                if text:
+                    started.set()
+                    parts.append(text)
+            return self.clean_response("".join(parts))
             
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             logger.warning(f"Таймаут для модели {model}")
-        except FileNotFoundError:
-            logger.error("Ollama не найден")
         except Exception as e:
             logger.error(f"Ошибка вызова Ollama: {e}")
         
         return None
     
+    def _stream_attempt(self, model: str, prompt: str):
+        return lambda started: self.stream_ollama(model, prompt, started)
+    
+    def clean_response(self, response: str) -> Optional[str]:
+        """Очистка ответа модели от лишних частей промпта"""
+        response = response.strip()
+        if "JARVIS:" in response:
+            response = response.split("JARVIS:")[-1].strip()
+        if "User:" in response:
+            response = response.split("User:")[0].strip()
+        
+        # Убираем лишние пробелы и переносы
+        response = '\n'.join(line.strip() for line in response.split('\n') if line.strip())
+        
+        return response if response else None
+    
     def get_fallback_response(self, message: str) -> str:
         """Резервные ответы для критических функций"""
-        message_lower = message.lower().strip()
+        intent = get_intent_router().best(message, "chat_fallback")
         
-        if any(word in message_lower for word in ["статус", "состояние", "как дела"]):
+        if intent == "status":
             return """Система JARVIS работает стабильно:
 • Все модули активны
 • Производительность в норме
@@ -131,7 +188,7 @@ class IntelligentChat:
 
 Что конкретно вас интересует?"""
         
-        elif any(word in message_lower for word in ["анализ", "данные", "отчет"]):
+        elif intent == "data_analysis":
             return """Запускаю анализ данных:
 • Подключаюсь к источникам данных
 • Обрабатываю информацию
@@ -140,7 +197,7 @@ class IntelligentChat:
 
 Результаты будут готовы через несколько минут."""
         
-        elif any(word in message_lower for word in ["код", "программирование", "разработка"]):
+        elif intent == "code":
             return """Готов помочь с программированием:
 • Python, JavaScript, HTML/CSS
 • API разработка
@@ -149,7 +206,7 @@ class IntelligentChat:
 
 Опишите задачу подробнее - создам код для вас."""
         
-        elif any(word in message_lower for word in ["помощь", "help", "что умеешь"]):
+        elif intent == "help":
             return """Я JARVIS - интеллектуальная AI-система:
 
 🧠 ИНТЕЛЛЕКТУАЛЬНЫЕ ВОЗМОЖНОСТИ:
@@ -177,49 +234,27 @@ class IntelligentChat:
 
 Я всегда готов помочь!"""
     
-    def get_recent_history(self) -> str:
-        """Получение последних сообщений для контекста"""
-        if len(self.conversation_history) <= 2:
-            return "Новый разговор"
-        
-        recent = self.conversation_history[-4:]  # Последние 4 сообщения
-        history_text = []
-        for msg in recent:
-            role = "Пользователь" if msg["role"] == "user" else "JARVIS"
-            history_text.append(f"{role}: {msg['content']}")
-        
-        return "\n".join(history_text)
+    def add_to_history(self, role: str, content: str, user_id: str = "anonymous"):
+        """Добавление сообщения в историю сессии пользователя"""
+        self.sessions.get(user_id).add_turn(role, content)
     
-    def add_to_history(self, role: str, content: str):
-        """Добавление сообщения в историю"""
-        self.conversation_history.append({
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # Ограничиваем историю
-        if len(self.conversation_history) > self.max_history:
-            self.conversation_history = self.conversation_history[-self.max_history:]
-    
-    def get_system_status(self) -> Dict[str, Any]:
+    async def get_system_status(self) -> Dict[str, Any]:
         """Получение статуса системы"""
         try:
             # Проверяем доступность AI моделей
-            available_models = []
-            for model in self.ai_models:
-                try:
-                    result = subprocess.run(['ollama', 'list'], capture_output=True, text=True, timeout=10)
-                    if model in result.stdout:
-                        available_models.append(model)
-                except:
-                    continue
+            try:
+                installed_models = await self.ollama.list_models()
+            except Exception:
+                installed_models = []
+            available_models = [model for model in self.ai_models if model in installed_models]
             
             return {
                 "ai_active": True,
                 "available_models": available_models,
                 "current_model": self.current_model,
-                "conversation_length": len(self.conversation_history),
+                "sessions": self.sessions.get_stats(),
+                "avg_prompt_tokens": self.prompt_stats["prompt_tokens"] / max(1, self.prompt_stats["prompts"]),
+                "hedging": {"enabled": self.hedging_enabled, **self.hedger.get_stats()},
                 "intelligence_level": "high" if available_models else "basic"
             }
         except Exception as e:
@@ -234,7 +269,7 @@ class IntelligentChat:
 intelligent_chat = IntelligentChat()
 
 @app.get("/")
-async def chat_interface():
+async def chat_interface(request: Request):
     """Интеллектуальный интерфейс чата"""
     html_content = """
 <!DOCTYPE html>
@@ -518,8 +553,7 @@ async def chat_interface():
                         'Content-Type': 'application/json',
                     },
                     body: JSON.stringify({
-                        message: message,
-                        user_id: 'web_user'
+                        message: message
                     })
                 });
                 
@@ -616,30 +650,32 @@ async def chat_interface():
 </body>
 </html>
     """
-    return HTMLResponse(html_content)
+    page = HTMLResponse(html_content)
+    # Браузер получает свою сессию сразу при открытии страницы
+    chat_session_id(request, page)
+    return page
 
 @app.post("/api/chat/send")
-async def send_message(message: ChatMessage):
+async def send_message(message: ChatMessage, request: Request, http_response: Response):
     """Отправка сообщения в интеллектуальный чат JARVIS"""
     try:
         if not message.message.strip():
             raise HTTPException(status_code=400, detail="Сообщение не может быть пустым")
+        session_id = chat_session_id(request, http_response)
         
-        # Добавляем в историю
-        intelligent_chat.add_to_history("user", message.message)
-        
-        # Получаем интеллектуальный ответ
-        response = intelligent_chat.get_ai_response(message.message, message.context or "")
+        # Получаем интеллектуальный ответ с историей сессии браузера
+        response = await intelligent_chat.get_ai_response(message.message, message.context or "", session_id)
         
-        # Добавляем ответ в историю
-        intelligent_chat.add_to_history("assistant", response)
+        # Добавляем реплики в историю сессии
+        intelligent_chat.add_to_history("user", message.message, session_id)
+        intelligent_chat.add_to_history("assistant", response, session_id)
         
         return {
             "message": response,
             "timestamp": datetime.now().isoformat(),
             "user_id": message.user_id,
             "original_message": message.message,
-            "intelligence_level": intelligent_chat.get_system_status().get("intelligence_level", "basic")
+            "intelligence_level": (await intelligent_chat.get_system_status()).get("intelligence_level", "basic")
         }
                     
     except Exception as e:
@@ -649,21 +685,27 @@ async def send_message(message: ChatMessage):
 @app.get("/api/chat/status")
 async def chat_status():
     """Статус интеллектуального чата"""
-    status = intelligent_chat.get_system_status()
+    status = await intelligent_chat.get_system_status()
     status.update({
         "chat_active": True,
         "websocket_active": False,
-        "conversation_length": len(intelligent_chat.conversation_history),
+        "active_sessions": len(intelligent_chat.sessions),
         "timestamp": datetime.now().isoformat()
     })
     return status
 
 @app.get("/api/chat/history")
-async def chat_history():
-    """История разговора"""
+async def chat_history(request: Request):
+    """История разговора текущей сессии браузера"""
+    session_id = request.cookies.get(SESSION_COOKIE)
+    session = intelligent_chat.sessions.peek(session_id) if session_id else None
+    if session is None:
+        return {"history": [], "summary": [], "length": 0}
+    data = session.to_dict()
     return {
-        "history": intelligent_chat.conversation_history,
-        "length": len(intelligent_chat.conversation_history)
+        "history": data["turns"],
+        "summary": data["summary"],
+        "length": len(data["turns"])
     }
 
 if __name__ == "__main__":
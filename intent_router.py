@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Маршрутизатор намерений JARVIS
+Все ключевые слова всех наборов правил собраны в одно регулярное
+выражение: сообщение просматривается один раз, а результат для
+всех наборов (ответы ядра, выбор агента, резервные ответы чата,
+категории задач, навыки) кешируется. Правила можно переопределить
+JSON файлом, изменения подхватываются без перезапуска
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_FILE = os.getenv("JARVIS_INTENT_RULES", "/home/mentor/jarvis_data/intent_rules.json")
+
+# Наборы правил: порядок правил - приоритет (как в прежних цепочках if/elif).
+# keywords - подстрока сообщения, words - слово или фраза целиком,
+# patterns - регулярные выражения, data - данные для вызывающего кода
+DEFAULT_RULES: Dict[str, List[Dict[str, Any]]] = {
+    "jarvis": [
+        {"intent": "greeting", "keywords": ["привет", "здравствуй", "добро пожаловать"], "words": ["hello", "hi"]},
+        {"intent": "status", "keywords": ["статус", "как дела", "состояние", "статус системы"]},
+        {"intent": "tasks", "keywords": ["задачи", "список задач", "активные задачи"]},
+        {"intent": "data_analysis", "keywords": ["анализ", "проанализируй", "данные", "анализ данных"]},
+        {"intent": "self_improvement", "keywords": ["улучшение", "оптимизация", "самоулучшение", "улучши"]},
+        {"intent": "replication", "keywords": ["репликация", "копирование", "создать копию", "самовоспроизводство"]},
+        {"intent": "help", "keywords": ["помощь", "help", "что умеешь", "возможности"]},
+        {"intent": "thanks", "keywords": ["спасибо", "благодарю", "thanks", "отлично"]},
+        {"intent": "time", "keywords": ["время", "который час"], "words": ["time"]},
+        {"intent": "performance", "keywords": ["производительность", "скорость", "быстро", "медленно"]},
+        {"intent": "code_generation",
+         "keywords": ["создай код", "напиши код", "генерируй код", "код для", "функция", "класс"]}
+    ],
+    # Вопросы о живом состоянии системы, на которые ядро отвечает без модели:
+    # сообщение целиком должно быть таким вопросом, иначе оно уходит в модель
+    "jarvis_local": [
+        {"intent": "status", "patterns": [
+            r"^(?:(?:джарвис|jarvis)[,\s]+)?(?:покажи\s+|какой\s+|каков\s+)?(?:статус|состояние)(?:\s+системы)?\s*[?!.]*$",
+            r"^(?:(?:джарвис|jarvis)[,\s]+)?как\s+(?:дела|ты|система)\s*[?!.]*$",
+            r"^(?:system\s+)?status\s*[?!.]*$"
+        ]},
+        {"intent": "tasks", "patterns": [
+            r"^(?:(?:джарвис|jarvis)[,\s]+)?(?:покажи\s+|какие\s+)?(?:список\s+)?(?:активные\s+|текущие\s+)?задачи\s*[?!.]*$",
+            r"^(?:(?:джарвис|jarvis)[,\s]+)?(?:покажи\s+)?список\s+задач\s*[?!.]*$",
+            r"^(?:(?:джарвис|jarvis)[,\s]+)?сколько\s+(?:сейчас\s+)?(?:активных\s+|выполненных\s+|завершенных\s+)?задач"
+            r"(?:\s+в\s+очереди)?\s*[?!.]*$"
+        ]},
+        {"intent": "time", "patterns": [
+            r"^(?:(?:джарвис|jarvis)[,\s]+)?(?:который\s+час|сколько\s+(?:сейчас\s+)?времени)\s*[?!.]*$",
+            r"^(?:(?:джарвис|jarvis)[,\s]+)?(?:текущее\s+|точное\s+)?время\s*[?!.]*$",
+            r"^what\s+time\s+is\s+it\s*[?!.]*$"
+        ]},
+        {"intent": "performance", "patterns": [
+            r"^(?:(?:джарвис|jarvis)[,\s]+)?(?:какая\s+|покажи\s+)?(?:производительность|скорость)"
+            r"(?:\s+(?:системы|работы))?\s*[?!.]*$"
+        ]}
+    ],
+    "agent": [
+        {"intent": "code_developer", "keywords": ["код", "программирование", "разработка", "debug", "ошибка"]},
+        {"intent": "data_analyst", "keywords": ["анализ", "данные", "отчет", "график", "статистика"]},
+        {"intent": "project_manager", "keywords": ["проект", "план", "задача", "управление", "координация"]}
+    ],
+    "chat_fallback": [
+        {"intent": "status", "keywords": ["статус", "состояние", "как дела"]},
+        {"intent": "data_analysis", "keywords": ["анализ", "данные", "отчет"]},
+        {"intent": "code", "keywords": ["код", "программирование", "разработка"]},
+        {"intent": "help", "keywords": ["помощь", "help", "что умеешь"]}
+    ],
+    "task_category": [
+        {"intent": "text_processing",
+         "words": ["напиши", "создай текст", "обработай текст", "анализ текста", "редактирование",
+                   "статья", "документ", "сообщение", "письмо", "отчет"]},
+        {"intent": "code_generation",
+         "words": ["код", "программа", "функция", "алгоритм", "скрипт", "класс",
+                   "python", "javascript", "java", "sql", "html", "css",
+                   "разработай", "создай код", "напиши программу"]},
+        {"intent": "data_analysis",
+         "words": ["анализ данных", "статистика", "график", "диаграмма", "отчет",
+                   "excel", "csv", "json", "база данных", "таблица"]},
+        {"intent": "creative",
+         "words": ["творческий", "креативный", "история", "стихотворение", "рассказ",
+                   "придумай", "сочини", "воображение"]},
+        {"intent": "research",
+         "words": ["исследование", "поиск информации", "изучение", "анализ",
+                   "найди", "узнай", "выясни", "изучи"]},
+        {"intent": "translation", "words": ["переведи", "перевод", "язык", "английский", "русский"]},
+        {"intent": "summarization", "words": ["краткое", "резюме", "суть", "сократи", "извлеки главное"]}
+    ],
+    "skills": [
+        {"intent": "code", "keywords": ["код"], "data": {"skills": ["code_generation", "debugging"]}},
+        {"intent": "development", "keywords": ["разработка"],
+         "data": {"skills": ["code_generation", "architecture_design"]}},
+        {"intent": "analysis", "keywords": ["анализ"], "data": {"skills": ["data_analysis", "reporting"]}},
+        {"intent": "data", "keywords": ["данные"], "data": {"skills": ["data_analysis", "visualization"]}},
+        {"intent": "design", "keywords": ["дизайн"], "data": {"skills": ["ui_design", "ux_design"]}},
+        {"intent": "testing", "keywords": ["тестирование"],
+         "data": {"skills": ["unit_testing", "integration_testing"]}},
+        {"intent": "project", "keywords": ["проект"], "data": {"skills": ["project_planning", "task_management"]}}
+    ],
+    "complex_task": [
+        {"intent": "complex",
+         "keywords": ["создать проект", "разработать приложение", "создать систему",
+                      "комплексное решение", "многоэтапная задача", "большой проект"]}
+    ]
+}
+
+
+@dataclass
+class IntentMatch:
+    """Найденное намерение"""
+    intent: str
+    score: float
+    matched: List[str]
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class KeywordMatcher:
+    """Все вхождения всех ключевых фраз за один проход регулярного выражения
+
+    Фразы собраны в префиксное дерево, а оно - в одно регулярное выражение:
+    в каждой позиции выбор идет по очередному символу, а не перебором всех
+    фраз. Жадные необязательные группы дают самую длинную фразу с позиции,
+    более короткие фразы с той же позиции - ее префиксы, они известны
+    заранее. Поиск продолжается со следующего символа после начала
+    вхождения, поэтому перекрывающиеся вхождения не теряются
+    """
+
+    def __init__(self, phrases: List[str]):
+        self.phrases = phrases
+        self._ids = {phrase: phrase_id for phrase_id, phrase in enumerate(phrases)}
+        self._prefixes = [[other_id for other_id, other in enumerate(phrases) if phrase.startswith(other)]
+                          for phrase in phrases]
+        trie: Dict[str, Any] = {}
+        for phrase in phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[""] = True
+        self._regex = re.compile(self._trie_pattern(trie)) if phrases else None
+
+    @classmethod
+    def _trie_pattern(cls, node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + cls._trie_pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(индекс первого символа вхождения, номер фразы)"""
+        if self._regex is None:
+            return
+        search = self._regex.search
+        match = search(text)
+        while match is not None:
+            start = match.start()
+            for phrase_id in self._prefixes[self._ids[match.group()]]:
+                yield start, phrase_id
+            match = search(text, start + 1)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class CompiledRules:
+    """Наборы правил, собранные в одно выражение для ключевых фраз и по одному регулярному выражению на набор"""
+
+    def __init__(self, rules: Dict[str, List[Dict[str, Any]]]):
+        self.rules = rules
+        self.strings: List[str] = []
+        # Правила всех наборов подряд: внутри набора номер задает приоритет
+        self.flat_rules: List[Tuple[str, Dict[str, Any]]] = []
+        # Для каждой ключевой фразы: номера правил, где она подстрока, и где - слово целиком
+        self.substring_targets: List[List[int]] = []
+        self.word_targets: List[List[int]] = []
+        string_ids: Dict[str, int] = {}
+        self.regexes: Dict[str, Tuple[re.Pattern, Dict[str, int]]] = {}
+
+        for ruleset, ruleset_rules in rules.items():
+            alternatives = []
+            groups = {}
+            for rule in ruleset_rules:
+                rule_id = len(self.flat_rules)
+                self.flat_rules.append((ruleset, rule))
+                for terms, targets in ((rule.get("keywords", []), self.substring_targets),
+                                       (rule.get("words", []), self.word_targets)):
+                    for term in terms:
+                        term = term.lower()
+                        string_id = string_ids.get(term)
+                        if string_id is None:
+                            string_id = string_ids[term] = len(self.strings)
+                            self.strings.append(term)
+                            self.substring_targets.append([])
+                            self.word_targets.append([])
+                        if rule_id not in targets[string_id]:
+                            targets[string_id].append(rule_id)
+                for pattern in rule.get("patterns", []):
+                    group = f"r{len(groups)}"
+                    groups[group] = rule_id
+                    alternatives.append(f"(?P<{group}>{pattern})")
+            if alternatives:
+                self.regexes[ruleset] = (re.compile("|".join(alternatives), re.IGNORECASE), groups)
+
+        self.matcher = KeywordMatcher(self.strings)
+
+    def analyze(self, text: str) -> Dict[str, List[IntentMatch]]:
+        """Намерения всех наборов для нормализованного текста"""
+        found: Dict[int, List[str]] = {}
+        text_length = len(text)
+        for start, string_id in self.matcher.iter_matches(text):
+            term = self.strings[string_id]
+            rule_ids = self.substring_targets[string_id]
+            if self.word_targets[string_id]:
+                end = start + len(term)
+                if ((start == 0 or not _is_word_char(text[start - 1])) and
+                        (end == text_length or not _is_word_char(text[end]))):
+                    rule_ids = rule_ids + self.word_targets[string_id]
+            for rule_id in rule_ids:
+                matched = found.get(rule_id)
+                if matched is None:
+                    found[rule_id] = [term]
+                elif term not in matched:
+                    matched.append(term)
+
+        # Регулярные выражения: одно на набор, вхождения не перекрываются
+        for regex, groups in self.regexes.values():
+            for match in regex.finditer(text):
+                matched = found.setdefault(groups[match.lastgroup], [])
+                if match.group() not in matched:
+                    matched.append(match.group())
+
+        results: Dict[str, List[IntentMatch]] = {}
+        for rule_id in sorted(found):
+            ruleset, rule = self.flat_rules[rule_id]
+            matched = found[rule_id]
+            results.setdefault(ruleset, []).append(IntentMatch(
+                intent=rule["intent"],
+                score=len(matched) * rule.get("weight", 1.0),
+                matched=matched,
+                data=rule.get("data", {})
+            ))
+        return results
+
+
+class IntentRouter:
+    """Определение намерений по сообщению с кешем решений и горячей перезагрузкой правил"""
+
+    def __init__(self, rules: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                 rules_file: Optional[str] = DEFAULT_RULES_FILE, cache_size: int = 4096,
+                 reload_interval: float = 2.0):
+        self.default_rules = rules or DEFAULT_RULES
+        self.rules_file = rules_file
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self._cache: "OrderedDict[str, Dict[str, List[IntentMatch]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._rules_mtime: Optional[float] = None
+        self._last_check = time.monotonic()
+        self.stats = {"hits": 0, "misses": 0, "reloads": 0}
+        self._compiled = CompiledRules(self._load_rules())
+
+    def _load_rules(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Правила по умолчанию с наборами из файла поверх них"""
+        rules = dict(self.default_rules)
+        if self.rules_file and os.path.exists(self.rules_file):
+            self._rules_mtime = os.path.getmtime(self.rules_file)
+            with open(self.rules_file, "r", encoding="utf-8") as f:
+                rules.update(json.load(f))
+        else:
+            self._rules_mtime = None
+        return rules
+
+    def reload(self) -> bool:
+        """Перечитать правила; при ошибке в файле остаются прежние"""
+        try:
+            compiled = CompiledRules(self._load_rules())
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки правил намерений: {e}")
+            return False
+        with self._lock:
+            self._compiled = compiled
+            self._cache.clear()
+        self.stats["reloads"] += 1
+        logger.info(f"🔄 Правила намерений загружены: {len(compiled.strings)} ключевых фраз")
+        return True
+
+    def _check_reload(self):
+        now = time.monotonic()
+        if not self.rules_file or now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        mtime = os.path.getmtime(self.rules_file) if os.path.exists(self.rules_file) else None
+        if mtime != self._rules_mtime:
+            self.reload()
+
+    def analyze(self, message: str) -> Dict[str, List[IntentMatch]]:
+        """Намерения сообщения во всех наборах правил: {набор: [IntentMatch по приоритету]}"""
+        self._check_reload()
+        text = message.lower().strip()
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                self.stats["hits"] += 1
+                return cached
+            compiled = self._compiled
+        result = compiled.analyze(text)
+        with self._lock:
+            self.stats["misses"] += 1
+            if compiled is self._compiled:
+                self._cache[text] = result
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def match(self, message: str, ruleset: str) -> List[IntentMatch]:
+        """Намерения одного набора в порядке приоритета правил"""
+        return self.analyze(message).get(ruleset, [])
+
+    def best(self, message: str, ruleset: str, default: Optional[str] = None) -> Optional[str]:
+        """Намерение с наивысшим приоритетом (первое сработавшее правило набора)"""
+        matches = self.match(message, ruleset)
+        return matches[0].intent if matches else default
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика маршрутизатора"""
+        with self._lock:
+            return {
+                **self.stats,
+                "cached": len(self._cache),
+                "rulesets": len(self._compiled.rules),
+                "phrases": len(self._compiled.strings),
+                "rules_file": self.rules_file if self._rules_mtime is not None else None
+            }
+
+
+_router: Optional[IntentRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_intent_router() -> IntentRouter:
+    """Общий маршрутизатор намерений процесса (создается при первом обращении)"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = IntentRouter()
+    return _router
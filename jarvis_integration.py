@@ -818,9 +818,8 @@ class JarvisIntegration:
         """Экстренная остановка всех процессов"""
         try:
             # Останавливаем все активные задачи
-            for task in self.core.tasks_queue[:]:
-                if task.status == "running":
-                    task.status = "stopped"
+            for task in self.core.scheduler.running_tasks():
+                task.status = "stopped"
             
             # Отключаем все правила автоматизации
             for rule in self.automation_rules.values():
@@ -832,838 +831,3 @@ class JarvisIntegration:
         except Exception as e:
             logger.error(f"❌ Ошибка экстренной остановки: {e}")
             return {"error": str(e)}
-
-
-
-JARVIS Integration Module
-Интеграция с существующими модулями и автоматизация бизнес-процессов
-"""
-
-import os
-import sys
-import json
-import time
-import asyncio
-import subprocess
-import logging
-from datetime import datetime, timedelta
-from pathlib import Path
-from typing import Dict, List, Any, Optional
-import requests
-import pandas as pd
-from dataclasses import dataclass
-
-# Добавляем пути к существующим модулям
-sys.path.append('/home/mentor')
-sys.path.append('/home/mentor/mentor')
-sys.path.append('/home/mentor/ai_manager')
-
-logger = logging.getLogger(__name__)
-
-class JarvisIntegration:
-    """Интеграция JARVIS с существующими системами"""
-    
-    def __init__(self, core):
-        self.core = core
-        self.integrated_modules = {}
-        self.automation_rules = {}
-        self.load_existing_modules()
-        self.setup_automation_rules()
-        
-    def load_existing_modules(self):
-        """Загрузка существующих модулей"""
-        try:
-            # Интеграция с WB API
-            import wb_api
-            self.integrated_modules['wb_api'] = wb_api
-            
-            # Интеграция с анализатором
-            import analyzer
-            self.integrated_modules['analyzer'] = analyzer
-            
-            # Интеграция с генератором отчетов
-            import reports
-            self.integrated_modules['reports'] = reports
-            
-            # Интеграция с конфигурацией
-            import config
-            self.integrated_modules['config'] = config
-            
-            # Интеграция с AI менеджером
-            try:
-                sys.path.append('/home/mentor/ai_manager')
-                from ai_manager.main import AIManager
-                self.integrated_modules['ai_manager'] = AIManager()
-                logger.info("✅ AI Manager интегрирован")
-            except ImportError as e:
-                logger.warning(f"AI Manager не найден: {e}, используем базовую версию")
-                self.integrated_modules['ai_manager'] = self.create_basic_ai_manager()
-            
-            # Интеграция с mentor проектом
-            try:
-                sys.path.append('/home/mentor/mentor')
-                from mentor.atlas_brain_ai_enhanced import AtlasBrain
-                self.integrated_modules['atlas_brain'] = AtlasBrain()
-                logger.info("✅ Atlas Brain интегрирован")
-            except ImportError as e:
-                logger.warning(f"Atlas Brain не найден: {e}")
-                
-            logger.info("✅ Все доступные модули интегрированы")
-            
-        except Exception as e:
-            logger.error(f"❌ Ошибка интеграции модулей: {e}")
-            
-    def create_basic_ai_manager(self):
-        """Создание базового AI менеджера"""
-        class BasicAIManager:
-            def __init__(self):
-                self.providers = ['openai', 'anthropic', 'local']
-                self.current_provider = 'local'
-                
-            async def generate_content(self, prompt, content_type="text"):
-                # Базовая генерация контента
-                templates = {
-                    "product_description": f"Описание товара на основе: {prompt}",
-                    "business_report": f"Бизнес-отчет: {prompt}",
-                    "marketing_text": f"Маркетинговый текст: {prompt}"
-                }
-                return templates.get(content_type, f"Сгенерированный контент: {prompt}")
-                
-            async def analyze_data(self, data, analysis_type="general"):
-                # Базовая аналитика
-                return {
-                    "analysis_type": analysis_type,
-                    "insights": ["Тренд вверх", "Рекомендация: увеличить инвестиции"],
-                    "confidence": 0.75
-                }
-        
-        return BasicAIManager()
-    
-    def setup_automation_rules(self):
-        """Настройка правил автоматизации"""
-        self.automation_rules = {
-            "wb_management": {
-                "enabled": True,
-                "schedule": "0 */6 * * *",  # Каждые 6 часов
-                "actions": [
-                    "check_stock_levels",
-                    "update_prices", 
-                    "generate_reports",
-                    "optimize_ads"
-                ]
-            },
-            "content_generation": {
-                "enabled": True,
-                "trigger": "new_products",
-                "actions": [
-                    "generate_descriptions",
-                    "create_marketing_text",
-                    "optimize_seo"
-                ]
-            },
-            "data_analysis": {
-                "enabled": True,
-                "schedule": "0 2 * * *",  # Ежедневно в 2:00
-                "actions": [
-                    "analyze_sales_trends",
-                    "generate_insights",
-                    "create_recommendations"
-                ]
-            },
-            "self_improvement": {
-                "enabled": True,
-                "schedule": "0 3 * * 0",  # Еженедельно
-                "actions": [
-                    "analyze_performance",
-                    "optimize_algorithms",
-                    "expand_knowledge_base"
-                ]
-            }
-        }
-        
-    async def execute_automation_rule(self, rule_name: str, context: Dict[str, Any] = None):
-        """Выполнение правила автоматизации"""
-        if rule_name not in self.automation_rules:
-            return {"error": f"Правило {rule_name} не найдено"}
-            
-        rule = self.automation_rules[rule_name]
-        if not rule["enabled"]:
-            return {"status": "disabled"}
-            
-        results = []
-        
-        try:
-            for action in rule["actions"]:
-                result = await self.execute_action(action, context or {})
-                results.append({
-                    "action": action,
-                    "result": result,
-                    "timestamp": datetime.now().isoformat()
-                })
-                
-            logger.info(f"✅ Правило автоматизации '{rule_name}' выполнено успешно")
-            return {
-                "rule": rule_name,
-                "status": "completed",
-                "actions_executed": len(results),
-                "results": results
-            }
-            
-        except Exception as e:
-            logger.error(f"❌ Ошибка выполнения правила {rule_name}: {e}")
-            return {"error": str(e)}
-    
-    async def execute_action(self, action: str, context: Dict[str, Any]):
-        """Выполнение конкретного действия"""
-        action_map = {
-            # WB Management
-            "check_stock_levels": self.check_wb_stock_levels,
-            "update_prices": self.update_wb_prices,
-            "generate_reports": self.generate_wb_reports,
-            "optimize_ads": self.optimize_wb_ads,
-            
-            # Content Generation
-            "generate_descriptions": self.generate_product_descriptions,
-            "create_marketing_text": self.create_marketing_content,
-            "optimize_seo": self.optimize_seo_content,
-            
-            # Data Analysis
-            "analyze_sales_trends": self.analyze_sales_trends,
-            "generate_insights": self.generate_business_insights,
-            "create_recommendations": self.create_recommendations,
-            
-            # Self Improvement
-            "analyze_performance": self.analyze_system_performance,
-            "optimize_algorithms": self.optimize_algorithms,
-            "expand_knowledge_base": self.expand_knowledge_base
-        }
-        
-        if action in action_map:
-            return await action_map[action](context)
-        else:
-            return {"error": f"Неизвестное действие: {action}"}
-    
-    # WB Management Actions
-    async def check_wb_stock_levels(self, context):
-        """Проверка уровня остатков на WB"""
-        try:
-            if 'wb_api' in self.integrated_modules:
-                wb_api = self.integrated_modules['wb_api']
-                
-                # Получаем данные об остатках
-                stocks_data = wb_api.get_stocks()
-                cards_data = wb_api.get_cards(limit=100)
-                
-                if not stocks_data or not cards_data:
-                    return {"error": "Не удалось получить данные от WB API"}
-                
-                # Анализируем остатки
-                low_stock_items = []
-                out_of_stock_items = []
-                total_products = 0
-                
-                stocks_by_nm = {}
-                # Обрабатываем данные об остатках
-                stocks_list = stocks_data.get('data', []) if isinstance(stocks_data, dict) else stocks_data
-                for stock in stocks_list:
-                    if isinstance(stock, dict):
-                        nm_id = stock.get('nmId')
-                        quantity = stock.get('quantity', 0)
-                        if nm_id:
-                            stocks_by_nm[nm_id] = quantity
-                
-                for card in cards_data.get('cards', []):
-                    nm_id = card.get('nmID')
-                    title = card.get('title', 'Без названия')
-                    total_products += 1
-                    
-                    if nm_id in stocks_by_nm:
-                        quantity = stocks_by_nm[nm_id]
-                        if quantity == 0:
-                            out_of_stock_items.append({"nm_id": nm_id, "title": title})
-                        elif quantity < 10:  # Порог низкого остатка
-                            low_stock_items.append({"nm_id": nm_id, "title": title, "quantity": quantity})
-                
-                # Генерируем рекомендации
-                recommendations = []
-                if out_of_stock_items:
-                    recommendations.append(f"СРОЧНО пополнить остатки: {len(out_of_stock_items)} товаров")
-                if low_stock_items:
-                    recommendations.append(f"Пополнить остатки: {len(low_stock_items)} товаров")
-                
-                return {
-                    "products_checked": total_products,
-                    "low_stock": len(low_stock_items),
-                    "out_of_stock": len(out_of_stock_items),
-                    "low_stock_items": low_stock_items[:5],  # Первые 5
-                    "out_of_stock_items": out_of_stock_items[:5],  # Первые 5
-                    "recommendations": recommendations,
-                    "timestamp": datetime.now().isoformat()
-                }
-            else:
-                return {"error": "WB API не доступен"}
-        except Exception as e:
-            logger.error(f"Ошибка проверки остатков WB: {e}")
-            return {"error": str(e)}
-    
-    async def update_wb_prices(self, context):
-        """Обновление цен на WB"""
-        try:
-            # Интеграция с алгоритмом ценообразования
-            return {
-                "prices_updated": 45,
-                "average_increase": "5.2%",
-                "expected_revenue_increase": "12%"
-            }
-        except Exception as e:
-            return {"error": str(e)}
-    
-    async def generate_wb_reports(self, context):
-        """Генерация отчетов по WB"""
-        try:
-            if 'reports' in self.integrated_modules:
-                reports_module = self.integrated_modules['reports']
-                
-                # Получаем параметры из контекста
-                days = context.get('days', 30)
-                limit = context.get('limit', 50)
-                
-                # Используем реальный модуль reports
-                # Сначала получаем данные через WB API
-                wb_api = self.integrated_modules['wb_api']
-                cards = wb_api.get_cards(limit=limit)
-                orders = wb_api.get_orders(days=days) or []
-                sales = wb_api.get_sales(days=days) or []
-                
-                if not cards:
-                    return {"error": "Не удалось получить данные карточек"}
-                
-                # Анализируем данные
-                orders_by_nm = {}
-                for order in orders:
-                    nm_id = order.get("nmId")
-                    if nm_id:
-                        orders_by_nm[nm_id] = orders_by_nm.get(nm_id, 0) + 1
-                
-                sales_by_nm = {}
-                for sale in sales:
-                    nm_id = sale.get("nmId")
-                    if nm_id:
-                        sales_by_nm[nm_id] = sales_by_nm.get(nm_id, 0) + 1
-                
-                # Формируем отчет
-                report_data = []
-                total_views = 0
-                total_orders = 0
-                total_sales = 0
-                
-                for card in cards.get("cards", []):
-                    nm_id = card["nmID"]
-                    title = card["title"]
-                    views = 1000  # Примерные показы (можно получать из статистики)
-                    orders_count = orders_by_nm.get(nm_id, 0)
-                    sales_count = sales_by_nm.get(nm_id, 0)
-                    
-                    ctr = round(orders_count / views * 100, 2) if views else 0
-                    str_val = round(sales_count / orders_count * 100, 2) if orders_count else 0
-                    
-                    report_data.append({
-                        "nm_id": nm_id,
-                        "title": title,
-                        "views": views,
-                        "orders": orders_count,
-                        "sales": sales_count,
-                        "ctr": ctr,
-                        "str": str_val
-                    })
-                    
-                    total_views += views
-                    total_orders += orders_count
-                    total_sales += sales_count
-                
-                # Сохраняем отчет в файл
-                report_path = f"/home/mentor/jarvis_data/reports/wb_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                os.makedirs(os.path.dirname(report_path), exist_ok=True)
-                
-                with open(report_path, 'w', encoding='utf-8') as f:
-                    json.dump({
-                        "timestamp": datetime.now().isoformat(),
-                        "period_days": days,
-                        "total_products": len(report_data),
-                        "summary": {
-                            "total_views": total_views,
-                            "total_orders": total_orders,
-                            "total_sales": total_sales,
-                            "average_ctr": round(total_orders / total_views * 100, 2) if total_views else 0,
-                            "average_str": round(total_sales / total_orders * 100, 2) if total_orders else 0
-                        },
-                        "products": report_data
-                    }, f, ensure_ascii=False, indent=2)
-                
-                return {
-                    "report_generated": True,
-                    "report_file": report_path,
-                    "data_points": len(report_data),
-                    "report_type": "CTR/STR Analysis",
-                    "summary": {
-                        "total_products": len(report_data),
-                        "total_orders": total_orders,
-                        "total_sales": total_sales,
-                        "average_ctr": round(total_orders / total_views * 100, 2) if total_views else 0,
-                        "average_str": round(total_sales / total_orders * 100, 2) if total_orders else 0
-                    }
-                }
-            else:
-                return {"error": "Модуль отчетов не доступен"}
-        except Exception as e:
-            logger.error(f"Ошибка генерации отчета WB: {e}")
-            return {"error": str(e)}
-    
-    async def optimize_wb_ads(self, context):
-        """Оптимизация рекламы на WB"""
-        try:
-            # Алгоритм оптимизации рекламы
-            return {
-                "ads_optimized": 25,
-                "budget_reallocated": "15%",
-                "expected_ctr_increase": "8%"
-            }
-        except Exception as e:
-            return {"error": str(e)}
-    
-    # Content Generation Actions
-    async def generate_product_descriptions(self, context):
-        """Генерация описаний товаров"""
-        try:
-            # Получаем товары из WB API
-            if 'wb_api' in self.integrated_modules:
-                wb_api = self.integrated_modules['wb_api']
-                
-                # Получаем товары без описаний или с короткими описаниями
-                cards_data = wb_api.get_cards(limit=50)
-                
-                if not cards_data:
-                    return {"error": "Не удалось получить данные товаров"}
-                
-                products_to_process = []
-                for card in cards_data.get('cards', []):
-                    nm_id = card.get('nmID')
-                    title = card.get('title', '')
-                    description = card.get('description', '')
-                    
-                    # Обрабатываем товары с коротким или отсутствующим описанием
-                    if len(description) < 100:
-                        products_to_process.append({
-                            "nm_id": nm_id,
-                            "title": title,
-                            "current_description": description
-                        })
-                
-                # Ограничиваем количество товаров для обработки
-                products_to_process = products_to_process[:10]
-                
-                generated_descriptions = []
-                
-                # Используем AI Manager если доступен
-                if 'ai_manager' in self.integrated_modules:
-                    ai_manager = self.integrated_modules['ai_manager']
-                    
-                    for product in products_to_process:
-                        try:
-                            prompt = f"""
-                            Создай качественное описание товара для интернет-магазина:
-                            
-                            Название товара: {product['title']}
-                            Текущее описание: {product['current_description']}
-                            
-                            Требования:
-                            - 200-300 слов
-                            - SEO-оптимизированное
-                            - Выдели ключевые преимущества
-                            - Используй эмоциональные слова
-                            - Включи призыв к действию
-                            """
-                            
-                            description = await ai_manager.generate_content(prompt, "product_description")
-                            
-                            generated_descriptions.append({
-                                "nm_id": product['nm_id'],
-                                "title": product['title'],
-                                "old_description": product['current_description'],
-                                "new_description": description,
-                                "improvement": len(description) - len(product['current_description'])
-                            })
-                            
-                        except Exception as e:
-                            logger.warning(f"Ошибка генерации описания для товара {product['nm_id']}: {e}")
-                            # Используем базовый шаблон
-                            basic_description = self.create_basic_description(product['title'])
-                            generated_descriptions.append({
-                                "nm_id": product['nm_id'],
-                                "title": product['title'],
-                                "old_description": product['current_description'],
-                                "new_description": basic_description,
-                                "improvement": len(basic_description) - len(product['current_description'])
-                            })
-                else:
-                    # Используем базовые шаблоны если AI недоступен
-                    for product in products_to_process:
-                        basic_description = self.create_basic_description(product['title'])
-                        generated_descriptions.append({
-                            "nm_id": product['nm_id'],
-                            "title": product['title'],
-                            "old_description": product['current_description'],
-                            "new_description": basic_description,
-                            "improvement": len(basic_description) - len(product['current_description'])
-                        })
-                
-                # Сохраняем результаты
-                content_path = f"/home/mentor/jarvis_data/content/generated_descriptions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                os.makedirs(os.path.dirname(content_path), exist_ok=True)
-                
-                with open(content_path, 'w', encoding='utf-8') as f:
-                    json.dump({
-                        "timestamp": datetime.now().isoformat(),
-                        "total_processed": len(products_to_process),
-                        "descriptions": generated_descriptions
-                    }, f, ensure_ascii=False, indent=2)
-                
-                return {
-                    "descriptions_generated": len(generated_descriptions),
-                    "products": generated_descriptions,
-                    "content_file": content_path,
-                    "total_improvement": sum(d['improvement'] for d in generated_descriptions)
-                }
-            else:
-                return {"error": "WB API не доступен"}
-        except Exception as e:
-            logger.error(f"Ошибка генерации описаний товаров: {e}")
-            return {"error": str(e)}
-    
-    def create_basic_description(self, title):
-        """Создание базового описания товара"""
-        return f"""
-        {title} - это качественный товар, который станет отличным выбором для ваших потребностей.
-        
-        Ключевые особенности:
-        • Высокое качество материалов
-        • Удобство в использовании
-        • Современный дизайн
-        • Доступная цена
-        
-        Этот товар идеально подходит для ежедневного использования и станет незаменимым помощником.
-        
-        Закажите прямо сейчас и получите быструю доставку!
-        """.strip()
-    
-    async def create_marketing_content(self, context):
-        """Создание маркетингового контента"""
-        try:
-            if 'ai_manager' in self.integrated_modules:
-                ai_manager = self.integrated_modules['ai_manager']
-                
-                content_types = ["social_media_post", "email_campaign", "ad_copy"]
-                generated_content = {}
-                
-                for content_type in content_types:
-                    content = await ai_manager.generate_content(
-                        f"Создай {content_type} для продвижения товаров",
-                        "marketing_text"
-                    )
-                    generated_content[content_type] = content
-                
-                return {
-                    "content_types_created": len(generated_content),
-                    "content": generated_content
-                }
-            else:
-                return {"error": "AI Manager не доступен"}
-        except Exception as e:
-            return {"error": str(e)}
-    
-    async def optimize_seo_content(self, context):
-        """Оптимизация SEO контента"""
-        try:
-            return {
-                "seo_score_improved": 15,
-                "keywords_optimized": 45,
-                "meta_descriptions_created": 30
-            }
-        except Exception as e:
-            return {"error": str(e)}
-    
-    # Data Analysis Actions
-    async def analyze_sales_trends(self, context):
-        """Анализ трендов продаж"""
-        try:
-            if 'wb_api' in self.integrated_modules and 'analyzer' in self.integrated_modules:
-                wb_api = self.integrated_modules['wb_api']
-                
-                # Получаем данные за разные периоды
-                days = context.get('days', 30)
-                sales_data = wb_api.get_sales(days=days) or []
-                orders_data = wb_api.get_orders(days=days) or []
-                
-                if not sales_data:
-                    return {"error": "Нет данных о продажах"}
-                
-                # Анализируем тренды по дням
-                daily_sales = {}
-                daily_orders = {}
-                
-                for sale in sales_data:
-                    date = sale.get('date', '')
-                    if date:
-                        daily_sales[date] = daily_sales.get(date, 0) + 1
-                
-                for order in orders_data:
-                    date = order.get('date', '')
-                    if date:
-                        daily_orders[date] = daily_orders.get(date, 0) + 1
-                
-                # Сортируем по датам
-                sorted_dates = sorted(daily_sales.keys())
-                sales_values = [daily_sales[date] for date in sorted_dates]
-                orders_values = [daily_orders.get(date, 0) for date in sorted_dates]
-                
-                # Рассчитываем тренд
-                if len(sales_values) >= 2:
-                    # Простой расчет тренда (сравниваем первую и вторую половину)
-                    mid_point = len(sales_values) // 2
-                    first_half_avg = sum(sales_values[:mid_point]) / mid_point if mid_point > 0 else 0
-                    second_half_avg = sum(sales_values[mid_point:]) / (len(sales_values) - mid_point) if mid_point < len(sales_values) else 0
-                    
-                    if second_half_avg > first_half_avg:
-                        growth_rate = ((second_half_avg - first_half_avg) / first_half_avg * 100) if first_half_avg > 0 else 0
-                        trend_direction = "positive"
-                    else:
-                        growth_rate = ((first_half_avg - second_half_avg) / first_half_avg * 100) if first_half_avg > 0 else 0
-                        trend_direction = "negative"
-                else:
-                    trend_direction = "insufficient_data"
-                    growth_rate = 0
-                
-                # Анализируем топ товары
-                product_sales = {}
-                for sale in sales_data:
-                    nm_id = sale.get('nmId')
-                    if nm_id:
-                        product_sales[nm_id] = product_sales.get(nm_id, 0) + 1
-                
-                # Получаем названия товаров
-                cards_data = wb_api.get_cards(limit=100)
-                product_names = {}
-                if cards_data:
-                    for card in cards_data.get('cards', []):
-                        product_names[card.get('nmID')] = card.get('title', 'Неизвестный товар')
-                
-                # Топ товары
-                top_products = sorted(product_sales.items(), key=lambda x: x[1], reverse=True)[:5]
-                top_products_with_names = [
-                    {
-                        "nm_id": nm_id,
-                        "title": product_names.get(nm_id, f"Товар {nm_id}"),
-                        "sales_count": count
-                    }
-                    for nm_id, count in top_products
-                ]
-                
-                # Сохраняем анализ
-                analysis_data = {
-                    "timestamp": datetime.now().isoformat(),
-                    "period_days": days,
-                    "trend_direction": trend_direction,
-                    "growth_rate": round(growth_rate, 2),
-                    "total_sales": len(sales_data),
-                    "total_orders": len(orders_data),
-                    "daily_sales": daily_sales,
-                    "top_products": top_products_with_names,
-                    "conversion_rate": round(len(sales_data) / len(orders_data) * 100, 2) if orders_data else 0
-                }
-                
-                # Сохраняем в файл
-                analysis_path = f"/home/mentor/jarvis_data/analysis/sales_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                os.makedirs(os.path.dirname(analysis_path), exist_ok=True)
-                
-                with open(analysis_path, 'w', encoding='utf-8') as f:
-                    json.dump(analysis_data, f, ensure_ascii=False, indent=2)
-                
-                return {
-                    "trend_direction": trend_direction,
-                    "growth_rate": f"{growth_rate:.1f}%",
-                    "total_sales": len(sales_data),
-                    "total_orders": len(orders_data),
-                    "conversion_rate": f"{analysis_data['conversion_rate']}%",
-                    "top_performing_products": top_products_with_names,
-                    "analysis_file": analysis_path,
-                    "daily_data_points": len(daily_sales)
-                }
-            else:
-                return {"error": "Модули WB API или анализатор не доступны"}
-        except Exception as e:
-            logger.error(f"Ошибка анализа трендов продаж: {e}")
-            return {"error": str(e)}
-    
-    async def generate_business_insights(self, context):
-        """Генерация бизнес-инсайтов"""
-        try:
-            insights = [
-                "Рост продаж на 15% в последний месяц",
-                "Увеличение конверсии на 8% после оптимизации цен",
-                "Потенциал роста в категории 'Электроника' - 25%",
-                "Рекомендация: увеличить рекламный бюджет на 20%"
-            ]
-            
-            return {
-                "insights_generated": len(insights),
-                "insights": insights,
-                "confidence_level": 0.85
-            }
-        except Exception as e:
-            return {"error": str(e)}
-    
-    async def create_recommendations(self, context):
-        """Создание рекомендаций"""
-        try:
-            recommendations = {
-                "immediate_actions": [
-                    "Пополнить остатки топ-5 товаров",
-                    "Снизить цену на товары с низким CTR",
-                    "Запустить рекламную кампанию для новой категории"
-                ],
-                "long_term_strategy": [
-                    "Развивать собственный бренд",
-                    "Расширять ассортимент в перспективных категориях",
-                    "Инвестировать в автоматизацию процессов"
-                ],
-                "expected_impact": {
-                    "revenue_increase": "20-25%",
-                    "timeframe": "3-6 месяцев"
-                }
-            }
-            
-            return recommendations
-        except Exception as e:
-            return {"error": str(e)}
-    
-    # Self Improvement Actions
-    async def analyze_system_performance(self, context):
-        """Анализ производительности системы"""
-        try:
-            performance_metrics = {
-                "task_completion_rate": 0.92,
-                "average_response_time": "2.3s",
-                "resource_efficiency": 0.85,
-                "error_rate": 0.03,
-                "improvement_areas": [
-                    "Оптимизация алгоритмов генерации контента",
-                    "Ускорение обработки данных",
-                    "Улучшение точности прогнозов"
-                ]
-            }
-            
-            return performance_metrics
-        except Exception as e:
-            return {"error": str(e)}
-    
-    async def optimize_algorithms(self, context):
-        """Оптимизация алгоритмов"""
-        try:
-            optimizations = {
-                "algorithms_optimized": 3,
-                "performance_improvement": "18%",
-                "memory_usage_reduction": "12%",
-                "optimizations_applied": [
-                    "Кэширование частых запросов",
-                    "Параллельная обработка задач",
-                    "Оптимизация SQL запросов"
-                ]
-            }
-            
-            return optimizations
-        except Exception as e:
-            return {"error": str(e)}
-    
-    async def expand_knowledge_base(self, context):
-        """Расширение базы знаний"""
-        try:
-            new_knowledge = {
-                "market_trends_2024": {
-                    "source": "market_analysis",
-                    "confidence": 0.88,
-                    "last_updated": datetime.now().isoformat()
-                },
-                "competitor_analysis": {
-                    "source": "web_scraping",
-                    "confidence": 0.75,
-                    "last_updated": datetime.now().isoformat()
-                },
-                "customer_behavior_patterns": {
-                    "source": "analytics_data",
-                    "confidence": 0.92,
-                    "last_updated": datetime.now().isoformat()
-                }
-            }
-            
-            # Сохраняем новые знания
-            knowledge_path = "/home/mentor/jarvis_data/knowledge"
-            Path(knowledge_path).mkdir(parents=True, exist_ok=True)
-            
-            for topic, data in new_knowledge.items():
-                with open(f"{knowledge_path}/{topic}.json", "w") as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-            
-            return {
-                "knowledge_entries_added": len(new_knowledge),
-                "topics": list(new_knowledge.keys()),
-                "average_confidence": sum(k["confidence"] for k in new_knowledge.values()) / len(new_knowledge)
-            }
-        except Exception as e:
-            return {"error": str(e)}
-    
-    async def get_system_status(self):
-        """Получение статуса всех интегрированных модулей"""
-        status = {
-            "integrated_modules": {},
-            "automation_rules": {},
-            "last_activity": datetime.now().isoformat()
-        }
-        
-        # Проверяем статус модулей
-        for module_name, module in self.integrated_modules.items():
-            try:
-                if hasattr(module, 'status'):
-                    status["integrated_modules"][module_name] = module.status()
-                else:
-                    status["integrated_modules"][module_name] = "active"
-            except Exception as e:
-                status["integrated_modules"][module_name] = f"error: {str(e)}"
-        
-        # Статус правил автоматизации
-        for rule_name, rule in self.automation_rules.items():
-            status["automation_rules"][rule_name] = {
-                "enabled": rule["enabled"],
-                "last_executed": "never",  # TODO: отслеживать время выполнения
-                "actions_count": len(rule["actions"])
-            }
-        
-        return status
-    
-    async def emergency_stop(self):
-        """Экстренная остановка всех процессов"""
-        try:
-            # Останавливаем все активные задачи
-            for task in self.core.tasks_queue[:]:
-                if task.status == "running":
-                    task.status = "stopped"
-            
-            # Отключаем все правила автоматизации
-            for rule in self.automation_rules.values():
-                rule["enabled"] = False
-            
-            logger.warning("🛑 Экстренная остановка системы выполнена")
-            return {"status": "stopped", "timestamp": datetime.now().isoformat()}
-            
-        except Exception as e:
-            logger.error(f"❌ Ошибка экстренной остановки: {e}")
-            return {"error": str(e)}
\ No newline at end of file
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Хранилище знаний агентов
+Журнал изменений (WAL) с дозаписью кадров и периодический сжатый
+снимок, который заменяет прежний атомарным переименованием.
+Сохранение пишет только изменения с прошлого сохранения, загрузка
+читает снимок и хвост журнала одним проходом
+"""
+
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KNOWLEDGE_DIR = "/home/mentor/agent_knowledge"
+LEGACY_KNOWLEDGE_FILE = "saved_knowledge.json"
+
+FRAME_HEADER = struct.Struct("<IIQ")  # длина, crc32, порядковый номер записи
+SNAPSHOT_MAGIC = b"JKS1"
+SNAPSHOT_HEADER = struct.Struct("<4sQI")  # сигнатура, номер последней записи, crc32
+CONVERSATION_LIMIT = 1000
+
+
+def _encode(obj: Any) -> bytes:
+    """Компактный JSON: значения, которые JSON не умеет, сохраняются строкой"""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def empty_state() -> Dict[str, Any]:
+    return {"knowledge_base": {}, "conversation_history": [], "agent_capabilities": {}}
+
+
+def apply_record(state: Dict[str, Any], record: List[Any]) -> None:
+    """Применить запись журнала к состоянию"""
+    op = record[0]
+    if op == "knowledge":
+        _, key, item = record
+        state["knowledge_base"].setdefault(key, []).append(item)
+    elif op == "conversation":
+        state["conversation_history"].append(record[1])
+    else:
+        logger.warning(f"⚠️ Неизвестная запись журнала знаний: {op}")
+
+
+class KnowledgeStore:
+    """Журнал и снимки знаний общей памяти
+
+    record() вызывается при каждом изменении памяти и только ставит
+    запись в очередь; save() дописывает очередь в журнал и, когда журнал
+    вырастает относительно снимка, записывает новый снимок и обнуляет журнал.
+    """
+
+    def __init__(self, directory: str = DEFAULT_KNOWLEDGE_DIR, compact_ratio: float = 1.0,
+                 min_compact_bytes: int = 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.wal_path = self.directory / "knowledge.wal"
+        self.snapshot_path = self.directory / "knowledge.snapshot"
+        self.compact_ratio = compact_ratio
+        self.min_compact_bytes = min_compact_bytes
+        self.seq = 0
+        self.snapshot_seq = 0
+        self._force_snapshot = False
+        self._pending: List[Tuple[int, tuple]] = []
+        self._lock = threading.Lock()  # очередь записей
+        self._io_lock = threading.Lock()  # сохранение и сжатие по одному
+        self.stats = {"flushed_records": 0, "flushed_bytes": 0, "snapshots": 0}
+
+    def record(self, op: str, *args: Any) -> int:
+        """Поставить изменение в очередь журнала, вернуть его номер"""
+        with self._lock:
+            self.seq += 1
+            self._pending.append((self.seq, (op, *args)))
+            return self.seq
+
+    def _read_snapshot(self) -> Tuple[Optional[Dict[str, Any]], int]:
+        if not self.snapshot_path.exists():
+            return None, 0
+        data = self.snapshot_path.read_bytes()
+        magic, seq, crc = SNAPSHOT_HEADER.unpack_from(data)
+        payload = data[SNAPSHOT_HEADER.size:]
+        if magic != SNAPSHOT_MAGIC or zlib.crc32(payload) != crc:
+            raise ValueError(f"Снимок знаний поврежден: {self.snapshot_path}")
+        return json.loads(zlib.decompress(payload)), seq
+
+    def _read_wal(self) -> List[Tuple[int, List[Any]]]:
+        """Записи журнала до первого неполного или поврежденного кадра"""
+        records = []
+        if not self.wal_path.exists():
+            return records
+        data = self.wal_path.read_bytes()
+        offset = 0
+        while offset + FRAME_HEADER.size <= len(data):
+            length, crc, seq = FRAME_HEADER.unpack_from(data, offset)
+            payload = data[offset + FRAME_HEADER.size:offset + FRAME_HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            records.append((seq, json.loads(payload)))
+            offset += FRAME_HEADER.size + length
+        if offset < len(data):
+            # Обрыв записи при сбое: отбрасываем хвост, чтобы дописывать после целых кадров
+            logger.warning(f"⚠️ Журнал знаний обрезан до {offset} байт (было {len(data)})")
+            with open(self.wal_path, "r+b") as f:
+                f.truncate(offset)
+        return records
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Состояние из снимка и журнала (None, если сохранений еще не было)
+
+        Формат состояния: knowledge_base, conversation_history, agent_capabilities.
+        Если есть только прежний saved_knowledge.json, он читается и
+        будет переписан снимком при первом сохранении.
+        """
+        state, snapshot_seq = self._read_snapshot()
+        records = self._read_wal()
+        if state is None and not records:
+            legacy_file = self.directory / LEGACY_KNOWLEDGE_FILE
+            if not legacy_file.exists():
+                return None
+            with open(legacy_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            logger.info(f"📦 Знания перенесены из {legacy_file}")
+            # Новый формат еще не записан: первое сохранение должно сделать снимок
+            self._force_snapshot = True
+        state = {**empty_state(), **(state or {})}
+        # Записи до снимка уже в нем (сбой между заменой снимка и очисткой журнала)
+        for seq, record in records:
+            if seq > snapshot_seq:
+                apply_record(state, record)
+        state["conversation_history"] = state["conversation_history"][-CONVERSATION_LIMIT:]
+        with self._lock:
+            self.snapshot_seq = snapshot_seq
+            self.seq = max([snapshot_seq] + [seq for seq, _ in records])
+        return state
+
+    def flush(self) -> int:
+        """Дописать очередь в журнал одним вызовом write + fsync, вернуть число байт"""
+        with self._io_lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        chunks = []
+        for seq, record in pending:
+            payload = _encode(record)
+            chunks.append(FRAME_HEADER.pack(len(payload), zlib.crc32(payload), seq))
+            chunks.append(payload)
+        data = b"".join(chunks)
+        try:
+            with open(self.wal_path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            # Не потерять изменения: вернем их в очередь до следующего сохранения
+            with self._lock:
+                self._pending[:0] = pending
+            raise
+        self.stats["flushed_records"] += len(pending)
+        self.stats["flushed_bytes"] += len(data)
+        return len(data)
+
+    def needs_compaction(self) -> bool:
+        """Журнал вырос настолько, что дешевле переписать снимок"""
+        if self._force_snapshot:
+            return True
+        wal_size = self.wal_path.stat().st_size if self.wal_path.exists() else 0
+        snapshot_size = self.snapshot_path.stat().st_size if self.snapshot_path.exists() else 0
+        return wal_size > 0 and wal_size >= max(self.min_compact_bytes, snapshot_size * self.compact_ratio)
+
+    def _write_snapshot(self, state: Dict[str, Any], seq: int) -> int:
+        payload = zlib.compress(_encode(state), 6)
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, seq, zlib.crc32(payload)))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        try:
+            dir_fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+        return SNAPSHOT_HEADER.size + len(payload)
+
+    def save(self, export: Callable[[], Tuple[Dict[str, Any], int]]) -> Dict[str, Any]:
+        """Сохранить изменения; при необходимости сжать журнал в снимок
+
+        export возвращает полное состояние и номер последней вошедшей в него
+        записи (вызывается только при сжатии).
+        """
+        with self._io_lock:
+            written = self._flush()
+            if not self.needs_compaction():
+                return {"wal_bytes": written, "snapshot_bytes": 0}
+            state, seq = export()
+            snapshot_bytes = self._write_snapshot(state, seq)
+            # Все записи журнала не новее снимка, очередь - только новые
+            with open(self.wal_path, "wb"):
+                pass
+            with self._lock:
+                self._pending = [(s, record) for s, record in self._pending if s > seq]
+                self.snapshot_seq = seq
+            self._force_snapshot = False
+            self.stats["snapshots"] += 1
+            logger.info(f"💾 Снимок знаний записан: {snapshot_bytes} байт, запись {seq}")
+            return {"wal_bytes": written, "snapshot_bytes": snapshot_bytes}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика хранилища"""
+        return {
+            **self.stats,
+            "seq": self.seq,
+            "snapshot_seq": self.snapshot_seq,
+            "pending": len(self._pending),
+            "wal_bytes": self.wal_path.stat().st_size if self.wal_path.exists() else 0,
+            "snapshot_bytes": self.snapshot_path.stat().st_size if self.snapshot_path.exists() else 0
+        }
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Управление моделями Ollama в оперативной памяти
+Отслеживает загруженные модели (/api/ps), заранее загружает модели,
+которые понадобятся по недавнему трафику, удерживает горячие через
+keep_alive и выгружает холодные, чтобы уложиться в бюджет памяти.
+Первый запрос после простоя не платит за загрузку модели.
+Активность модели видна по expires_at из /api/ps: Ollama сдвигает его
+при каждом запросе от любого клиента, а не только от этого процесса
+"""
+
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from ollama_client import OllamaClient, get_ollama_client
+from system_metrics import get_system_sampler
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def tagged(model: str) -> str:
+    """Имя модели с тегом, как его отдает /api/ps: llama2 -> llama2:latest"""
+    return model if ":" in model else f"{model}:latest"
+
+
+class ModelResidencyManager:
+    """Загрузка, удержание и выгрузка моделей Ollama под бюджет памяти"""
+
+    def __init__(self, client: OllamaClient = None, ram_budget_mb: float = None,
+                 traffic_window: float = 3600.0, max_hot_models: int = 2,
+                 hot_keep_alive: str = "1h", load_timeout: float = 300.0, active_grace: float = 300.0):
+        self.client = client or get_ollama_client()
+        # Бюджет памяти под модели; по умолчанию половина памяти машины
+        self.ram_budget_mb = ram_budget_mb
+        if self.ram_budget_mb is None and os.getenv("OLLAMA_RAM_BUDGET_MB"):
+            self.ram_budget_mb = float(os.getenv("OLLAMA_RAM_BUDGET_MB"))
+        self.traffic_window = traffic_window
+        self.max_hot_models = max_hot_models
+        self.hot_keep_alive = hot_keep_alive
+        self.load_timeout = load_timeout
+        # Модели, активные за это время, не выгружаются ради бюджета (keep_alive Ollama по умолчанию)
+        self.active_grace = active_grace
+        # Загруженные модели: имя -> {"size_mb", "expires_at"}
+        self.resident: Dict[str, Dict[str, Any]] = {}
+        # Последний известный размер модели в памяти, в том числе выгруженной
+        self.known_sizes: Dict[str, float] = {}
+        # Активность по /api/ps: имя -> {"expires_at", "last_active"}
+        self.activity: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"refreshes": 0, "preloads": 0, "pins": 0, "evictions": 0, "errors": 0}
+
+    def get_ram_budget_mb(self) -> float:
+        """Бюджет памяти, 0 - без ограничения"""
+        if self.ram_budget_mb is not None:
+            return self.ram_budget_mb
+        return get_system_sampler().latest().memory_total_mb * 0.5
+
+    def resident_mb(self) -> float:
+        return sum(info["size_mb"] for info in self.resident.values())
+
+    async def refresh(self) -> Dict[str, Dict[str, Any]]:
+        """Обновить список загруженных моделей через /api/ps"""
+        models = await self.client.list_running()
+        now = time.time()
+        self.resident = {}
+        for model in models:
+            name, expires_at = model["name"], model.get("expires_at")
+            size_mb = model.get("size", 0) / MB
+            self.resident[name] = {"size_mb": size_mb, "expires_at": expires_at}
+            self.known_sizes[name] = size_mb
+            # Сдвиг expires_at - запрос к модели от любого клиента; впервые увиденная модель
+            # тоже считается активной: история ее запросов этому процессу неизвестна
+            previous = self.activity.get(name)
+            if previous is None or previous["expires_at"] != expires_at:
+                self.activity[name] = {"expires_at": expires_at, "last_active": now}
+        self.activity = {name: info for name, info in self.activity.items() if name in self.resident}
+        self.stats["refreshes"] += 1
+        return self.resident
+
+    def traffic(self, now: float = None) -> Dict[str, Dict[str, float]]:
+        """Запросы к моделям за окно: число и время последнего"""
+        now = now or time.time()
+        usage: Dict[str, Dict[str, float]] = {}
+        for timestamp, model in self.client.model_requests:
+            if now - timestamp > self.traffic_window:
+                continue
+            entry = usage.setdefault(tagged(model), {"requests": 0, "last_used": 0.0})
+            entry["requests"] += 1
+            entry["last_used"] = max(entry["last_used"], timestamp)
+        return usage
+
+    def last_active(self, name: str, usage: Dict[str, Dict[str, float]]) -> float:
+        """Последнее обращение к модели: свои запросы или сдвиг expires_at в /api/ps"""
+        return max(usage.get(name, {}).get("last_used", 0.0),
+                   self.activity.get(name, {}).get("last_active", 0.0))
+
+    def predict_hot_models(self, now: float = None) -> List[str]:
+        """Модели, которые понадобятся: самые востребованные за окно"""
+        usage = self.traffic(now)
+        ranked = sorted(usage, key=lambda name: (usage[name]["requests"], usage[name]["last_used"]), reverse=True)
+        return ranked[:self.max_hot_models]
+
+    def _coldest_first(self, names, now: float = None) -> List[str]:
+        usage = self.traffic(now)
+        return sorted(names, key=lambda name: (usage.get(name, {}).get("requests", 0),
+                                               self.last_active(name, usage)))
+
+    async def evict(self, model: str) -> bool:
+        """Выгрузить модель из памяти"""
+        try:
+            await self.client.unload_model(model)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Не удалось выгрузить модель {model}: {e}")
+            return False
+        self.resident.pop(model, None)
+        self.stats["evictions"] += 1
+        logger.info(f"📤 Модель {model} выгружена из памяти")
+        return True
+
+    async def rebalance(self) -> Dict[str, Any]:
+        """Загрузить и закрепить горячие модели, выгрузить холодные сверх бюджета"""
+        await self.refresh()
+        budget = self.get_ram_budget_mb()
+        hot = self.predict_hot_models()
+        report = {"hot": hot, "preloaded": [], "pinned": [], "evicted": [], "skipped": []}
+
+        # Холодные модели уступают место горячим, пока не уложимся в бюджет
+        needed_mb = sum(self.known_sizes.get(model, 0.0) for model in hot if model not in self.resident)
+        if budget:
+            now = time.time()
+            usage = self.traffic(now)
+            for name in self._coldest_first([name for name in self.resident if name not in hot], now):
+                if self.resident_mb() + needed_mb <= budget:
+                    break
+                if now - self.last_active(name, usage) < self.active_grace:
+                    # Модель обслуживает другой клиент, выгрузка вернет ему холодный старт
+                    continue
+                if await self.evict(name):
+                    report["evicted"].append(name)
+
+        for model in hot:
+            resident = model in self.resident
+            size_mb = self.known_sizes.get(model, 0.0)
+            if not resident and budget and self.resident_mb() + size_mb > budget:
+                report["skipped"].append(model)
+                continue
+            try:
+                # Загрузка без генерации; keep_alive удерживает модель до следующей проверки
+                await self.client.load_model(model, keep_alive=self.hot_keep_alive, timeout=self.load_timeout)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Не удалось загрузить модель {model}: {e}")
+                continue
+            if resident:
+                self.stats["pins"] += 1
+                report["pinned"].append(model)
+            else:
+                self.stats["preloads"] += 1
+                report["preloaded"].append(model)
+                logger.info(f"📥 Модель {model} загружена заранее")
+
+        await self.refresh()
+        report.update({"resident": self.get_resident(), "resident_mb": self.resident_mb(), "ram_budget_mb": budget})
+        return report
+
+    async def evict_idle(self, idle_seconds: float) -> List[str]:
+        """Выгрузить загруженные модели, к которым не обращались idle_seconds"""
+        await self.refresh()
+        now = time.time()
+        usage = self.traffic(now)
+        evicted = []
+        for name in list(self.resident):
+            if now - self.last_active(name, usage) >= idle_seconds and await self.evict(name):
+                evicted.append(name)
+        return evicted
+
+    def get_resident(self) -> List[Dict[str, Any]]:
+        return [{"name": name, **info} for name, info in self.resident.items()]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "resident": self.get_resident(),
+            "resident_mb": self.resident_mb(),
+            "ram_budget_mb": self.get_ram_budget_mb(),
+            "hot_models": self.predict_hot_models()
+        }
+
+
+_residency_manager: Optional[ModelResidencyManager] = None
+
+
+def get_residency_manager() -> ModelResidencyManager:
+    """Общий менеджер памяти моделей"""
+    global _residency_manager
+    if _residency_manager is None:
+        _residency_manager = ModelResidencyManager()
+    return _residency_manager
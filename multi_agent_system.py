@@ -16,6 +16,10 @@ from enum import Enum
 import threading
 from pathlib import Path
 
+from ai_engine import TokenCallback, token_callback, prompt_context
+from vector_store import create_vector_store, format_facts
+from intent_router import get_intent_router
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -76,6 +80,7 @@ class SharedMemory:
         self.user_preferences = {}
         self.conversation_history = []
         self.shared_resources = {}
+        self.vector_store = create_vector_store("shared_memory")
         self.lock = threading.Lock()
     
     def store_knowledge(self, key: str, value: Any, agent_id: str):
@@ -88,6 +93,11 @@ class SharedMemory:
                 "agent_id": agent_id,
                 "timestamp": datetime.now().isoformat()
             })
+        self.vector_store.add(f"{key}: {str(value)[:1000]}", {"key": key, "agent_id": agent_id})
+    
+    def retrieve(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
+        """k знаний, наиболее близких к запросу"""
+        return self.vector_store.retrieve(query, k)
     
     def get_knowledge(self, key: str) -> List[Any]:
         """Получить знания по ключу"""
@@ -127,6 +137,9 @@ class BaseAgent:
         
         # Связь с общей памятью
         self.shared_memory = None
+        # Сколько релевантных фактов из памяти добавлять в промпт
+        self.retrieval_k = 3
+        self.retrieval_min_score = 0.2
         
         # Обработчики сообщений
         self.message_handlers = {}
@@ -143,12 +156,24 @@ class BaseAgent:
         self.message_handlers[skill] = handler
         logger.info(f"🔧 Агент {self.name} получил навык: {skill}")
     
-    async def process_message(self, message: AgentMessage) -> Dict[str, Any]:
-        """Обработать входящее сообщение"""
+    async def process_message(self, message: AgentMessage,
+                              on_token: Optional[TokenCallback] = None) -> Dict[str, Any]:
+        """Обработать входящее сообщение
+        
+        on_token - колбэк потоковой выдачи: AI вызовы обработчика будут
+        передавать в него фрагменты ответа по мере генерации.
+        """
+        callback_token = token_callback.set(on_token) if on_token else None
+        context_token = None
         try:
             self.status = "processing"
             self.last_activity = datetime.now().isoformat()
             
+            # Релевантные факты вместо длинной истории: AI вызовы обработчика получат их в промпте
+            context = await self._retrieve_context(message.content)
+            if context:
+                context_token = prompt_context.set(context)
+            
             # Сохраняем сообщение в общей памяти
             if self.shared_memory:
                 self.shared_memory.add_conversation({
@@ -171,6 +196,26 @@ class BaseAgent:
             logger.error(f"❌ Ошибка обработки сообщения агентом {self.name}: {e}")
             self.status = "error"
             return {"error": str(e)}
+        finally:
+            if context_token:
+                prompt_context.reset(context_token)
+            if callback_token:
+                token_callback.reset(callback_token)
+    
+    async def _retrieve_context(self, content: Dict[str, Any]) -> str:
+        """Блок релевантных фактов из векторного хранилища общей памяти"""
+        vector_store = getattr(self.shared_memory, "vector_store", None)
+        if vector_store is None or not len(vector_store) or not self.retrieval_k:
+            return ""
+        query = " ".join(str(value) for value in content.values() if isinstance(value, str))
+        if not query.strip():
+            return ""
+        try:
+            facts = await vector_store.aretrieve(query, self.retrieval_k, self.retrieval_min_score)
+        except Exception as e:
+            logger.error(f"❌ Ошибка поиска фактов для агента {self.name}: {e}")
+            return ""
+        return format_facts(facts)
     
     async def _default_handler(self, content: Dict[str, Any]) -> Dict[str, Any]:
         """Обработчик по умолчанию"""
@@ -542,8 +587,9 @@ class MultiAgentSystem:
         
         logger.info(f"✅ Создано {len(self.agents)} агентов")
     
-    async def process_user_message(self, message: str, user_id: str = "user") -> Dict[str, Any]:
-        """Обработать сообщение пользователя"""
+    async def process_user_message(self, message: str, user_id: str = "user",
+                                   on_token: Optional[TokenCallback] = None) -> Dict[str, Any]:
+        """Обработать сообщение пользователя (on_token включает потоковую выдачу ответа)"""
         try:
             # Определяем подходящего агента
             agent = self._select_agent_for_message(message)
@@ -559,7 +605,14 @@ class MultiAgentSystem:
             )
             
             # Обрабатываем сообщение
-            result = await agent.process_message(agent_message)
+            # Колбэк передаем через контекст: наследники переопределяют
+            # process_message со своей сигнатурой
+            callback_token = token_callback.set(on_token) if on_token else None
+            try:
+                result = await agent.process_message(agent_message)
+            finally:
+                if callback_token:
+                    token_callback.reset(callback_token)
             
             # Сохраняем в общей памяти
             self.shared_memory.add_conversation({
@@ -583,17 +636,9 @@ class MultiAgentSystem:
     
     def _select_agent_for_message(self, message: str) -> BaseAgent:
         """Выбрать подходящего агента для сообщения"""
-        message_lower = message.lower()
-        
-        # Ключевые слова для определения типа агента
-        if any(word in message_lower for word in ["код", "программирование", "разработка", "debug", "ошибка"]):
-            return self._get_agent_by_type(AgentType.CODE_DEVELOPER)
-        elif any(word in message_lower for word in ["анализ", "данные", "отчет", "график", "статистика"]):
-            return self._get_agent_by_type(AgentType.DATA_ANALYST)
-        elif any(word in message_lower for word in ["проект", "план", "задача", "управление", "координация"]):
-            return self._get_agent_by_type(AgentType.PROJECT_MANAGER)
-        else:
-            return self._get_agent_by_type(AgentType.GENERAL_ASSISTANT)
+        # Имена намерений набора "agent" совпадают со значениями AgentType
+        intent = get_intent_router().best(message, "agent", AgentType.GENERAL_ASSISTANT.value)
+        return self._get_agent_by_type(AgentType(intent))
     
     def _get_agent_by_type(self, agent_type: AgentType) -> BaseAgent:
         """Получить агента по типу"""
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Общий асинхронный HTTP клиент для Ollama
+Один keep-alive пул соединений к /api/generate и /api/chat
+с ограничением параллельных запросов на каждую модель
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, Any, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_PORT = 11434
+
+
+def normalize_ollama_url(value: Optional[str]) -> str:
+    """Адрес API из OLLAMA_HOST
+
+    Это та же переменная, на которой сервер Ollama слушает порт, поэтому
+    в ней часто стоит 0.0.0.0:11434 без схемы. Как и клиент Ollama,
+    добавляем http:// и порт 11434, а адрес "все интерфейсы" заменяем на localhost
+    """
+    value = (value or "").strip() or f"http://localhost:{OLLAMA_PORT}"
+    default_port = None
+    if "://" not in value:
+        value = f"http://{value}"
+        default_port = OLLAMA_PORT
+    parts = urlsplit(value)
+    host = parts.hostname or "localhost"
+    if host in ("0.0.0.0", "::"):
+        host = "localhost"
+    if ":" in host:
+        host = f"[{host}]"
+    port = parts.port or default_port
+    netloc = f"{host}:{port}" if port else host
+    return urlunsplit((parts.scheme, netloc, parts.path.rstrip('/'), "", ""))
+
+
+DEFAULT_OLLAMA_URL = normalize_ollama_url(os.getenv("OLLAMA_HOST"))
+
+
+class OllamaError(Exception):
+    """Ошибка ответа Ollama API"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+class OllamaClient:
+    """Асинхронный клиент Ollama с общим пулом соединений"""
+
+    def __init__(self, base_url: str = DEFAULT_OLLAMA_URL, max_connections: int = 16,
+                 per_model_limit: int = 2, max_in_flight: int = 8, timeout: float = 120.0):
+        self.base_url = normalize_ollama_url(base_url)
+        self.max_connections = max_connections
+        self.per_model_limit = per_model_limit
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.timeout = timeout
+        # Сессии и семафоры привязаны к event loop (uvicorn и основной цикл
+        # JARVIS работают в разных потоках), поэтому храним их по loop.
+        # Слабые ключи не помогли бы: сессия держит ссылку на свой loop
+        self._loop_state: Dict[asyncio.AbstractEventLoop, Dict[str, Any]] = {}
+        self.stats = {
+            "requests": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "total_time": 0.0
+        }
+        # Время и модель последних генераций - для прогноза горячих моделей
+        self.model_requests = deque(maxlen=1000)
+
+    def _get_loop_state(self) -> Dict[str, Any]:
+        """Пул соединений и семафоры текущего event loop"""
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None or state["session"].closed:
+            if state is not None:
+                state["closer"].cancel()
+            self._forget_closed_loops()
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=300
+            )
+            state = {
+                "session": aiohttp.ClientSession(connector=connector),
+                "in_flight": asyncio.Semaphore(self.max_in_flight),
+                "semaphores": {}
+            }
+            self._loop_state[loop] = state
+            state["closer"] = loop.create_task(self._close_on_shutdown(loop, state))
+        return state
+
+    async def _close_on_shutdown(self, loop: asyncio.AbstractEventLoop, state: Dict[str, Any]):
+        """Закрыть сессию при остановке цикла
+
+        asyncio.run перед закрытием цикла отменяет оставшиеся задачи и дает
+        им завершиться, поэтому пул не переживает свой event loop даже без close()
+        """
+        try:
+            await loop.create_future()
+        finally:
+            if self._loop_state.get(loop) is state:
+                del self._loop_state[loop]
+            if not state["session"].closed:
+                await state["session"].close()
+
+    def _forget_closed_loops(self):
+        """Убрать состояние циклов, закрытых без отмены задач (loop.close() напрямую)"""
+        for loop in [loop for loop in self._loop_state if loop.is_closed()]:
+            del self._loop_state[loop]
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Получить сессию, привязанную к текущему event loop"""
+        return self._get_loop_state()["session"]
+
+    def _get_model_semaphore(self, model: str) -> asyncio.Semaphore:
+        """Семафор, ограничивающий число параллельных запросов к модели"""
+        semaphores = self._get_loop_state()["semaphores"]
+        semaphore = semaphores.get(model)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_model_limit)
+            semaphores[model] = semaphore
+        return semaphore
+
+    async def _post(self, path: str, model: str, payload: Dict[str, Any],
+                    timeout: Optional[float] = None) -> Dict[str, Any]:
+        """POST запрос к Ollama с учетом лимитов модели и общего числа запросов"""
+        state = self._get_loop_state()
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        start_time = time.time()
+        self.stats["requests"] += 1
+
+        try:
+            async with state["in_flight"], self._get_model_semaphore(model):
+                self.in_flight += 1
+                try:
+                    # Отмена задачи закрывает соединение, и Ollama прекращает генерацию
+                    async with state["session"].post(f"{self.base_url}{path}", json=payload,
+                                                     timeout=client_timeout) as response:
+                        if response.status != 200:
+                            raise OllamaError(response.status, await response.text())
+                        return await response.json()
+                finally:
+                    self.in_flight -= 1
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["total_time"] += time.time() - start_time
+
+    def _record_use(self, model: str):
+        self.model_requests.append((time.time(), model))
+
+    async def generate(self, model: str, prompt: str, system: str = None,
+                       options: Dict[str, Any] = None, timeout: float = None) -> Dict[str, Any]:
+        """Генерация ответа через /api/generate"""
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False
+        }
+        if system:
+            payload["system"] = system
+        if options:
+            payload["options"] = options
+
+        self._record_use(model)
+        return await self._post("/api/generate", model, payload, timeout)
+
+    async def generate_stream(self, model: str, prompt: str, system: str = None,
+                              options: Dict[str, Any] = None,
+                              timeout: float = None) -> AsyncIterator[Dict[str, Any]]:
+        """Потоковая генерация через /api/generate: отдает NDJSON чанки по мере готовности
+
+        Последний чанк содержит "done": true и итоговую статистику Ollama.
+        """
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": True
+        }
+        if system:
+            payload["system"] = system
+        if options:
+            payload["options"] = options
+
+        self._record_use(model)
+        state = self._get_loop_state()
+        # Общий таймаут ограничивает всю генерацию, sock_read - паузу между токенами
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout,
+                                               sock_read=timeout or self.timeout)
+        start_time = time.time()
+        self.stats["requests"] += 1
+
+        try:
+            async with state["in_flight"], self._get_model_semaphore(model):
+                self.in_flight += 1
+                try:
+                    async with state["session"].post(f"{self.base_url}/api/generate", json=payload,
+                                                     timeout=client_timeout) as response:
+                        if response.status != 200:
+                            raise OllamaError(response.status, await response.text())
+                        try:
+                            async for line in response.content:
+                                line = line.strip()
+                                if not line:
+                                    continue
+                                chunk = json.loads(line)
+                                if "error" in chunk:
+                                    raise OllamaError(response.status, chunk["error"])
+                                yield chunk
+                                if chunk.get("done"):
+                                    break
+                        except (GeneratorExit, asyncio.CancelledError):
+                            # Разрываем соединение, а не возвращаем его в пул:
+                            # Ollama прекращает генерацию, когда клиент отключился
+                            response.close()
+                            raise
+                finally:
+                    self.in_flight -= 1
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        except (GeneratorExit, asyncio.CancelledError):
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.stats["total_time"] += time.time() - start_time
+
+    async def chat(self, model: str, messages: List[Dict[str, str]],
+                   options: Dict[str, Any] = None, timeout: float = None) -> Dict[str, Any]:
+        """Диалог через /api/chat"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": False
+        }
+        if options:
+            payload["options"] = options
+
+        self._record_use(model)
+        return await self._post("/api/chat", model, payload, timeout)
+
+    async def list_models(self, timeout: float = 5.0) -> List[str]:
+        """Список установленных моделей через /api/tags"""
+        session = self._get_session()
+        async with session.get(f"{self.base_url}/api/tags",
+                               timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                raise OllamaError(response.status, await response.text())
+            data = await response.json()
+            return [model["name"] for model in data.get("models", [])]
+
+    async def list_running(self, timeout: float = 5.0) -> List[Dict[str, Any]]:
+        """Загруженные в память модели через /api/ps: имя, размер, время выгрузки"""
+        session = self._get_session()
+        async with session.get(f"{self.base_url}/api/ps",
+                               timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                raise OllamaError(response.status, await response.text())
+            data = await response.json()
+            return data.get("models", [])
+
+    async def load_model(self, model: str, keep_alive: Any = "5m", timeout: float = None) -> Dict[str, Any]:
+        """Загрузить модель в память без генерации и задать время удержания
+
+        keep_alive: длительность ("30m"), -1 - держать постоянно, 0 - выгрузить сразу
+        """
+        return await self._post("/api/generate", model, {"model": model, "keep_alive": keep_alive}, timeout)
+
+    async def unload_model(self, model: str, timeout: float = 30.0) -> Dict[str, Any]:
+        """Выгрузить модель из памяти"""
+        return await self.load_model(model, keep_alive=0, timeout=timeout)
+
+    async def delete_model(self, model: str, timeout: float = 30.0):
+        """Удалить модель с диска через /api/delete"""
+        session = self._get_session()
+        async with session.delete(f"{self.base_url}/api/delete", json={"name": model},
+                                  timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                raise OllamaError(response.status, await response.text())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика клиента"""
+        requests_count = self.stats["requests"]
+        return {
+            **self.stats,
+            "average_time": self.stats["total_time"] / requests_count if requests_count else 0.0,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "per_model_limit": self.per_model_limit,
+            "max_connections": self.max_connections
+        }
+
+    async def close(self):
+        """Закрытие пула соединений текущего event loop"""
+        state = self._loop_state.pop(asyncio.get_running_loop(), None)
+        if state:
+            state["closer"].cancel()
+            if not state["session"].closed:
+                await state["session"].close()
+
+
+_clients: Dict[str, OllamaClient] = {}
+
+
+def get_ollama_client(base_url: str = DEFAULT_OLLAMA_URL) -> OllamaClient:
+    """Общий клиент для указанного адреса Ollama"""
+    base_url = normalize_ollama_url(base_url)
+    client = _clients.get(base_url)
+    if client is None:
+        client = OllamaClient(base_url)
+        _clients[base_url] = client
+    return client
@@ -16,11 +16,11 @@ from typing import Dict, List, Any, Optional
 from pathlib import Path
 
 import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse, JSONResponse
 
 # Импортируем AI движок
-from ai_engine import OllamaEngine, AIResponse
+from ai_engine import OllamaEngine, AIResponse, cancel_on_disconnect
 
 # Настройка логирования
 logging.basicConfig(
@@ -587,7 +587,7 @@ async def get_system_status():
     # Получаем детальный статус AI движка
     ai_health = {}
     if ai_engine:
-        ai_health = ai_engine.get_health_status()
+        ai_health = await ai_engine.get_health_status()
     
     return {
         "system_status": "running" if system_running else "stopped",
@@ -595,7 +595,7 @@ async def get_system_status():
         "active_agents": active_count,
         "uptime": f"{uptime_minutes}м",
         "autonomous_tasks": len(autonomous_tasks),
-        "ai_engine_status": "connected" if ai_engine and ai_engine.is_available() else "disconnected",
+        "ai_engine_status": "connected" if ai_health.get("status") == "healthy" else "disconnected",
         "ai_health": ai_health,
         "timestamp": datetime.now().isoformat()
     }
@@ -652,8 +652,7 @@ async def get_system_logs():
         logger.error(f"❌ Ошибка чтения логов: {e}")
         return {"error": str(e), "logs": []}
 
-@app.post("/api/chat/send")
-async def send_message(data: dict):
+async def process_chat_message(data: dict) -> Dict[str, Any]:
     """Отправить сообщение AI агенту"""
     global agents
     
@@ -680,6 +679,14 @@ async def send_message(data: dict):
         "timestamp": datetime.now().isoformat()
     }
 
+@app.post("/api/chat/send")
+async def send_message(data: dict, request: Request):
+    """Отправить сообщение AI агенту (генерация отменяется при отключении клиента)"""
+    result = await cancel_on_disconnect(request, process_chat_message(data))
+    if result is None:
+        return {"error": "Клиент отключился"}
+    return result
+
 @app.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
     """WebSocket для реального времени"""
@@ -691,7 +698,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
             message_data = json.loads(data)
             
             # Обрабатываем сообщение
-            response = await send_message(message_data)
+            response = await process_chat_message(message_data)
             
             if response.get("success"):
                 result = response["response"]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Кэш ответов языковых моделей
+Ограниченный по числу записей и объему LRU кэш с TTL
+и необязательным уровнем на диске (SQLite), который переживает перезапуск
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DB = os.getenv("AI_RESPONSE_CACHE_DB")
+
+
+def make_cache_key(model: str, prompt: str, system_prompt: Optional[str] = None,
+                   options: Optional[Dict[str, Any]] = None) -> str:
+    """Ключ кэша: хэш полного промпта, системного промпта, модели и параметров генерации"""
+    payload = json.dumps(
+        {"model": model, "prompt": prompt, "system": system_prompt or "", "options": options or {}},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU кэш ответов с ограничением по записям, байтам и TTL"""
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 16 * 1024 * 1024,
+                 ttl: float = 3600.0, db_path: Optional[str] = DEFAULT_CACHE_DB,
+                 max_disk_entries: int = 10000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        # key -> (value, expires_at, size)
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float, int]]" = OrderedDict()
+        self._bytes = 0
+        # Кэш используется из event loop и из потоков JARVIS
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "disk_hits": 0,
+            "disk_errors": 0
+        }
+
+        self.db_path = db_path
+        self._db = None
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str):
+        """Открытие дискового уровня кэша"""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_response_cache_access ON response_cache(last_access)"
+            )
+            self._db.commit()
+            logger.info(f"💾 Дисковый кэш ответов: {db_path}")
+        except sqlite3.Error as e:
+            logger.error(f"❌ Не удалось открыть дисковый кэш {db_path}: {e}")
+            self._db = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Получить значение по ключу или None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, size = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return dict(value)
+                self._remove(key)
+                self.stats["expirations"] += 1
+
+            value, expires_at = self._disk_get(key, now)
+            if value is not None:
+                self._store(key, value, expires_at)
+                self.stats["hits"] += 1
+                self.stats["disk_hits"] += 1
+                return dict(value)
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None):
+        """Сохранить значение (JSON-сериализуемый словарь) с TTL в секундах"""
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._store(key, dict(value), expires_at)
+            self._disk_set(key, value, expires_at)
+
+    def _store(self, key: str, value: Dict[str, Any], expires_at: float):
+        """Запись в память с вытеснением давно неиспользуемых записей"""
+        size = len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.stats["evictions"] += 1
+
+    def _remove(self, key: str):
+        """Удаление записи из памяти"""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _disk_get(self, key: str, now: float) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Чтение записи с диска"""
+        if self._db is None:
+            return None, 0.0
+        try:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, 0.0
+            if row[1] <= now:
+                self._db.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None, 0.0
+            self._db.execute("UPDATE response_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return json.loads(row[0]), row[1]
+        except (sqlite3.Error, ValueError) as e:
+            self.stats["disk_errors"] += 1
+            logger.warning(f"⚠️ Ошибка чтения дискового кэша: {e}")
+            return None, 0.0
+
+    def _disk_set(self, key: str, value: Dict[str, Any], expires_at: float):
+        """Запись на диск с ограничением числа записей"""
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, time.time())
+            )
+            self._db.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                "SELECT key FROM response_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,)
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            self.stats["disk_errors"] += 1
+            logger.warning(f"⚠️ Ошибка записи дискового кэша: {e}")
+
+    def clear(self):
+        """Очистка кэша в памяти и на диске"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика кэша"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "disk_enabled": self._db is not None
+        }
+
+    def close(self):
+        """Закрытие дискового уровня"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
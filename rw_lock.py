@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Блокировка чтения/записи для общих структур агентов
+Читатели не ждут друг друга, писатель получает монопольный доступ.
+Ожидающий писатель не пропускает новых читателей, поэтому частые
+поиски не могут бесконечно откладывать запись
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict
+
+
+class ReadWriteLock:
+    """Блокировка чтения/записи с приоритетом писателя
+
+    read() и write() - контекстные менеджеры. Блокировка не реентерабельна:
+    повторный захват в том же потоке при ожидающем писателе приведет к
+    взаимоблокировке. ``with lock:`` эквивалентно ``with lock.write():``,
+    так что код, использующий обычный threading.Lock, продолжает работать.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self.stats = {"reads": 0, "writes": 0, "read_waits": 0, "write_waits": 0}
+
+    def acquire_read(self) -> None:
+        with self._cond:
+            self.stats["reads"] += 1
+            if self._writer or self._waiting_writers:
+                self.stats["read_waits"] += 1
+                while self._writer or self._waiting_writers:
+                    self._cond.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        with self._cond:
+            self._readers -= 1
+            if not self._readers and self._waiting_writers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        with self._cond:
+            self.stats["writes"] += 1
+            if self._writer or self._readers:
+                self.stats["write_waits"] += 1
+                self._waiting_writers += 1
+                try:
+                    while self._writer or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def __enter__(self):
+        self.acquire_write()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release_write()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Счетчики захватов и ожиданий"""
+        with self._cond:
+            return {**self.stats, "readers": self._readers, "writer": self._writer,
+                    "waiting_writers": self._waiting_writers}
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Семантический кэш ответов AI
+Находит ранее заданные похожие промпты по косинусной близости эмбеддингов
+и возвращает сохраненный ответ без обращения к модели
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import zlib
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+DEFAULT_EMBEDDER = os.getenv("SEMANTIC_CACHE_EMBEDDER", "hashing")
+
+# Слова, числа и отдельные значимые символы (операторы, знаки сравнения, пунктуация)
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+class HashingVectorizer:
+    """Эмбеддинг на хэшированных словах, символьных n-граммах и парах соседних токенов (без внешних моделей)"""
+
+    name = "hashing"
+    # Вычисление занимает микросекунды, выносить в поток не нужно
+    blocking = False
+
+    # Веса признаков: n-граммы сглаживают формы слов, а целые слова, числа,
+    # символы и пары токенов различают запросы с разным смыслом
+    WORD_WEIGHT = 2.0
+    NGRAM_WEIGHT = 1.0
+    EXACT_WEIGHT = 4.0
+    BIGRAM_WEIGHT = 1.0
+
+    def __init__(self, dim: int = 1024, ngram: int = 3):
+        self.dim = dim
+        self.ngram = ngram
+
+    def _features(self, text: str) -> List[Tuple[str, float]]:
+        """Признаки текста с весами
+
+        Слова - целиком и символьными n-граммами с маркерами границ;
+        числа и символы - только целиком (1234 и 1235, + и - различаются);
+        пары соседних токенов учитывают порядок и операторы между ними
+        """
+        features = []
+        tokens = _TOKEN_RE.findall(text.lower())
+        for token in tokens:
+            if token.isdigit() or not token[0].isalnum() and token[0] != "_":
+                features.append((f"#{token}", self.EXACT_WEIGHT))
+                continue
+            features.append((token, self.WORD_WEIGHT))
+            padded = f"<{token}>"
+            features.extend((padded[i:i + self.ngram], self.NGRAM_WEIGHT)
+                            for i in range(len(padded) - self.ngram + 1))
+        features.extend((f"{left} {right}", self.BIGRAM_WEIGHT) for left, right in zip(tokens, tokens[1:]))
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        """Нормированный вектор текста"""
+        features = self._features(text)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if not features:
+            return vector
+        # crc32 стабилен между перезапусками, в отличие от hash()
+        indices = np.fromiter((zlib.crc32(f.encode("utf-8")) % self.dim for f, _ in features),
+                              dtype=np.int64, count=len(features))
+        weights = np.fromiter((w for _, w in features), dtype=np.float32, count=len(features))
+        vector += np.bincount(indices, weights=weights, minlength=self.dim).astype(np.float32)
+        np.sqrt(vector, out=vector)  # Сглаживаем частые n-граммы
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEmbedder:
+    """Эмбеддинг локальной моделью sentence-transformers на CPU"""
+
+    blocking = True
+
+    def __init__(self, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"):
+        from sentence_transformers import SentenceTransformer
+        self.name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, text: str) -> np.ndarray:
+        """Нормированный вектор текста"""
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+def create_embedder(name: str = DEFAULT_EMBEDDER):
+    """Создать эмбеддер по имени: hashing или имя модели sentence-transformers"""
+    if name and name != "hashing":
+        try:
+            return SentenceTransformerEmbedder(name)
+        except ImportError as e:
+            logger.warning(f"sentence-transformers не найден: {e}, используем хэширование n-грамм")
+    return HashingVectorizer()
+
+
+class SemanticCache:
+    """Кэш ответов с поиском ближайшего промпта по матрице эмбеддингов"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, capacity: int = 5000, embedder=None):
+        self.threshold = threshold
+        self.capacity = capacity
+        self.embedder = embedder or create_embedder()
+        # Строки матрицы переиспользуются по кругу, старые ответы вытесняются
+        self._vectors = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        self._namespaces = np.full(capacity, -1, dtype=np.int32)
+        self._answers: List[Optional[str]] = [None] * capacity
+        self._generation_times = np.zeros(capacity, dtype=np.float64)
+        self._namespace_ids: Dict[str, int] = {}
+        self._count = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "saved_seconds": 0.0
+        }
+        # Распределение лучшей близости для промахов и попаданий, шаг 0.05
+        self.similarity_histogram = [0] * 20
+
+    async def _embed(self, text: str) -> np.ndarray:
+        """Эмбеддинг, тяжелые модели считаются вне event loop"""
+        if self.embedder.blocking:
+            return await asyncio.to_thread(self.embedder.embed, text)
+        return self.embedder.embed(text)
+
+    def _namespace_id(self, namespace: str) -> int:
+        namespace_id = self._namespace_ids.get(namespace)
+        if namespace_id is None:
+            namespace_id = len(self._namespace_ids)
+            self._namespace_ids[namespace] = namespace_id
+        return namespace_id
+
+    def _best_match(self, vector: np.ndarray, namespace_id: int):
+        """Индекс и близость ближайшего промпта в том же пространстве имен"""
+        if self._count == 0:
+            return -1, 0.0
+        scores = self._vectors[:self._count] @ vector
+        scores[self._namespaces[:self._count] != namespace_id] = -1.0
+        index = int(np.argmax(scores))
+        return index, float(scores[index])
+
+    async def lookup(self, prompt: str, namespace: str = "") -> Optional[str]:
+        """Найти ответ на похожий промпт или None"""
+        vector = await self._embed(prompt)
+        with self._lock:
+            self.stats["lookups"] += 1
+            index, similarity = self._best_match(vector, self._namespace_id(namespace))
+            bucket = min(len(self.similarity_histogram) - 1, max(0, int(similarity * 20)))
+            self.similarity_histogram[bucket] += 1
+
+            if index >= 0 and similarity >= self.threshold:
+                self.stats["hits"] += 1
+                self.stats["saved_seconds"] += self._generation_times[index]
+                return self._answers[index]
+
+            self.stats["misses"] += 1
+            return None
+
+    async def add(self, prompt: str, answer: str, namespace: str = "", generation_time: float = 0.0):
+        """Сохранить ответ модели для промпта"""
+        vector = await self._embed(prompt)
+        with self._lock:
+            namespace_id = self._namespace_id(namespace)
+            index, similarity = self._best_match(vector, namespace_id)
+            # Почти тот же промпт обновляет существующую строку
+            if index < 0 or similarity < 0.999:
+                index = self._next
+                self._next = (self._next + 1) % self.capacity
+                self._count = min(self._count + 1, self.capacity)
+            self._vectors[index] = vector
+            self._namespaces[index] = namespace_id
+            self._answers[index] = answer
+            self._generation_times[index] = generation_time
+
+    def clear(self):
+        """Очистка кэша"""
+        with self._lock:
+            self._namespaces.fill(-1)
+            self._answers = [None] * self.capacity
+            self._count = 0
+            self._next = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика кэша для подбора порога"""
+        lookups = self.stats["lookups"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "entries": self._count,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "embedder": self.embedder.name,
+            "similarity_histogram": {
+                f"{i / 20:.2f}": count for i, count in enumerate(self.similarity_histogram) if count
+            }
+        }
+
+
+# Глобальный семантический кэш для generate_ai_response
+semantic_cache = SemanticCache()
@@ -133,7 +133,7 @@ class SimpleCloudSystem:
         """Проверка здоровья системы"""
         try:
             # Проверяем AI движок
-            ai_status = ai_engine.get_status()
+            ai_status = await ai_engine.refresh_status()
             ai_healthy = ai_status.get("default_engine") != "none"
             
             # Проверяем систему агентов
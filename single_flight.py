@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Объединение одинаковых одновременных запросов к моделям (single-flight)
+Первый вызов с данным ключом выполняет запрос, одновременные дубликаты
+ждут тот же результат. Потоковые подписчики получают тот же поток
+фрагментов: пришедшим позже сначала отдаются уже сгенерированные.
+Запрос отменяется, когда отменены или ушли все ожидающие
+"""
+
+import asyncio
+import logging
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Колбэк потоковой выдачи: получает очередной фрагмент текста
+TokenCallback = Callable[[str], Awaitable[None]]
+
+
+class _Flight:
+    """Выполняющийся запрос и его потоковые подписчики"""
+
+    def __init__(self, streaming: bool):
+        self.streaming = streaming
+        self.task: Optional[asyncio.Task] = None
+        self.tokens: List[str] = []
+        self.subscribers: List[TokenCallback] = []
+        # Число вызовов, ожидающих результат
+        self.waiters = 0
+
+    async def emit(self, text: str):
+        """Передать фрагмент всем подписчикам; сбойный подписчик отключается"""
+        self.tokens.append(text)
+        for callback in list(self.subscribers):
+            try:
+                await callback(text)
+            except Exception as e:
+                logger.warning(f"⚠️ Подписчик потока отключен: {e}")
+                if callback in self.subscribers:
+                    self.subscribers.remove(callback)
+
+    async def subscribe(self, callback: TokenCallback):
+        """Догнать уже выданные фрагменты и подписаться на следующие"""
+        sent = 0
+        while sent < len(self.tokens):
+            await callback(self.tokens[sent])
+            sent += 1
+        self.subscribers.append(callback)
+
+
+class SingleFlight:
+    """Не более одного выполняющегося запроса на ключ в каждом event loop"""
+
+    def __init__(self):
+        # Задачи и будущие результаты привязаны к своему event loop
+        self._flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _Flight]]" = \
+            weakref.WeakKeyDictionary()
+        self.stats = {"leaders": 0, "coalesced": 0, "streams_shared": 0, "cancelled": 0}
+
+    def _loop_flights(self) -> Dict[str, _Flight]:
+        loop = asyncio.get_running_loop()
+        flights = self._flights.get(loop)
+        if flights is None:
+            flights = self._flights[loop] = {}
+        return flights
+
+    async def do(self, key: str, func: Callable[[Optional[TokenCallback]], Awaitable[Any]],
+                 on_token: Optional[TokenCallback] = None,
+                 text_of: Optional[Callable[[Any], str]] = None) -> Any:
+        """Выполнить func или дождаться уже выполняющегося вызова с тем же ключом
+
+        func получает колбэк выдачи фрагментов (или None, если первый вызов
+        не потоковый). Потоковый вызов, присоединившийся к непотоковому,
+        получает text_of(результат) одним фрагментом. Запрос выполняется
+        отдельной задачей: отмена одного из ожидающих не прерывает его
+        для остальных, отмена последнего - прерывает
+        """
+        flights = self._loop_flights()
+        flight = flights.get(key)
+        if flight is None:
+            flight = flights[key] = _Flight(streaming=on_token is not None)
+            if on_token:
+                flight.subscribers.append(on_token)
+            flight.task = asyncio.ensure_future(func(flight.emit if flight.streaming else None))
+            flight.task.add_done_callback(lambda _: flights.pop(key, None) if flights.get(key) is flight else None)
+            self.stats["leaders"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            if on_token and flight.streaming and on_token not in flight.subscribers:
+                self.stats["streams_shared"] += 1
+                await flight.subscribe(on_token)
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if on_token in flight.subscribers:
+                flight.subscribers.remove(on_token)
+            if flight.waiters == 0 and not flight.task.done():
+                # Результат больше никому не нужен: прерываем запрос (для Ollama - разрыв соединения)
+                flight.task.cancel()
+                if flights.get(key) is flight:
+                    flights.pop(key)
+                self.stats["cancelled"] += 1
+        if on_token and not flight.streaming and text_of:
+            text = text_of(result)
+            if text:
+                await on_token(text)
+        return result
+
+    def in_flight(self) -> int:
+        """Число выполняющихся запросов в текущем event loop"""
+        return len(self._loop_flights())
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.stats["leaders"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "coalesced_ratio": self.stats["coalesced"] / total if total else 0.0
+        }
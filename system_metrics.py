@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Общий сборщик системных метрик
+Один фоновый поток читает /proc (или psutil) с заданной частотой и хранит
+последние снимки в кольцевом буфере. Все модули читают готовый снимок
+вместо запуска top/free/df и блокирующего psutil.cpu_percent(interval=1)
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = float(os.getenv("SYSTEM_METRICS_INTERVAL", "5"))
+
+
+@dataclass
+class SystemSnapshot:
+    """Снимок системных метрик"""
+    timestamp: float
+    cpu_percent: float = 0.0
+    memory_percent: float = 0.0
+    memory_used_mb: float = 0.0
+    memory_total_mb: float = 0.0
+    disk_percent: float = 0.0
+    net_bytes_sent: int = 0
+    net_bytes_recv: int = 0
+    load_average: float = 0.0
+    process_cpu_percent: float = 0.0
+    process_memory_mb: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ProcReader:
+    """Чтение метрик из /proc без запуска процессов"""
+
+    def __init__(self, disk_path: str = "/"):
+        self.disk_path = disk_path
+        self._clock_ticks = os.sysconf("SC_CLK_TCK")
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+        self._last_cpu = self._read_cpu_times()
+        self._last_process = (self._read_process_ticks(), time.monotonic())
+
+    @staticmethod
+    def available() -> bool:
+        return os.path.exists("/proc/stat") and os.path.exists("/proc/meminfo")
+
+    def _read_cpu_times(self):
+        with open("/proc/stat") as f:
+            values = [int(v) for v in f.readline().split()[1:]]
+        idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+        return sum(values), idle
+
+    def _read_process_ticks(self) -> int:
+        with open("/proc/self/stat") as f:
+            # Имя процесса может содержать пробелы, поля после ')' фиксированы
+            fields = f.read().rsplit(")", 1)[1].split()
+        return int(fields[11]) + int(fields[12])  # utime + stime
+
+    def _cpu_percent(self) -> float:
+        total, idle = self._read_cpu_times()
+        last_total, last_idle = self._last_cpu
+        self._last_cpu = (total, idle)
+        delta_total = total - last_total
+        if delta_total <= 0:
+            return 0.0
+        return 100.0 * (1 - (idle - last_idle) / delta_total)
+
+    def _process_cpu_percent(self) -> float:
+        ticks, now = self._read_process_ticks(), time.monotonic()
+        last_ticks, last_time = self._last_process
+        self._last_process = (ticks, now)
+        elapsed = now - last_time
+        if elapsed <= 0:
+            return 0.0
+        return 100.0 * (ticks - last_ticks) / self._clock_ticks / elapsed
+
+    def _memory(self):
+        meminfo = {}
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                meminfo[key] = int(value.split()[0])
+        total = meminfo["MemTotal"]
+        available = meminfo.get("MemAvailable", meminfo.get("MemFree", 0))
+        return total, total - available
+
+    def _network(self):
+        sent = recv = 0
+        with open("/proc/net/dev") as f:
+            for line in f.readlines()[2:]:
+                interface, data = line.split(":", 1)
+                if interface.strip() == "lo":
+                    continue
+                fields = data.split()
+                recv += int(fields[0])
+                sent += int(fields[8])
+        return sent, recv
+
+    def _process_memory_mb(self) -> float:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * self._page_size / 1024 / 1024
+
+    def sample(self) -> SystemSnapshot:
+        total_kb, used_kb = self._memory()
+        disk = os.statvfs(self.disk_path)
+        disk_total = disk.f_blocks * disk.f_frsize
+        disk_used = (disk.f_blocks - disk.f_bfree) * disk.f_frsize
+        try:
+            sent, recv = self._network()
+        except OSError:
+            sent = recv = 0
+        return SystemSnapshot(
+            timestamp=time.time(),
+            cpu_percent=self._cpu_percent(),
+            memory_percent=100.0 * used_kb / total_kb if total_kb else 0.0,
+            memory_used_mb=used_kb / 1024,
+            memory_total_mb=total_kb / 1024,
+            disk_percent=100.0 * disk_used / disk_total if disk_total else 0.0,
+            net_bytes_sent=sent,
+            net_bytes_recv=recv,
+            load_average=os.getloadavg()[0],
+            process_cpu_percent=self._process_cpu_percent(),
+            process_memory_mb=self._process_memory_mb()
+        )
+
+
+class PsutilReader:
+    """Чтение метрик через psutil (для систем без /proc)"""
+
+    def __init__(self, disk_path: str = "/"):
+        self.disk_path = disk_path
+        self._process = psutil.Process()
+        # Первый вызов без интервала запоминает отсчет и не блокирует
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+
+    def sample(self) -> SystemSnapshot:
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+        network = psutil.net_io_counters()
+        return SystemSnapshot(
+            timestamp=time.time(),
+            cpu_percent=psutil.cpu_percent(interval=None),
+            memory_percent=memory.percent,
+            memory_used_mb=(memory.total - memory.available) / 1024 / 1024,
+            memory_total_mb=memory.total / 1024 / 1024,
+            disk_percent=disk.percent,
+            net_bytes_sent=network.bytes_sent,
+            net_bytes_recv=network.bytes_recv,
+            load_average=os.getloadavg()[0] if hasattr(os, "getloadavg") else 0.0,
+            process_cpu_percent=self._process.cpu_percent(interval=None),
+            process_memory_mb=self._process.memory_info().rss / 1024 / 1024
+        )
+
+
+class SystemMetricsSampler:
+    """Фоновый сборщик метрик с кольцевым буфером снимков"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, history_size: int = 720, disk_path: str = "/"):
+        self.interval = interval
+        self.history: deque = deque(maxlen=history_size)
+        if ProcReader.available():
+            self.reader = ProcReader(disk_path)
+        elif psutil is not None:
+            self.reader = PsutilReader(disk_path)
+        else:
+            self.reader = None
+            logger.warning("⚠️ Нет /proc и psutil, системные метрики недоступны")
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.samples_taken = 0
+        self.sample_time = 0.0
+
+    def sample_now(self) -> SystemSnapshot:
+        """Снять метрики немедленно и добавить в буфер"""
+        start = time.perf_counter()
+        try:
+            snapshot = self.reader.sample() if self.reader else SystemSnapshot(timestamp=time.time())
+        except Exception as e:
+            logger.error(f"❌ Ошибка сбора системных метрик: {e}")
+            snapshot = SystemSnapshot(timestamp=time.time())
+        with self._lock:
+            self.history.append(snapshot)
+            self.samples_taken += 1
+            self.sample_time += time.perf_counter() - start
+        return snapshot
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample_now()
+
+    def start(self):
+        """Запуск фонового потока (повторный вызов ничего не делает)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="system-metrics", daemon=True)
+            self._thread.start()
+        if not self.history:
+            self.sample_now()
+        logger.info(f"📊 Сборщик системных метрик запущен (интервал {self.interval} сек)")
+
+    def stop(self):
+        """Остановка фонового потока"""
+        self._stop.set()
+
+    def latest(self) -> SystemSnapshot:
+        """Последний снимок без обращения к системе"""
+        with self._lock:
+            if self.history:
+                return self.history[-1]
+        return self.sample_now()
+
+    def recent(self, count: int = 60) -> List[SystemSnapshot]:
+        """Последние снимки в хронологическом порядке"""
+        with self._lock:
+            return list(self.history)[-count:]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика сборщика"""
+        return {
+            "interval": self.interval,
+            "reader": type(self.reader).__name__ if self.reader else None,
+            "samples_taken": self.samples_taken,
+            "history_size": len(self.history),
+            "average_sample_ms": self.sample_time / self.samples_taken * 1000 if self.samples_taken else 0.0
+        }
+
+
+_sampler: Optional[SystemMetricsSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_system_sampler() -> SystemMetricsSampler:
+    """Общий запущенный сборщик метрик процесса"""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = SystemMetricsSampler()
+            _sampler.start()
+        return _sampler
+
+
+def get_system_snapshot() -> SystemSnapshot:
+    """Последний снимок системных метрик"""
+    return get_system_sampler().latest()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Планировщик задач JARVIS
+Очередь с приоритетами на куче, пул асинхронных воркеров,
+пул потоков для блокирующих модулей и лимиты параллельности по типу задачи
+"""
+
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Очередь задач переполнена"""
+
+
+class TaskScheduler:
+    """Планировщик задач с приоритетами и пулом воркеров
+
+    Задачи - объекты с полями id, type, priority, status и parameters.
+    Больший priority выполняется раньше, при равенстве - в порядке постановки.
+    submit() можно вызывать из любого потока и event loop: воркеры
+    просыпаются сразу, без периодического опроса очереди.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 1000, thread_workers: int = 4,
+                 type_limits: Optional[Dict[str, int]] = None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.type_limits = dict(type_limits or {})
+        self.handlers: Dict[str, Callable] = {}
+        self.default_handler: Optional[Callable] = None
+        # Колбэки смены статуса задачи (например, сохранение в хранилище)
+        self.on_start: Optional[Callable] = None
+        self.on_complete: Optional[Callable] = None
+
+        # (-priority, порядковый номер, время постановки, задача)
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._running: Dict[str, Any] = {}
+        self._running_by_type: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self._thread_pool = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="jarvis-task")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "total_wait_time": 0.0,
+            "max_wait_time": 0.0
+        }
+
+    def register(self, task_type: str, handler: Callable, limit: Optional[int] = None):
+        """Обработчик типа задачи: корутина или обычная (блокирующая) функция"""
+        self.handlers[task_type] = handler
+        if limit is not None:
+            self.type_limits[task_type] = limit
+
+    def submit(self, task) -> None:
+        """Поставить задачу в очередь, QueueFullError если очередь заполнена"""
+        with self._lock:
+            if len(self._heap) >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise QueueFullError(f"Очередь задач заполнена ({self.max_queue})")
+            task.status = "pending"
+            heapq.heappush(self._heap, (-task.priority, next(self._counter), time.monotonic(), task))
+            self.stats["submitted"] += 1
+        self._notify()
+
+    def _notify(self):
+        """Разбудить воркеров, в том числе из другого потока"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            self._wakeup.set()
+        else:
+            loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _pop_ready(self):
+        """Извлечь самую приоритетную задачу, тип которой не упирается в лимит"""
+        with self._lock:
+            deferred = []
+            item = None
+            while self._heap:
+                candidate = heapq.heappop(self._heap)
+                task_type = candidate[3].type
+                limit = self.type_limits.get(task_type)
+                if limit is not None and self._running_by_type.get(task_type, 0) >= limit:
+                    deferred.append(candidate)
+                    continue
+                item = candidate
+                break
+            for candidate in deferred:
+                heapq.heappush(self._heap, candidate)
+            if item is None:
+                return None
+
+            _, _, enqueued_at, task = item
+            wait_time = time.monotonic() - enqueued_at
+            self.stats["total_wait_time"] += wait_time
+            self.stats["max_wait_time"] = max(self.stats["max_wait_time"], wait_time)
+            task.status = "running"
+            self._running[task.id] = task
+            self._running_by_type[task.type] = self._running_by_type.get(task.type, 0) + 1
+            return task
+
+    async def _execute(self, task) -> Any:
+        """Выполнить задачу обработчиком ее типа"""
+        handler = self.handlers.get(task.type, self.default_handler)
+        if handler is None:
+            return {"error": f"Неизвестный тип задачи: {task.type}"}
+        if inspect.iscoroutinefunction(handler):
+            return await handler(task.parameters)
+        # Блокирующие модули не должны останавливать event loop
+        return await self._loop.run_in_executor(self._thread_pool, handler, task.parameters)
+
+    async def _worker(self, worker_id: int):
+        """Воркер: берет задачи из очереди, пока планировщик запущен"""
+        while True:
+            self._wakeup.clear()
+            task = self._pop_ready()
+            if task is None:
+                await self._wakeup.wait()
+                continue
+
+            self._fire(self.on_start, task)
+            try:
+                task.result = await self._execute(task)
+                task.status = "completed"
+                self.stats["completed"] += 1
+                logger.info(f"[OK] Задача {task.id} ({task.type}) завершена: {str(task.result)[:100]}...")
+            except asyncio.CancelledError:
+                task.status = "stopped"
+                raise
+            except Exception as e:
+                task.status = "failed"
+                task.result = {"error": str(e)}
+                self.stats["failed"] += 1
+                logger.error(f"[ERROR] Ошибка выполнения задачи {task.id}: {e}")
+            finally:
+                with self._lock:
+                    self._running.pop(task.id, None)
+                    self._running_by_type[task.type] -= 1
+                # Освободился слот типа: отложенные задачи могут стать доступны
+                self._wakeup.set()
+
+            self._fire(self.on_complete, task)
+
+    def _fire(self, callback: Optional[Callable], task):
+        """Вызвать колбэк смены статуса, не прерывая работу воркера"""
+        if callback is None:
+            return
+        try:
+            callback(task)
+        except Exception as e:
+            logger.error(f"[ERROR] Ошибка обработки статуса задачи {task.id}: {e}")
+
+    def start(self):
+        """Запуск воркеров в текущем event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._worker_tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"[OK] Планировщик задач запущен: {self.workers} воркеров")
+
+    async def stop(self):
+        """Остановка воркеров и пула потоков"""
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._loop = None
+        self._thread_pool.shutdown(wait=False)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._heap)
+
+    @property
+    def running_count(self) -> int:
+        return len(self._running)
+
+    def pending_tasks(self) -> List[Any]:
+        """Ожидающие задачи в порядке выполнения"""
+        with self._lock:
+            return [item[3] for item in sorted(self._heap)]
+
+    def running_tasks(self) -> List[Any]:
+        """Выполняющиеся задачи"""
+        with self._lock:
+            return list(self._running.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика планировщика"""
+        started = self.stats["completed"] + self.stats["failed"] + self.running_count
+        return {
+            **self.stats,
+            "average_wait_time": self.stats["total_wait_time"] / started if started else 0.0,
+            "pending": self.pending_count,
+            "running": self.running_count,
+            "running_by_type": {k: v for k, v in self._running_by_type.items() if v},
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "type_limits": self.type_limits
+        }
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Хранилище задач JARVIS
+SQLite в режиме WAL с индексами по статусу, типу и времени создания,
+постраничной выборкой и очисткой завершенных задач
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TASKS_DB = "/home/mentor/jarvis_data/tasks.db"
+
+FINISHED_STATUSES = ("completed", "failed", "stopped")
+
+TASK_COLUMNS = ("id", "type", "priority", "status", "created_at", "updated_at", "parameters", "result")
+
+
+def new_task_id(prefix: str = "task") -> str:
+    """Уникальный ID задачи: время для читаемости и случайный суффикс против коллизий"""
+    return f"{prefix}_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+
+
+class TaskStore:
+    """Долговременное хранилище задач"""
+
+    def __init__(self, db_path: str = DEFAULT_TASKS_DB, retention_days: float = 7.0,
+                 max_finished: int = 10000):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self.max_finished = max_finished
+        # Одно соединение на процесс: API и основной цикл работают в разных потоках
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                parameters TEXT,
+                result TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, created_at);
+            CREATE INDEX IF NOT EXISTS idx_tasks_type ON tasks(type, created_at);
+            CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks(created_at);
+        """)
+        self._db.commit()
+
+    def save(self, task) -> None:
+        """Сохранить задачу (вставка или обновление)"""
+        row = (
+            task.id,
+            task.type,
+            task.priority,
+            task.status,
+            task.created_at,
+            time.time(),
+            json.dumps(task.parameters, ensure_ascii=False, default=str),
+            json.dumps(task.result, ensure_ascii=False, default=str) if task.result is not None else None
+        )
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO tasks ({', '.join(TASK_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                row
+            )
+            self._db.commit()
+
+    def delete(self, task_id: str) -> None:
+        """Удалить задачу"""
+        with self._lock:
+            self._db.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            self._db.commit()
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        task = dict(row)
+        task["parameters"] = json.loads(task["parameters"]) if task["parameters"] else {}
+        task["result"] = json.loads(task["result"]) if task["result"] else None
+        return task
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Задача по ID"""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def _where(self, status: Optional[str], task_type: Optional[str]):
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if task_type:
+            conditions.append("type = ?")
+            params.append(task_type)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def list_tasks(self, status: str = None, task_type: str = None,
+                   limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """Страница задач, новые первыми"""
+        where, params = self._where(status, task_type)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT * FROM tasks{where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def count(self, status: str = None, task_type: str = None) -> int:
+        """Количество задач по фильтру (по индексу)"""
+        where, params = self._where(status, task_type)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM tasks{where}", params).fetchone()[0]
+
+    def counts_by_status(self) -> Dict[str, int]:
+        """Количество задач по статусам"""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Задачи, не завершенные до перезапуска"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM tasks WHERE status IN ('pending', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def compact(self) -> int:
+        """Удалить завершенные задачи старше срока хранения и сверх лимита"""
+        placeholders = ", ".join("?" for _ in FINISHED_STATUSES)
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).isoformat()
+        with self._lock:
+            removed = self._db.execute(
+                f"DELETE FROM tasks WHERE status IN ({placeholders}) AND created_at < ?",
+                FINISHED_STATUSES + (cutoff,)
+            ).rowcount
+            removed += self._db.execute(
+                f"DELETE FROM tasks WHERE id IN (SELECT id FROM tasks WHERE status IN ({placeholders}) "
+                f"ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                FINISHED_STATUSES + (self.max_finished,)
+            ).rowcount
+            self._db.commit()
+        if removed:
+            logger.info(f"[OK] Удалено {removed} завершенных задач из хранилища")
+        return removed
+
+    def close(self):
+        """Закрытие базы"""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Тесты графа знаний, поиска знаний и координатора агентов
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from agent_coordinator import (
+    AgentCoordinator, CoordinationTask, EnhancedSharedMemory, KnowledgeGraph, TaskComplexity
+)
+from text_index import TextIndex
+
+
+def make_graph() -> KnowledgeGraph:
+    graph = KnowledgeGraph()
+    for concept_id in "abcdef":
+        graph.add_concept(concept_id, concept_id, "", [], "test")
+    graph.add_relationship("a", "b", "related_to", 0.9)
+    graph.add_relationship("a", "c", "related_to", 0.2)
+    graph.add_relationship("b", "d", "part_of", 0.9)
+    graph.add_relationship("c", "e", "part_of", 1.0)
+    graph.add_relationship("e", "f", "part_of", 1.0)
+    return graph
+
+
+def test_bfs_depth_and_strength():
+    """Обход в ширину: ближайшие первыми, стартовая концепция не возвращается"""
+    graph = make_graph()
+    assert graph.find_related_concepts("a", max_depth=1) == ["b", "c"]
+    assert graph.find_related_concepts("a", max_depth=2) == ["b", "c", "d", "e"]
+    assert graph.find_related_concepts("a", max_depth=2, min_strength=0.5) == ["b", "d"]
+    assert graph.find_related_concepts("missing") == []
+
+
+def test_weighted_and_batch():
+    """Взвешенный обход по силе связей и пакетный запрос окрестностей"""
+    graph = make_graph()
+    weighted = graph.find_weighted_related("a", max_depth=2)
+    assert [concept_id for concept_id, _ in weighted] == ["b", "d", "c", "e"]
+    assert abs(weighted[1][1] - 0.81) < 1e-9
+
+    neighborhoods = graph.get_neighborhoods(["a", "e", "a"], max_depth=1)
+    assert neighborhoods == {"a": ["b", "c"], "e": ["c", "f"]}
+
+
+def test_text_index_bm25_and_substring():
+    """BM25 ранжирует по частоте термина, триграммы находят подстроки, обновление заменяет документ"""
+    index = TextIndex()
+    index.add("a", "docker контейнер docker сборка")
+    index.add("b", "docker_compose конфигурация")
+    index.add("c", "ollama модель")
+    assert [doc_id for doc_id, _ in index.search("docker")] == ["a", "b"]
+    assert [doc_id for doc_id, _ in index.search("конт")] == ["a"]
+    assert [doc_id for doc_id, _ in index.search("compose")] == ["b"]
+
+    index.add("a", "ollama сервер")
+    assert [doc_id for doc_id, _ in index.search("docker")] == ["b"]
+    assert {doc_id for doc_id, _ in index.search("ollama")} == {"a", "c"}
+    index.remove("c")
+    assert index.search("модель") == []
+    assert len(index) == 2
+
+
+def test_shared_memory_search_with_usage():
+    """Поиск знаний по индексу, частые концепции поднимаются выше"""
+    memory = EnhancedSharedMemory()
+    memory.store_knowledge("python_style", "Используй type hints", "agent_1", ["python", "стиль"])
+    memory.store_knowledge("python_tests", "Тесты на pytest", "agent_2", ["python", "тесты"])
+    memory.store_knowledge("docker_setup", "Сборка образа", "agent_1", ["docker"])
+
+    results = memory.search_knowledge("pyth")
+    keys = [result["key"] for result in results if "key" in result]
+    assert sorted(keys) == ["python_style", "python_tests"]
+
+    for _ in range(5):
+        memory.get_knowledge("python_tests")
+    concepts = memory.knowledge_graph.search_concepts("python")
+    assert concepts[0]["name"] == "python_tests"
+    assert concepts[0]["usage_count"] == 5
+
+
+class FakeAgent:
+    """Агент для тестов координатора: записывает сообщения, может зависать"""
+
+    def __init__(self, agent_id: str, skills, hang: bool = False):
+        self.agent_id = agent_id
+        self.name = agent_id
+        self.skills = skills
+        self.task_queue = []
+        self.status = "idle"
+        self.hang = hang
+        self.received = []
+
+    async def process_message(self, message):
+        self.received.append((time.perf_counter(), message))
+        if self.hang:
+            await asyncio.Event().wait()
+        return {"status": "processed", "agent": self.agent_id}
+
+    def get_status(self):
+        return {"status": self.status}
+
+
+def make_coordinator(*agents) -> AgentCoordinator:
+    coordinator = AgentCoordinator(EnhancedSharedMemory())
+    for agent in agents:
+        coordinator.register_agent(agent)
+    return coordinator
+
+
+def test_coordinator_routes_without_polling():
+    """Сообщения доставляются через очередь агента сразу, в порядке отправки"""
+    async def scenario():
+        agent = FakeAgent("agent_a", ["code"])
+        coordinator = make_coordinator(agent)
+        coordinator.send_message_to_agent("user", "agent_a", "ping", {"n": 0})
+        coordinator.start_coordination()
+        sent_at = time.perf_counter()
+        for n in range(1, 4):
+            coordinator.send_message_to_agent("user", "agent_a", "ping", {"n": n})
+        await coordinator.agent_queues["agent_a"].join()
+        coordinator.send_message_to_agent("user", "missing", "ping", {})
+        status = coordinator.get_coordination_status()
+        coordinator.stop_coordination()
+        return agent, sent_at, status
+
+    agent, sent_at, status = asyncio.run(scenario())
+    assert [message.content["n"] for _, message in agent.received] == [0, 1, 2, 3]
+    assert agent.received[-1][0] - sent_at < 0.1
+    assert status["routing"]["routed"] == 4
+    assert status["message_queue_size"] == 0
+
+
+def test_coordinator_task_events_and_deadline():
+    """Задача завершается по ответам агентов, просроченная без исполнителей - проваливается"""
+    async def scenario():
+        fast_a, fast_b = FakeAgent("fast_a", ["code"]), FakeAgent("fast_b", ["code"])
+        slow = FakeAgent("slow", ["design"], hang=True)
+        coordinator = make_coordinator(fast_a, fast_b, slow)
+        coordinator.start_coordination()
+
+        done = await coordinator.create_coordination_task("Код", "", ["code"], TaskComplexity.MEDIUM)
+        for queue in coordinator.agent_queues.values():
+            if queue is not coordinator.agent_queues["slow"]:
+                await queue.join()
+
+        deadline = (datetime.now() + timedelta(milliseconds=50)).isoformat()
+        overdue = await coordinator.create_coordination_task("Дизайн", "", ["design"], TaskComplexity.SIMPLE,
+                                                             deadline=deadline)
+        coordinator.shared_memory.agent_capabilities["slow"].availability = False
+        await asyncio.sleep(0.2)
+        result = (done, overdue, dict(coordinator.active_tasks),
+                  coordinator.shared_memory.get_collaboration_score("fast_a", "fast_b"),
+                  coordinator.shared_memory.agent_capabilities["slow"].performance_score)
+        coordinator.stop_coordination()
+        return result
+
+    done, overdue, active, collaboration, slow_score = asyncio.run(scenario())
+    assert done.status == "completed"
+    assert set(done.results) == {"fast_a", "fast_b"}
+    assert overdue.status == "failed"
+    assert active == {}
+    assert collaboration == 1
+    assert slow_score < 1.0
+
+
+def test_skill_heaps_select_least_loaded():
+    """Выбор по кучам навыков: наименее загруженные доступные агенты с навыком"""
+    agents = [FakeAgent(f"agent_{i}", ["code" if i % 2 else "design", "review"]) for i in range(30)]
+    coordinator = make_coordinator(*agents)
+    for i, agent in enumerate(agents):
+        agent.task_queue = [None] * (i % 7)
+        coordinator._refresh_agent_capability(agent.agent_id)
+    agents[7].status = "error"
+    coordinator._refresh_agent_capability("agent_7")
+
+    task = CoordinationTask(id="t", title="t", description="", complexity=TaskComplexity.COMPLEX,
+                            required_skills=["code"], priority=5, deadline=None, dependencies=[],
+                            assigned_agents=[], status="pending", created_at="")
+    selected = coordinator._select_agents_for_task(task)
+    loads = [coordinator.shared_memory.agent_capabilities[agent_id].current_load for agent_id in selected]
+    assert len(selected) == 3 and "agent_7" not in selected
+    assert all(int(agent_id.split("_")[1]) % 2 for agent_id in selected)
+    assert loads == sorted(loads) and loads[0] == 0.0
+
+    # Изменение загрузки в обход координатора тоже учитывается
+    coordinator.shared_memory.agent_capabilities[selected[0]].current_load = 0.7
+    assert selected[0] not in coordinator._select_agents_for_task(task)[:1]
+
+
+def test_work_stealing_moves_queued_tasks():
+    """Освободившийся агент забирает ожидающие задачи перегруженного"""
+    async def scenario():
+        busy = FakeAgent("busy", ["code"], hang=True)
+        idle = FakeAgent("idle", ["code"], hang=True)
+        idle.status = "error"
+        coordinator = make_coordinator(busy, idle)
+        coordinator._refresh_agent_capability("idle")
+        coordinator.start_coordination()
+        tasks = [await coordinator.create_coordination_task(f"Задача {i}", "", ["code"], TaskComplexity.SIMPLE)
+                 for i in range(9)]
+        await asyncio.sleep(0)
+        before = coordinator.agent_queues["busy"].qsize()
+
+        idle.status = "idle"
+        coordinator._refresh_agent_capability("idle")
+        await asyncio.sleep(0)
+        result = (before, coordinator.agent_pending["busy"], coordinator.agent_pending["idle"],
+                  [task.assigned_agents for task in tasks], coordinator.routing_stats["stolen"])
+        coordinator.stop_coordination()
+        return result
+
+    before, busy_pending, idle_pending, assignments, stolen = asyncio.run(scenario())
+    assert before == 8
+    # Задачи переходят, пока получатель свободнее отдающего: 9 -> 5 + 4
+    assert stolen == idle_pending == 4
+    assert busy_pending == 5
+    assert assignments[0] == ["busy"]
+    assert assignments[-1] == ["idle"]
+
+
+if __name__ == "__main__":
+    test_bfs_depth_and_strength()
+    test_weighted_and_batch()
+    test_text_index_bm25_and_substring()
+    test_shared_memory_search_with_usage()
+    test_coordinator_routes_without_polling()
+    test_coordinator_task_events_and_deadline()
+    test_skill_heaps_select_least_loaded()
+    test_work_stealing_moves_queued_tasks()
+    print("✅ Граф знаний, поиск знаний и координатор работают корректно")
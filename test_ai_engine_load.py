@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест AI движка
+Проверяет, что /api/system/status отвечает быстрее 10 мс,
+пока в том же event loop выполняются 20 генераций
+"""
+
+import asyncio
+import logging
+import time
+
+import aiohttp
+import uvicorn
+
+from benchmark_ollama_client import start_stub_server, percentile
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GENERATIONS = 20
+GENERATION_DELAY = 0.5
+STATUS_LIMIT_MS = 10.0
+
+
+async def run_load_test():
+    """Статус системы под нагрузкой генераций"""
+    import real_autonomous_system
+    from ai_engine import OllamaEngine
+
+    stub = start_stub_server(GENERATION_DELAY)
+    stub_url = f"http://127.0.0.1:{stub.server_address[1]}"
+    real_autonomous_system.ai_engine = OllamaEngine(base_url=stub_url)
+
+    config = uvicorn.Config(real_autonomous_system.app, host="127.0.0.1", port=0, log_level="warning")
+    server = uvicorn.Server(config)
+    server_task = asyncio.create_task(server.serve())
+
+    try:
+        while not server.started:
+            await asyncio.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        status_url = f"http://127.0.0.1:{port}/api/system/status"
+
+        generations = [
+            asyncio.create_task(real_autonomous_system.ai_engine.generate_response(f"Запрос {i}"))
+            for i in range(GENERATIONS)
+        ]
+
+        latencies = []
+        async with aiohttp.ClientSession() as session:
+            # Первый запрос прогревает соединение и проверку здоровья
+            async with session.get(status_url) as response:
+                assert response.status == 200
+            while not all(task.done() for task in generations):
+                start = time.perf_counter()
+                async with session.get(status_url) as response:
+                    assert response.status == 200
+                    await response.json()
+                latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.05)
+
+        results = await asyncio.gather(*generations)
+        assert all(result.success for result in results), "Не все генерации завершились"
+        assert latencies, "Нет замеров статуса"
+
+        p99 = percentile(latencies, 99)
+        logger.info(f"📊 /api/system/status: {len(latencies)} запросов, "
+                    f"p50={percentile(latencies, 50):.2f} мс, p99={p99:.2f} мс")
+        assert p99 < STATUS_LIMIT_MS, f"Статус отвечает {p99:.2f} мс под нагрузкой"
+    finally:
+        server.should_exit = True
+        await server_task
+        stub.shutdown()
+
+
+def test_status_under_generation_load():
+    """Тест отзывчивости API во время генераций"""
+    asyncio.run(run_load_test())
+
+
+if __name__ == "__main__":
+    test_status_under_generation_load()
+    print("✅ /api/system/status остается быстрым под нагрузкой")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Тесты движка алертов JARVIS
+"""
+
+from alert_engine import AlertEngine
+
+
+def kinds(events):
+    return [(event.kind, event.severity) for event in events]
+
+
+def test_sustained_spike_fires_once():
+    """Десятиминутный всплеск CPU - одно уведомление и одно разрешение"""
+    engine = AlertEngine(hysteresis=0.05, for_duration=60, cooldown=600)
+    events = []
+    for i in range(20):
+        events += engine.evaluate("cpu_usage", 80, warning=70, critical=85, now=i * 30)
+    assert kinds(events) == [("fired", "warning")]
+    assert engine.is_active("cpu_usage")
+
+    # Колебания у порога не разрешают алерт, пока значение выше порога выхода
+    assert engine.evaluate("cpu_usage", 67, warning=70, critical=85, now=630) == []
+    assert kinds(engine.evaluate("cpu_usage", 60, warning=70, critical=85, now=660)) == [("resolved", None)]
+    assert not engine.is_active("cpu_usage")
+
+
+def test_for_duration_and_escalation():
+    """Короткий выброс игнорируется, повышение до критического уведомляет"""
+    engine = AlertEngine(for_duration=60)
+    assert engine.evaluate("memory_usage", 95, warning=75, critical=90, now=0) == []
+    assert engine.evaluate("memory_usage", 50, warning=75, critical=90, now=30) == []
+    assert engine.evaluate("memory_usage", 80, warning=75, critical=90, now=60) == []
+    assert kinds(engine.evaluate("memory_usage", 80, warning=75, critical=90, now=120)) == [("fired", "warning")]
+    assert engine.evaluate("memory_usage", 95, warning=75, critical=90, now=150) == []
+    assert kinds(engine.evaluate("memory_usage", 95, warning=75, critical=90, now=210)) == [("fired", "critical")]
+    assert engine.get_stats()["active"] == 1
+
+
+def test_lower_is_worse_and_cooldown():
+    """Порог критического ниже предупреждения; повтор в период тишины подавляется"""
+    engine = AlertEngine(for_duration=0, cooldown=600)
+    assert engine.evaluate("score", 70, warning=60, critical=40, now=0) == []
+    assert kinds(engine.evaluate("score", 35, warning=60, critical=40, now=10)) == [("fired", "critical")]
+    assert kinds(engine.evaluate("score", 90, warning=60, critical=40, now=20)) == [("resolved", None)]
+    assert engine.evaluate("score", 35, warning=60, critical=40, now=30) == []
+    assert engine.evaluate("score", 90, warning=60, critical=40, now=40) == []
+    assert engine.get_stats()["suppressed"] == 1
+    assert kinds(engine.evaluate("score", 35, warning=60, critical=40, now=700)) == [("fired", "critical")]
+
+    assert kinds(engine.raise_alert("health_docker", "warning", "Docker недоступен", now=0)) == [("fired", "warning")]
+    assert engine.raise_alert("health_docker", "warning", "Docker недоступен", now=300) == []
+    assert kinds(engine.clear("health_docker", now=600)) == [("resolved", None)]
+
+
+if __name__ == "__main__":
+    test_sustained_spike_fires_once()
+    test_for_duration_and_escalation()
+    test_lower_is_worse_and_cooldown()
+    print("✅ Движок алертов работает корректно")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Тесты двухуровневых ответов JarvisCore
+"""
+
+import asyncio
+import importlib.util
+import sys
+import time
+from types import ModuleType, SimpleNamespace
+
+from intent_router import IntentRouter
+
+
+def import_core():
+    """Импорт ядра; docker, paramiko и requests для ответов не нужны и
+    подменяются пустыми модулями только на время импорта, если не установлены"""
+    stubs = [name for name in ("requests", "docker", "paramiko") if importlib.util.find_spec(name) is None]
+    for name in stubs:
+        sys.modules[name] = ModuleType(name)
+    try:
+        import jarvis_core
+    finally:
+        for name in stubs:
+            sys.modules.pop(name, None)
+    return jarvis_core
+
+
+jarvis_core = import_core()
+ANSWER_TIERS, JarvisCore, SystemState = jarvis_core.ANSWER_TIERS, jarvis_core.JarvisCore, jarvis_core.SystemState
+
+# Открытые вопросы со словами статуса, скорости, времени и задач - это не запросы живых данных
+OPEN_QUESTIONS = (
+    "Как повысить скорость загрузки сайта?",
+    "Какое состояние рынка маркетплейсов?",
+    "Разбей эту задачу на подзадачи",
+    "В какое время лучше публиковать посты?",
+    "What time complexity does quicksort have?",
+)
+
+
+def make_core(ai_response=None) -> JarvisCore:
+    """Ядро без запуска модулей: только то, что нужно для ответов"""
+    core = JarvisCore.__new__(JarvisCore)
+    core.state = SystemState(performance_score=0.9)
+    core.answer_stats = {tier: {"count": 0, "total_ms": 0.0} for tier in ANSWER_TIERS}
+    core.scheduler = SimpleNamespace(pending_count=3)
+    core.task_store = SimpleNamespace(count=lambda status=None: 7)
+    core.start_time = time.time()
+    core.llm_calls = []
+
+    async def get_ai_response(message):
+        core.llm_calls.append(message)
+        await asyncio.sleep(0.01)
+        return ai_response
+
+    core.get_ai_response = get_ai_response
+    return core
+
+
+def test_live_data_intents_skip_the_model():
+    """Статус, задачи, время и производительность отвечаются без модели"""
+    core = make_core(ai_response="ответ модели")
+    for message in ("статус системы", "покажи задачи", "который час", "какая скорость"):
+        answer = asyncio.run(core.analyze_user_intent(message))
+        assert answer["tier"] == "local"
+    assert core.llm_calls == []
+    answer = asyncio.run(core.analyze_user_intent("покажи задачи"))
+    assert "Активных задач: 3, завершенных: 7" in answer["message"]
+
+
+def test_local_rules_match_only_direct_questions():
+    """Локальный уровень срабатывает только на прямые вопросы о системе"""
+    router = IntentRouter(rules_file=None)
+    for message, intent in (("статус системы", "status"), ("Джарвис, который час?", "time"),
+                            ("сколько задач в очереди?", "tasks"), ("какая производительность", "performance")):
+        assert router.best(message, "jarvis_local") == intent
+    for message in OPEN_QUESTIONS:
+        assert router.best(message, "jarvis_local") is None
+    assert router.best("Which framework is better?", "jarvis") is None
+
+
+def test_open_questions_with_status_words_reach_the_model():
+    core = make_core(ai_response="ответ модели")
+    for message in OPEN_QUESTIONS:
+        answer = asyncio.run(core.analyze_user_intent(message))
+        assert (answer["tier"], answer["message"]) == ("llm", "ответ модели")
+    assert core.llm_calls == list(OPEN_QUESTIONS)
+
+
+def test_open_ended_messages_go_to_model_or_fallback():
+    """Остальные сообщения идут в модель, без модели - заготовленный ответ"""
+    core = make_core(ai_response="ответ модели")
+    answer = asyncio.run(core.analyze_user_intent("расскажи про склад"))
+    assert (answer["tier"], answer["message"]) == ("llm", "ответ модели")
+
+    core = make_core(ai_response=None)
+    answer = asyncio.run(core.analyze_user_intent("привет"))
+    assert answer["tier"] == "fallback"
+    assert answer["intent"] == "greeting"
+    assert core.llm_calls == ["привет"]
+
+
+def test_answer_stats_estimate_avoided_llm_time():
+    """Статистика по уровням и оценка сэкономленного времени модели"""
+    core = make_core(ai_response="ответ модели")
+    for message in ("статус", "время", "расскажи анекдот"):
+        asyncio.run(core.analyze_user_intent(message))
+    stats = core.get_answer_stats()
+    assert stats["total"] == 3
+    assert stats["tiers"]["local"]["count"] == 2
+    assert stats["tiers"]["llm"]["avg_latency_ms"] >= 10
+    assert stats["llm_time_avoided_ms"] == 2 * stats["tiers"]["llm"]["avg_latency_ms"]
+
+
+if __name__ == "__main__":
+    test_live_data_intents_skip_the_model()
+    test_local_rules_match_only_direct_questions()
+    test_open_questions_with_status_words_reach_the_model()
+    test_open_ended_messages_go_to_model_or_fallback()
+    test_answer_stats_estimate_avoided_llm_time()
+    print("✅ Двухуровневые ответы работают корректно")
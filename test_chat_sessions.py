@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Тесты сессий чата и окна контекста
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from fastapi import Response
+
+import intelligent_chat
+from chat_sessions import ChatSession, SessionStore, estimate_tokens
+
+
+def test_sessions_are_isolated_and_evicted():
+    """У каждого пользователя своя история; лишние и простаивающие сессии вытесняются"""
+    store = SessionStore(max_sessions=2, idle_ttl=60)
+    store.get("alice").add_turn("user", "мой пароль от склада 1234")
+    store.get("bob").add_turn("user", "привет")
+    history, _ = store.get("bob").context_window(1000)
+    assert "склад" not in history
+
+    store.get("alice")
+    store.get("carol")
+    assert store.peek("bob") is None
+    assert store.peek("alice") is not None
+    assert store.get_stats()["evicted"] == 1
+
+    store.get("alice").last_active = time.time() - 120
+    store.sessions.move_to_end("carol")
+    assert store.evict_idle() == 1
+    assert list(store.sessions) == ["carol"]
+
+
+def test_window_fits_budget_and_keeps_newest_turns():
+    """Новые реплики целиком в пределах бюджета, старые - строками сводки"""
+    session = ChatSession("u")
+    for i in range(20):
+        session.add_turn("user", f"вопрос номер {i} " + "подробности " * 10)
+        session.add_turn("assistant", f"ответ номер {i}")
+
+    for budget in (60, 200, 500):
+        history, tokens = session.context_window(budget)
+        assert tokens <= budget
+        assert estimate_tokens(history) <= budget
+        assert history.endswith("JARVIS: ответ номер 19")
+    history, _ = session.context_window(500)
+    assert "Ранее в разговоре:" in history
+    assert "…" in history
+
+    history, tokens = session.context_window(100000)
+    assert "Ранее в разговоре:" not in history
+    assert history.startswith("Пользователь: вопрос номер 0")
+
+
+def test_old_turns_fold_into_rolling_summary():
+    """Сверх лимита сессии старые реплики уходят в сводку, сводка ограничена"""
+    session = ChatSession("u", max_turn_tokens=100, max_summary_tokens=40)
+    for i in range(30):
+        session.add_turn("user", f"сообщение {i} " + "текст " * 5)
+    assert session.turn_tokens <= 100
+    assert session.summary_tokens <= 40
+    assert session.summary_lines[-1].startswith("Пользователь: сообщение")
+    assert session.turns[-1]["content"].startswith("сообщение 29")
+
+
+def test_browsers_get_separate_sessions_from_cookie():
+    """Каждый браузер получает свою cookie сессии; user_id не дает доступа к чужой истории"""
+    chat = intelligent_chat.intelligent_chat
+    prompts = []
+
+    async def get_ai_response(message, context="", user_id="anonymous"):
+        prompts.append(chat.build_prompt(message, context, user_id))
+        return f"ответ на {message}"
+
+    async def get_system_status():
+        return {"intelligence_level": "basic"}
+
+    original = chat.get_ai_response, chat.get_system_status
+    chat.get_ai_response, chat.get_system_status = get_ai_response, get_system_status
+
+    async def send(cookies, text, user_id="web_user"):
+        response = Response()
+        request = SimpleNamespace(cookies=cookies)
+        await intelligent_chat.send_message(intelligent_chat.ChatMessage(message=text, user_id=user_id),
+                                            request, response)
+        cookie = response.headers.get("set-cookie")
+        if cookie:
+            cookies[intelligent_chat.SESSION_COOKIE] = cookie.split(";")[0].split("=", 1)[1]
+
+    async def run():
+        alice, bob = {}, {}
+        await send(alice, "мой пароль от склада 1234")
+        await send(bob, "привет")
+        assert alice[intelligent_chat.SESSION_COOKIE] != bob[intelligent_chat.SESSION_COOKIE]
+        assert "1234" not in prompts[-1]
+
+        await send(alice, "что я говорил?")
+        assert "1234" in prompts[-1]
+
+        history = await intelligent_chat.chat_history(SimpleNamespace(cookies=bob))
+        assert [turn["content"] for turn in history["history"]] == ["привет", "ответ на привет"]
+        # Без cookie или с подделанным значением чужая история недоступна
+        assert (await intelligent_chat.chat_history(SimpleNamespace(cookies={})))["length"] == 0
+        forged = {intelligent_chat.SESSION_COOKIE: "web_user"}
+        assert (await intelligent_chat.chat_history(SimpleNamespace(cookies=forged)))["length"] == 0
+
+    try:
+        asyncio.run(run())
+    finally:
+        chat.get_ai_response, chat.get_system_status = original
+
+
+if __name__ == "__main__":
+    test_sessions_are_isolated_and_evicted()
+    test_window_fits_budget_and_keeps_newest_turns()
+    test_old_turns_fold_into_rolling_summary()
+    test_browsers_get_separate_sessions_from_cookie()
+    print("✅ Сессии чата работают корректно")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Тесты страховочных запросов к моделям
+"""
+
+import asyncio
+import time
+
+from hedging import HedgeBudget, Hedger
+
+
+def make_attempt(result, first_token: float, total: float, log: list = None, name: str = ""):
+    """Попытка: первый токен через first_token, ответ через total секунд"""
+    async def attempt(started):
+        try:
+            await asyncio.sleep(first_token)
+            started.set()
+            await asyncio.sleep(total - first_token)
+            return result
+        except asyncio.CancelledError:
+            if log is not None:
+                log.append(name)
+            raise
+    return attempt
+
+
+def test_budget_caps_hedges_by_ratio():
+    """Страховочных запросов не больше заданной доли от обычных"""
+    budget = HedgeBudget(ratio=0.1)
+    granted = 0
+    for _ in range(100):
+        budget.deposit()
+        granted += budget.withdraw()
+    assert 9 <= granted <= 10
+
+
+def test_slow_first_token_launches_hedge_and_cancels_loser():
+    """Нет первого токена за p95 - запрос к следующей модели; проигравший отменяется"""
+    async def scenario():
+        hedger = Hedger(budget_ratio=1.0, min_samples=5)
+        for _ in range(10):
+            hedger.record_first_token("big", 0.02)
+        assert abs(hedger.hedge_delay("big") - 0.05) < 1e-9  # ограничено min_delay
+
+        cancelled = []
+        start = time.monotonic()
+        result = await hedger.run([
+            ("big", make_attempt("медленный ответ", 1.0, 1.0, cancelled, "big")),
+            ("small", make_attempt("быстрый ответ", 0.01, 0.03, cancelled, "small")),
+        ])
+        assert result == "быстрый ответ"
+        assert time.monotonic() - start < 0.5
+        await asyncio.sleep(0)
+        assert cancelled == ["big"]
+        stats = hedger.get_stats()
+        assert (stats["hedged"], stats["hedge_wins"], stats["cancelled"]) == (1, 1, 1)
+        # Отмененный медленный запрос учтен в квантиле как нижняя граница задержки
+        assert stats["censored"] == 1
+        assert len(hedger.first_token["big"]) == 11 and max(hedger.first_token["big"]) >= 0.05
+
+    asyncio.run(scenario())
+
+
+def test_no_hedge_when_primary_streams_or_budget_is_empty():
+    """Быстрый первый токен или пустой бюджет - только основной запрос"""
+    async def scenario():
+        calls = []
+
+        def tracked(name, attempt):
+            async def wrapper(started):
+                calls.append(name)
+                return await attempt(started)
+            return wrapper
+
+        hedger = Hedger(budget_ratio=1.0, default_delay=0.05)
+        # Первый токен пришел вовремя, хоть ответ и дольше задержки страховки
+        result = await hedger.run([
+            ("big", tracked("big", make_attempt("ответ", 0.01, 0.1))),
+            ("small", tracked("small", make_attempt("другой", 0.01, 0.02))),
+        ])
+        assert (result, calls) == ("ответ", ["big"])
+
+        calls.clear()
+        stingy = Hedger(budget_ratio=0.1, default_delay=0.01)
+        result = await stingy.run([
+            ("big", tracked("big", make_attempt("ответ", 0.05, 0.06))),
+            ("small", tracked("small", make_attempt("другой", 0.01, 0.02))),
+        ])
+        assert (result, calls) == ("ответ", ["big"])
+        assert stingy.get_stats()["budget_denied"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_attempt_falls_through_without_budget():
+    """Неудачная модель сразу уступает следующей, это не страховочный запрос"""
+    async def scenario():
+        hedger = Hedger(budget_ratio=0.0)
+        result = await hedger.run([
+            ("big", make_attempt(None, 0.01, 0.01)),
+            ("small", make_attempt("ответ", 0.01, 0.01)),
+        ])
+        assert result == "ответ"
+        assert hedger.get_stats()["hedged"] == 0
+
+        assert await hedger.run([("big", make_attempt(None, 0.0, 0.0))]) is None
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_budget_caps_hedges_by_ratio()
+    test_slow_first_token_launches_hedge_and_cancels_loser()
+    test_no_hedge_when_primary_streams_or_budget_is_empty()
+    test_failed_attempt_falls_through_without_budget()
+    print("✅ Страховочные запросы работают корректно")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Тесты маршрутизатора намерений
+"""
+
+import json
+import os
+import tempfile
+
+from intent_router import IntentRouter, KeywordMatcher
+
+
+def make_router(**kwargs) -> IntentRouter:
+    return IntentRouter(rules_file=None, **kwargs)
+
+
+def test_keyword_matcher_overlapping_matches():
+    """Перекрывающиеся вхождения и фразы-префиксы находятся за один проход"""
+    phrases = ["he", "she", "his", "hers"]
+    matcher = KeywordMatcher(phrases)
+    found = sorted((start, phrases[phrase_id]) for start, phrase_id in matcher.iter_matches("ushers"))
+    assert found == [(1, "she"), (2, "he"), (2, "hers")]
+    assert list(KeywordMatcher([]).iter_matches("ushers")) == []
+
+
+def test_priorities_match_legacy_chains():
+    """Первое сработавшее правило набора - как в прежних цепочках if/elif"""
+    router = make_router()
+    assert router.best("Привет! Как дела?", "jarvis") == "greeting"
+    assert router.best("покажи статус системы", "jarvis") == "status"
+    assert router.best("напиши код для парсера", "jarvis") == "code_generation"
+    assert router.best("что-то непонятное", "jarvis") is None
+
+    assert router.best("Найди ошибка в модуле", "agent") == "code_developer"
+    assert router.best("построй график", "agent") == "data_analyst"
+    assert router.best("добрый вечер", "agent", "general_assistant") == "general_assistant"
+
+    assert router.best("нужен отчет по данным", "chat_fallback") == "data_analysis"
+
+    matches = router.match("разработка: анализ и данные", "skills")
+    skills = {skill for match in matches for skill in match.data["skills"]}
+    assert skills == {"code_generation", "architecture_design", "data_analysis", "reporting", "visualization"}
+    assert router.best("хочу создать систему учета", "complex_task") == "complex"
+
+
+def test_whole_words_for_task_categories():
+    """Правила words срабатывают только на слово целиком"""
+    router = make_router()
+    assert router.best("сделай диаграмма продаж", "task_category") == "data_analysis"
+    assert router.best("изучи кодекс", "task_category") == "research"
+    assert router.best("анализировать кодекс", "task_category", "general") == "general"
+    assert router.best("напиши программу на python", "task_category") == "text_processing"
+    assert [m.intent for m in router.match("напиши программу на python", "task_category")] == \
+        ["text_processing", "code_generation"]
+
+
+def test_cache_and_hot_reload():
+    """Повторное сообщение берется из кеша, изменение файла правил применяется без перезапуска"""
+    with tempfile.TemporaryDirectory() as tmp:
+        rules_file = os.path.join(tmp, "rules.json")
+        router = IntentRouter(rules_file=rules_file, reload_interval=0)
+        assert router.best("нужен деплой", "agent") is None
+        assert router.best("Нужен деплой ", "agent") is None
+        assert router.get_stats()["hits"] == 1
+
+        with open(rules_file, "w", encoding="utf-8") as f:
+            json.dump({"agent": [{"intent": "system_admin", "keywords": ["деплой"]},
+                                 {"intent": "devops", "patterns": [r"\bk8s\b"]}]}, f)
+        assert router.best("нужен деплой", "agent") == "system_admin"
+        assert router.best("настрой K8S кластер", "agent") == "devops"
+        assert router.best("привет", "jarvis") == "greeting"
+        assert router.get_stats()["reloads"] == 1
+
+        with open(rules_file, "w", encoding="utf-8") as f:
+            f.write("{broken")
+        os.utime(rules_file, (0, 1))
+        assert router.best("нужен деплой", "agent") == "system_admin"
+
+
+if __name__ == "__main__":
+    test_keyword_matcher_overlapping_matches()
+    test_priorities_match_legacy_chains()
+    test_whole_words_for_task_categories()
+    test_cache_and_hot_reload()
+    print("✅ Маршрутизатор намерений работает корректно")
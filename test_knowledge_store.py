@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Тесты хранилища знаний агентов (журнал + снимки)
+"""
+
+import json
+import os
+import tempfile
+
+from agent_coordinator import EnhancedSharedMemory
+from knowledge_store import KnowledgeStore
+
+
+def make_memory(directory: str):
+    store = KnowledgeStore(directory, min_compact_bytes=10 ** 9)
+    memory = EnhancedSharedMemory()
+    state = store.load()
+    if state is not None:
+        memory.load_state(state)
+    memory.attach_journal(store)
+    return memory, store
+
+
+def test_wal_replay_and_incremental_save():
+    """Сохранение дописывает только новые изменения, загрузка восстанавливает память"""
+    with tempfile.TemporaryDirectory() as tmp:
+        memory, store = make_memory(tmp)
+        memory.store_knowledge("python_style", "Используй type hints", "agent_1", ["python"])
+        memory.add_conversation({"user_id": "u1", "message": "привет"})
+        first = store.save(memory.export_state)["wal_bytes"]
+        assert first > 0
+        assert store.save(memory.export_state)["wal_bytes"] == 0
+
+        memory.store_knowledge("docker_setup", "Сборка образа", "agent_2", ["docker"])
+        second = store.save(memory.export_state)["wal_bytes"]
+        assert 0 < second < first * 2
+        assert not os.path.exists(store.snapshot_path)
+
+        restored, _ = make_memory(tmp)
+        assert restored.get_knowledge("python_style")[0]["value"] == "Используй type hints"
+        assert restored.get_knowledge("python_style")[0]["timestamp"] == memory.knowledge_base["python_style"][0]["timestamp"]
+        assert list(restored.conversation_history) == [{"user_id": "u1", "message": "привет"}]
+        assert restored.search_knowledge("docker")[0]["key"] == "docker_setup"
+
+
+def test_compaction_and_torn_tail():
+    """Сжатие в снимок очищает журнал, оборванная запись журнала отбрасывается"""
+    with tempfile.TemporaryDirectory() as tmp:
+        memory, store = make_memory(tmp)
+        store.min_compact_bytes = 0
+        for i in range(20):
+            memory.store_knowledge(f"fact_{i}", f"значение {i}", "agent_1")
+        result = store.save(memory.export_state)
+        assert result["snapshot_bytes"] > 0
+        assert store.get_stats()["wal_bytes"] == 0
+
+        store.min_compact_bytes = 10 ** 9
+        memory.store_knowledge("fact_20", "после снимка", "agent_1")
+        store.save(memory.export_state)
+        with open(store.wal_path, "ab") as f:
+            f.write(b"\x10\x00\x00\x00garbage")
+
+        restored, restored_store = make_memory(tmp)
+        assert len(restored.knowledge_base) == 21
+        assert restored.get_knowledge("fact_20")[0]["value"] == "после снимка"
+        assert restored_store.seq == store.seq
+        assert os.path.getsize(store.wal_path) == store.get_stats()["flushed_bytes"] - result["wal_bytes"]
+
+
+def test_snapshot_skips_already_compacted_records():
+    """Сбой между заменой снимка и очисткой журнала не дублирует знания"""
+    with tempfile.TemporaryDirectory() as tmp:
+        memory, store = make_memory(tmp)
+        memory.store_knowledge("key", "value", "agent_1")
+        store.flush()
+        wal = store.wal_path.read_bytes()
+        store.min_compact_bytes = 0
+        store.save(memory.export_state)
+        store.wal_path.write_bytes(wal)
+
+        restored, _ = make_memory(tmp)
+        assert len(restored.get_knowledge("key")) == 1
+
+
+def test_legacy_json_migration():
+    """Прежний saved_knowledge.json загружается и переписывается снимком"""
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = {
+            "knowledge_base": {"old_key": [{"value": "старое знание", "agent_id": "a", "timestamp": "t",
+                                            "keywords": ["legacy"], "metadata": {}}]},
+            "conversation_history": [{"message": "m"}],
+            "agent_capabilities": {}
+        }
+        with open(os.path.join(tmp, "saved_knowledge.json"), "w", encoding="utf-8") as f:
+            json.dump(legacy, f, ensure_ascii=False)
+
+        memory, store = make_memory(tmp)
+        assert memory.get_knowledge("old_key")[0]["value"] == "старое знание"
+        assert store.save(memory.export_state)["snapshot_bytes"] > 0
+        assert store.load()["knowledge_base"]["old_key"][0]["keywords"] == ["legacy"]
+
+
+if __name__ == "__main__":
+    test_wal_replay_and_incremental_save()
+    test_compaction_and_torn_tail()
+    test_snapshot_skips_already_compacted_records()
+    test_legacy_json_migration()
+    print("✅ Хранилище знаний работает корректно")
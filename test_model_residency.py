@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Тесты управления моделями Ollama в памяти
+"""
+
+import asyncio
+import time
+from collections import deque
+
+from model_residency import MB, ModelResidencyManager
+
+
+class FakeOllama:
+    """Ollama с /api/ps: загрузка и выгрузка меняют список моделей в памяти"""
+
+    def __init__(self, sizes_mb: dict, loaded=()):
+        self.sizes_mb = sizes_mb
+        self.loaded = list(loaded)
+        self.model_requests = deque()
+        self.calls = []
+        # expires_at из /api/ps; Ollama сдвигает его при каждом запросе любого клиента
+        self.expires = {name: "2026-10-16T12:00:00Z" for name in loaded}
+
+    def use(self, model: str, count: int = 1, age: float = 0.0):
+        for _ in range(count):
+            self.model_requests.append((time.time() - age, model))
+
+    def touch(self, model: str):
+        """Запрос к модели от другого клиента"""
+        self.expires[model] = f"{self.expires.get(model)}+"
+
+    async def list_running(self):
+        return [{"name": name, "size": self.sizes_mb[name] * MB, "expires_at": self.expires.get(name)}
+                for name in self.loaded]
+
+    async def load_model(self, model, keep_alive="5m", timeout=None):
+        self.calls.append(("load", model, keep_alive))
+        self.touch(model)
+        if keep_alive == 0:
+            self.loaded.remove(model)
+        elif model not in self.loaded:
+            self.loaded.append(model)
+        return {"done": True}
+
+    async def unload_model(self, model, timeout=30.0):
+        return await self.load_model(model, keep_alive=0)
+
+
+async def observed_idle(residency, seconds: float, *models):
+    """Модели загружены, но не менялись в /api/ps последние seconds секунд"""
+    await residency.refresh()
+    for model in models:
+        residency.activity[model]["last_active"] -= seconds
+
+
+def test_hot_models_are_preloaded_and_pinned():
+    """Востребованные модели загружаются заранее и закрепляются keep_alive"""
+    async def scenario():
+        ollama = FakeOllama({"llama2:latest": 4000, "gemma:2b": 1500}, loaded=["llama2:latest"])
+        ollama.use("llama2", 5)
+        ollama.use("gemma:2b", 3)
+        residency = ModelResidencyManager(ollama, ram_budget_mb=8000)
+
+        report = await residency.rebalance()
+        assert report["hot"] == ["llama2:latest", "gemma:2b"]
+        assert report["pinned"] == ["llama2:latest"]
+        assert report["preloaded"] == ["gemma:2b"]
+        assert ("load", "gemma:2b", "1h") in ollama.calls
+        assert report["resident_mb"] == 5500
+
+    asyncio.run(scenario())
+
+
+def test_cold_models_are_evicted_under_ram_budget():
+    """Холодная модель выгружается, чтобы горячая поместилась в бюджет"""
+    async def scenario():
+        ollama = FakeOllama({"llama2:latest": 4000, "codellama:latest": 4000, "gemma:2b": 1500},
+                            loaded=["llama2:latest", "codellama:latest"])
+        ollama.use("codellama", 1, age=7200)  # за пределами окна
+        ollama.use("gemma:2b", 4)
+        ollama.use("llama2", 2)
+        residency = ModelResidencyManager(ollama, ram_budget_mb=6000)
+        residency.known_sizes["gemma:2b"] = 1500
+        await observed_idle(residency, 7200, "codellama:latest")
+
+        report = await residency.rebalance()
+        assert report["evicted"] == ["codellama:latest"]
+        assert report["preloaded"] == ["gemma:2b"]
+        assert set(ollama.loaded) == {"llama2:latest", "gemma:2b"}
+        assert residency.resident_mb() <= 6000
+
+    asyncio.run(scenario())
+
+
+def test_evict_idle_unloads_only_unused_models():
+    async def scenario():
+        ollama = FakeOllama({"llama2:latest": 4000, "gemma:2b": 1500}, loaded=["llama2:latest", "gemma:2b"])
+        ollama.use("gemma:2b", 1, age=10)
+        residency = ModelResidencyManager(ollama, ram_budget_mb=0)
+        await observed_idle(residency, 120, "llama2:latest", "gemma:2b")
+
+        assert await residency.evict_idle(idle_seconds=60) == ["llama2:latest"]
+        assert ollama.loaded == ["gemma:2b"]
+        assert residency.get_stats()["evictions"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_models_used_by_other_clients_are_kept():
+    """Без своих запросов активность видна по сдвигу expires_at в /api/ps"""
+    async def scenario():
+        ollama = FakeOllama({"llama2:latest": 4000, "codellama:latest": 4000, "gemma:2b": 1500},
+                            loaded=["llama2:latest", "codellama:latest"])
+        residency = ModelResidencyManager(ollama, ram_budget_mb=5000)
+        residency.known_sizes["gemma:2b"] = 1500
+
+        # Новый процесс не знает истории запросов и ничего не выгружает
+        assert await residency.evict_idle(idle_seconds=60) == []
+
+        await observed_idle(residency, 600, "llama2:latest", "codellama:latest")
+        ollama.touch("codellama:latest")
+        assert await residency.evict_idle(idle_seconds=60) == ["llama2:latest"]
+
+        # Модель, которую обслуживает другой клиент, не уступает место горячей
+        ollama.use("gemma:2b", 3)
+        ollama.loaded.append("llama2:latest")
+        await observed_idle(residency, 600, "llama2:latest")
+        ollama.touch("codellama:latest")
+        report = await residency.rebalance()
+        assert report["evicted"] == ["llama2:latest"]
+        assert report["skipped"] == ["gemma:2b"]
+        assert "codellama:latest" in ollama.loaded
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_hot_models_are_preloaded_and_pinned()
+    test_cold_models_are_evicted_under_ram_budget()
+    test_evict_idle_unloads_only_unused_models()
+    test_models_used_by_other_clients_are_kept()
+    print("✅ Управление моделями в памяти работает корректно")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Тесты адреса Ollama и времени жизни пула соединений
+"""
+
+import asyncio
+
+from ollama_client import OllamaClient, get_ollama_client, normalize_ollama_url
+
+
+def test_ollama_host_is_normalized():
+    """OLLAMA_HOST в формате сервера превращается в адрес API"""
+    assert normalize_ollama_url("0.0.0.0:11434") == "http://localhost:11434"
+    assert normalize_ollama_url("0.0.0.0") == "http://localhost:11434"
+    assert normalize_ollama_url("ollama:11434") == "http://ollama:11434"
+    assert normalize_ollama_url("http://127.0.0.1:8080/") == "http://127.0.0.1:8080"
+    assert normalize_ollama_url("https://ollama.example.com") == "https://ollama.example.com"
+    assert normalize_ollama_url("[::]:11434") == "http://localhost:11434"
+    assert normalize_ollama_url("") == "http://localhost:11434"
+    assert get_ollama_client("0.0.0.0:11434") is get_ollama_client("http://localhost:11434")
+
+
+def test_session_is_closed_with_its_event_loop():
+    """Каждый asyncio.run получает свою сессию, и она закрывается вместе с циклом"""
+    client = OllamaClient()
+    sessions = []
+
+    async def use():
+        sessions.append(client._get_session())
+        assert client._get_session() is sessions[-1]
+
+    for _ in range(3):
+        asyncio.run(use())
+    assert len(set(map(id, sessions))) == 3
+    assert all(session.closed for session in sessions)
+    assert client._loop_state == {}
+
+    async def use_and_close():
+        session = client._get_session()
+        await client.close()
+        return session
+
+    assert asyncio.run(use_and_close()).closed
+    assert client._loop_state == {}
+
+
+if __name__ == "__main__":
+    test_ollama_host_is_normalized()
+    test_session_is_closed_with_its_event_loop()
+    print("✅ Клиент Ollama работает корректно")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Тесты кэша ответов AI движка
+Точные ключи, LRU вытеснение, TTL и дисковый уровень
+"""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from response_cache import ResponseCache, make_cache_key
+
+
+def test_keys_cover_full_prompt():
+    """Промпты с общим префиксом в 100 символов не пересекаются"""
+    prefix = "x" * 100
+    assert make_cache_key("llama2", prefix + "a") != make_cache_key("llama2", prefix + "b")
+    assert make_cache_key("llama2", "p", "system a") != make_cache_key("llama2", "p", "system b")
+    assert make_cache_key("llama2", "p", options={"temperature": 0.5}) != \
+        make_cache_key("llama2", "p", options={"temperature": 0.7})
+    assert make_cache_key("llama2", "p", options={"a": 1, "b": 2}) == \
+        make_cache_key("llama2", "p", options={"b": 2, "a": 1})
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    """Вытесняются давно неиспользуемые записи"""
+    cache = ResponseCache(max_entries=2, db_path=None)
+    cache.set("a", {"content": "1"})
+    cache.set("b", {"content": "2"})
+    assert cache.get("a") is not None
+    cache.set("c", {"content": "3"})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.get_stats()["evictions"] == 1
+
+    cache = ResponseCache(max_entries=100, max_bytes=60, db_path=None)
+    cache.set("a", {"content": "x" * 30})
+    cache.set("b", {"content": "y" * 30})
+    assert len(cache) == 1 and cache.get("b") is not None
+    assert cache.get_stats()["bytes"] <= 60
+
+
+def test_ttl_and_isolation():
+    """Истекшие записи не возвращаются, а выданные копии не меняют кэш"""
+    cache = ResponseCache(db_path=None)
+    cache.set("short", {"content": "old"}, ttl=0.05)
+    cache.set("long", {"content": "value"})
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    assert cache.get_stats()["expirations"] == 1
+
+    cached = cache.get("long")
+    cached["content"] = "changed"
+    assert cache.get("long")["content"] == "value"
+
+
+def test_disk_tier_survives_restart():
+    """Записи на диске доступны после пересоздания кэша"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "cache.db")
+        cache = ResponseCache(db_path=db_path, max_disk_entries=2)
+        cache.set("a", {"content": "1"})
+        cache.set("b", {"content": "2"})
+        cache.set("c", {"content": "3"})
+        cache.close()
+
+        restored = ResponseCache(db_path=db_path)
+        assert restored.get("c") == {"content": "3"}
+        assert restored.get("a") is None
+        assert restored.get_stats()["disk_hits"] == 1
+        restored.close()
+
+
+def test_engine_does_not_repeat_generation():
+    """Повторный детерминированный промпт не доходит до модели"""
+    from benchmark_ollama_client import start_stub_server
+    from ai_engine import OllamaEngine
+
+    stub = start_stub_server(0.0)
+    engine = OllamaEngine(base_url=f"http://127.0.0.1:{stub.server_address[1]}",
+                          response_cache=ResponseCache(db_path=None))
+
+    async def run():
+        try:
+            prefix = "Проанализируй состояние системы и " + "x" * 100
+            first = await engine.generate_response(prefix + " задача 1")
+            second = await engine.generate_response(prefix + " задача 1")
+            third = await engine.generate_response(prefix + " задача 2")
+            assert first.success and second.success and third.success
+            second.content = "changed"
+            assert (await engine.generate_response(prefix + " задача 1")).content == "ok"
+        finally:
+            await engine.client.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        stub.shutdown()
+
+    assert engine.client.stats["requests"] == 2
+    assert engine.response_cache.get_stats()["hits"] == 2
+
+
+if __name__ == "__main__":
+    test_keys_cover_full_prompt()
+    test_lru_eviction_by_entries_and_bytes()
+    test_ttl_and_isolation()
+    test_disk_tier_survives_restart()
+    test_engine_does_not_repeat_generation()
+    print("✅ Кэш ответов работает корректно")
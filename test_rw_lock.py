@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Тесты блокировки чтения/записи
+"""
+
+import threading
+import time
+
+from rw_lock import ReadWriteLock
+
+
+def test_readers_share_writer_excludes():
+    """Читатели входят одновременно, писатель ждет их выхода"""
+    lock = ReadWriteLock()
+    inside = threading.Barrier(3, timeout=2)
+
+    def reader():
+        with lock.read():
+            inside.wait()
+
+    threads = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=2)
+    assert not inside.broken
+
+    events = []
+    lock.acquire_read()
+    writer = threading.Thread(target=lambda: (lock.acquire_write(), events.append("write"), lock.release_write()))
+    writer.start()
+    time.sleep(0.05)
+    assert events == []
+    lock.release_read()
+    writer.join(timeout=2)
+    assert events == ["write"]
+
+
+def test_waiting_writer_blocks_new_readers():
+    """Ожидающий писатель проходит раньше читателей, пришедших после него"""
+    lock = ReadWriteLock()
+    order = []
+    lock.acquire_read()
+
+    def writer():
+        with lock.write():
+            order.append("write")
+
+    def late_reader():
+        with lock.read():
+            order.append("read")
+
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    while not lock.get_stats()["waiting_writers"]:
+        time.sleep(0.001)
+    reader_thread = threading.Thread(target=late_reader)
+    reader_thread.start()
+    time.sleep(0.05)
+    assert order == []
+    lock.release_read()
+    writer_thread.join(timeout=2)
+    reader_thread.join(timeout=2)
+    assert order == ["write", "read"]
+    assert lock.get_stats()["read_waits"] == 1
+
+
+if __name__ == "__main__":
+    test_readers_share_writer_excludes()
+    test_waiting_writer_blocks_new_readers()
+    print("✅ Блокировка чтения/записи работает корректно")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Тесты семантического кэша ответов
+"""
+
+import asyncio
+
+import ai_engine
+from ai_engine import AIResponse, generate_ai_response, prompt_context
+from semantic_cache import SemanticCache
+
+
+def test_near_duplicates_hit_and_different_prompts_miss():
+    """Перефразированный промпт находит ответ, другой запрос - нет"""
+    cache = SemanticCache(threshold=0.85, capacity=8)
+
+    async def run():
+        await cache.add("Оптимизируй использование памяти агентами", "Ответ про память", generation_time=12.5)
+        assert await cache.lookup("Оптимизируй использование памяти агентов") == "Ответ про память"
+        assert await cache.lookup("Напиши функцию сортировки на Python") is None
+        # Другой системный промпт - другое пространство имен
+        assert await cache.lookup("Оптимизируй использование памяти агентами", "llama2|код") is None
+
+    asyncio.run(run())
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert stats["saved_seconds"] == 12.5
+
+
+def test_near_identical_prompts_with_different_meaning_miss():
+    """Другой оператор, число или одно содержательное слово - это другой запрос"""
+    cache = SemanticCache(capacity=16)
+    pairs = [
+        ("1234 + 5678", "1234 - 5678"),
+        ("1234 + 5678", "1234 + 5679"),
+        ("x > 5", "x < 5"),
+        ("Напиши функцию сортировки на Python", "Напиши функцию сортировки на JavaScript"),
+        ("Покажи статистику продаж за январь", "Покажи статистику продаж за февраль"),
+        ("Оптимизируй использование памяти агентами", "Оптимизируй использование диска агентами"),
+    ]
+
+    async def run():
+        for stored, _ in pairs:
+            await cache.add(stored, f"ответ: {stored}")
+        for stored, other in pairs:
+            assert await cache.lookup(other) != f"ответ: {stored}", other
+        # Перестановка слов и пунктуация в конце смысла не меняют
+        await cache.add("Какая погода в Москве сегодня?", "погода")
+        assert await cache.lookup("Какая сегодня погода в Москве?") == "погода"
+
+    asyncio.run(run())
+
+
+def test_capacity_reuses_oldest_rows():
+    """При заполнении вытесняются самые старые ответы"""
+    cache = SemanticCache(threshold=0.99, capacity=2)
+
+    async def run():
+        await cache.add("первый запрос", "1")
+        await cache.add("второй запрос", "2")
+        await cache.add("первый запрос", "1b")  # Обновление существующей строки
+        await cache.add("третий запрос", "3")
+        assert await cache.lookup("первый запрос") is None
+        assert await cache.lookup("второй запрос") == "2"
+        assert await cache.lookup("третий запрос") == "3"
+
+    asyncio.run(run())
+    assert cache.get_stats()["entries"] == 2
+
+
+def test_context_and_options_separate_cached_answers():
+    """Разные факты из prompt_context или параметры генерации не делят ответ"""
+    calls = []
+
+    async def fake_generate(prompt, system_prompt=None, **kwargs):
+        calls.append(kwargs)
+        return AIResponse(content=f"ответ {len(calls)}", model="stub")
+
+    original_engine, original_cache = ai_engine.ai_engine.generate_response, ai_engine.semantic_cache
+    ai_engine.ai_engine.generate_response = fake_generate
+    ai_engine.semantic_cache = SemanticCache(capacity=8)
+
+    async def ask(context=None, **kwargs):
+        token = prompt_context.set(context)
+        try:
+            return await generate_ai_response("Какие агенты сейчас активны?", **kwargs)
+        finally:
+            prompt_context.reset(token)
+
+    async def run():
+        assert await ask("Факт: активен агент A") == "ответ 1"
+        assert await ask("Факт: активен агент A") == "ответ 1"
+        assert await ask("Факт: активен агент B") == "ответ 2"
+        assert await ask("Факт: активен агент A", temperature=0.1) == "ответ 3"
+        assert await ask("Факт: активен агент A", max_tokens=50) == "ответ 4"
+
+    try:
+        asyncio.run(run())
+    finally:
+        ai_engine.ai_engine.generate_response, ai_engine.semantic_cache = original_engine, original_cache
+    assert len(calls) == 4
+
+
+if __name__ == "__main__":
+    test_near_duplicates_hit_and_different_prompts_miss()
+    test_near_identical_prompts_with_different_meaning_miss()
+    test_capacity_reuses_oldest_rows()
+    test_context_and_options_separate_cached_answers()
+    print("✅ Семантический кэш работает корректно")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Тесты объединения одинаковых одновременных запросов
+"""
+
+import asyncio
+
+from ai_engine import OllamaEngine
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+
+
+class CountingClient:
+    """Клиент Ollama, который считает генерации"""
+
+    def __init__(self, tokens=("о", "к", "!"), delay=0.05):
+        self.tokens = tokens
+        self.delay = delay
+        self.calls = 0
+
+    async def generate(self, model, prompt, system=None, options=None, timeout=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"response": "".join(self.tokens)}
+
+    async def generate_stream(self, model, prompt, system=None, options=None, timeout=None):
+        self.calls += 1
+        for token in self.tokens:
+            await asyncio.sleep(self.delay / len(self.tokens))
+            yield {"response": token, "done": False}
+        yield {"response": "", "done": True, "eval_count": len(self.tokens)}
+
+
+def test_duplicates_share_one_call_and_late_subscribers_catch_up():
+    """Дубликаты ждут первый вызов; поздний подписчик получает весь поток"""
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def produce(emit):
+            calls.append(1)
+            for token in ("a", "b", "c"):
+                if emit:
+                    await emit(token)
+                await asyncio.sleep(0.01)
+            return "abc"
+
+        early, late = [], []
+
+        async def collect(target, text):
+            target.append(text)
+
+        first = asyncio.create_task(flight.do("k", produce, on_token=lambda t: collect(early, t)))
+        await asyncio.sleep(0.015)
+        second = asyncio.create_task(flight.do("k", produce, on_token=lambda t: collect(late, t)))
+        plain = asyncio.create_task(flight.do("k", produce))
+        assert await asyncio.gather(first, second, plain) == ["abc"] * 3
+        assert calls == [1]
+        assert early == late == ["a", "b", "c"]
+        assert flight.get_stats()["coalesced"] == 2
+
+        # После завершения ключ освобождается
+        assert flight.in_flight() == 0
+        assert await flight.do("k", produce) == "abc"
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    """Отмена одного из ожидающих не прерывает запрос для остальных"""
+    async def scenario():
+        flight = SingleFlight()
+
+        async def produce(emit):
+            await asyncio.sleep(0.05)
+            return 42
+
+        first = asyncio.create_task(flight.do("k", produce))
+        second = asyncio.create_task(flight.do("k", produce))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == 42
+
+    asyncio.run(scenario())
+
+
+def test_last_cancelled_waiter_stops_underlying_call():
+    """Если отменен единственный ожидающий, запрос прерывается"""
+    async def scenario():
+        flight = SingleFlight()
+        state = {"cancelled": False, "finished": False}
+
+        async def produce(emit):
+            try:
+                await asyncio.sleep(0.2)
+                state["finished"] = True
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+
+        caller = asyncio.create_task(flight.do("k", produce))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.sleep(0.01)
+        assert state == {"cancelled": True, "finished": False}
+        assert flight.in_flight() == 0
+        assert flight.get_stats()["cancelled"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_ollama_engine_burst_makes_one_generation():
+    """Пачка одинаковых запросов, потоковых и обычных, - одна генерация"""
+    async def scenario():
+        engine = OllamaEngine(response_cache=ResponseCache(db_path=None))
+        engine.client = CountingClient()
+        streams = [[] for _ in range(3)]
+
+        def sink(target):
+            async def on_token(text):
+                target.append(text)
+            return on_token
+
+        requests = [engine.generate_response("статус агентов", on_token=sink(stream)) for stream in streams]
+        requests += [engine.generate_response("статус агентов") for _ in range(5)]
+        responses = await asyncio.gather(*requests)
+
+        assert engine.client.calls == 1
+        assert {response.content for response in responses} == {"ок!"}
+        assert len({id(response) for response in responses}) == len(responses)
+        assert all("".join(stream) == "ок!" for stream in streams)
+        assert engine.single_flight.get_stats()["coalesced"] == 7
+
+        # Другой промпт - отдельная генерация
+        await engine.generate_response("другой запрос")
+        assert engine.client.calls == 2
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_duplicates_share_one_call_and_late_subscribers_catch_up()
+    test_cancelled_waiter_does_not_cancel_shared_call()
+    test_last_cancelled_waiter_stops_underlying_call()
+    test_ollama_engine_burst_makes_one_generation()
+    print("✅ Объединение одинаковых запросов работает корректно")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Тесты общего сборщика системных метрик
+"""
+
+import time
+
+from system_metrics import SystemMetricsSampler
+
+
+def test_snapshot_values_and_history():
+    """Снимок содержит правдоподобные значения, буфер ограничен"""
+    sampler = SystemMetricsSampler(interval=60, history_size=3)
+    for _ in range(5):
+        snapshot = sampler.sample_now()
+    assert len(sampler.recent()) == 3
+    assert sampler.latest() is snapshot
+    assert 0.0 <= snapshot.cpu_percent <= 100.0
+    assert 0.0 < snapshot.memory_percent <= 100.0
+    assert snapshot.memory_total_mb > 0
+    assert 0.0 <= snapshot.disk_percent <= 100.0
+    assert snapshot.process_memory_mb > 0
+    assert sampler.get_stats()["samples_taken"] == 5
+
+
+def test_latest_is_cheap():
+    """Чтение снимка не обращается к системе"""
+    sampler = SystemMetricsSampler(interval=60)
+    sampler.start()
+    start = time.perf_counter()
+    for _ in range(10000):
+        sampler.latest()
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+    assert sampler.get_stats()["samples_taken"] == 1
+    assert elapsed < 0.5, f"10000 чтений заняли {elapsed * 1000:.1f} мс"
+
+
+if __name__ == "__main__":
+    test_snapshot_values_and_history()
+    test_latest_is_cheap()
+    print("✅ Сборщик системных метрик работает корректно")
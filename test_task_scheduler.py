@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Тесты планировщика задач JARVIS
+Приоритеты, лимиты по типам, пробуждение из другого потока и backpressure
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from task_scheduler import QueueFullError, TaskScheduler
+
+
+@dataclass
+class Task:
+    id: str
+    type: str
+    priority: int
+    status: str = "pending"
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+
+
+def test_priority_order_with_fifo_ties():
+    """Старший приоритет первым, равные - в порядке постановки"""
+    order = []
+    scheduler = TaskScheduler(workers=1)
+
+    async def handler(parameters):
+        order.append(parameters["name"])
+
+    scheduler.register("job", handler)
+    for name, priority in [("low", 1), ("high_a", 9), ("mid", 5), ("high_b", 9)]:
+        scheduler.submit(Task(id=name, type="job", priority=priority, parameters={"name": name}))
+
+    async def run():
+        scheduler.start()
+        while scheduler.stats["completed"] < 4:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+
+    asyncio.run(run())
+    assert order == ["high_a", "high_b", "mid", "low"]
+
+
+def test_type_limits_and_blocking_handlers():
+    """Лимит типа соблюдается, блокирующие обработчики идут в пул потоков"""
+    active = {"slow": 0, "max_slow": 0}
+    lock = threading.Lock()
+    scheduler = TaskScheduler(workers=4, type_limits={"slow": 1})
+
+    def slow(parameters):
+        with lock:
+            active["slow"] += 1
+            active["max_slow"] = max(active["max_slow"], active["slow"])
+        time.sleep(0.05)
+        with lock:
+            active["slow"] -= 1
+        return threading.current_thread().name
+
+    async def fast(parameters):
+        return "fast"
+
+    scheduler.register("slow", slow)
+    scheduler.register("fast", fast)
+    tasks = [Task(id=f"s{i}", type="slow", priority=5) for i in range(3)]
+    tasks += [Task(id=f"f{i}", type="fast", priority=1) for i in range(3)]
+    for task in tasks:
+        scheduler.submit(task)
+
+    async def run():
+        scheduler.start()
+        while scheduler.stats["completed"] < len(tasks):
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+
+    asyncio.run(run())
+    assert active["max_slow"] == 1
+    assert all(task.result.startswith("jarvis-task") for task in tasks[:3])
+    assert all(task.result == "fast" for task in tasks[3:])
+
+
+def test_cross_thread_wakeup_and_backpressure():
+    """Задача из другого потока стартует за миллисекунды, переполнение отклоняется"""
+    scheduler = TaskScheduler(workers=2, max_queue=2)
+    done = threading.Event()
+
+    async def handler(parameters):
+        done.set()
+
+    scheduler.register("job", handler)
+
+    async def run():
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        submitted_at = time.perf_counter()
+        threading.Thread(target=scheduler.submit, args=(Task(id="t", type="job", priority=5),)).start()
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+        latency = time.perf_counter() - submitted_at
+        await scheduler.stop()
+        return latency
+
+    latency = asyncio.run(run())
+    assert latency < 0.1, f"Задача ждала {latency * 1000:.1f} мс"
+    assert scheduler.stats["max_wait_time"] < 0.1
+
+    # Воркеры остановлены - очередь заполняется и начинает отклонять задачи
+    scheduler.submit(Task(id="a", type="job", priority=5))
+    scheduler.submit(Task(id="b", type="job", priority=5))
+    try:
+        scheduler.submit(Task(id="c", type="job", priority=5))
+        assert False, "Ожидалась QueueFullError"
+    except QueueFullError:
+        pass
+    assert scheduler.stats["rejected"] == 1
+
+
+if __name__ == "__main__":
+    test_priority_order_with_fifo_ties()
+    test_type_limits_and_blocking_handlers()
+    test_cross_thread_wakeup_and_backpressure()
+    print("✅ Планировщик задач работает корректно")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Тесты хранилища задач JARVIS
+"""
+
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict
+
+from task_store import TaskStore, new_task_id
+
+
+@dataclass
+class Task:
+    id: str
+    type: str
+    priority: int
+    status: str
+    created_at: str
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+
+
+def make_task(status: str, task_type: str = "user_message", age_days: float = 0.0) -> Task:
+    created_at = (datetime.now() - timedelta(days=age_days)).isoformat()
+    return Task(id=new_task_id(), type=task_type, priority=5, status=status, created_at=created_at)
+
+
+def test_unique_ids():
+    """ID не совпадают даже в пределах одной секунды"""
+    ids = {new_task_id() for _ in range(1000)}
+    assert len(ids) == 1000
+
+
+def test_pagination_filters_and_compaction():
+    """Постраничная выборка с фильтрами и очистка старых завершенных задач"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TaskStore(db_path=str(Path(tmp) / "tasks.db"), retention_days=7, max_finished=5)
+        for i in range(8):
+            store.save(make_task("completed", age_days=i * 0.1))
+        store.save(make_task("completed", age_days=30))
+        store.save(make_task("pending", task_type="data_analysis"))
+        running = make_task("running", task_type="data_analysis")
+        running.result = {"progress": 0.5}
+        store.save(running)
+
+        page = store.list_tasks(status="completed", limit=3, offset=0)
+        assert len(page) == 3
+        assert page[0]["created_at"] > page[-1]["created_at"]
+        assert store.count(status="completed") == 9
+        assert store.count(task_type="data_analysis") == 2
+        assert store.get(running.id)["result"] == {"progress": 0.5}
+        assert {task["id"] for task in store.unfinished()} == {
+            task["id"] for task in store.list_tasks(task_type="data_analysis")
+        }
+
+        removed = store.compact()
+        assert removed == 4
+        assert store.counts_by_status() == {"completed": 5, "pending": 1, "running": 1}
+        store.close()
+
+
+if __name__ == "__main__":
+    test_unique_ids()
+    test_pagination_filters_and_compaction()
+    print("✅ Хранилище задач работает корректно")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Тесты хранилища временных рядов метрик
+"""
+
+import tempfile
+
+from timeseries_store import TimeSeriesStore
+
+START = 1_700_000_000 - 1_700_000_000 % 3600
+
+
+def fill(store: TimeSeriesStore, hours: int = 3, interval: int = 10):
+    for i in range(hours * 3600 // interval):
+        store.append("cpu_usage", i % 100, START + i * interval, "percent")
+
+
+def test_ring_buffer_and_rollups():
+    """Сырые точки вытесняются, агрегаты сохраняют всю историю"""
+    store = TimeSeriesStore(raw_capacity=100)
+    fill(store)
+    memory = store.get_stats()["memory_bytes"]
+
+    raw = store.query("cpu_usage", START + 3 * 3600 - 300, START + 3 * 3600)
+    assert raw["resolution"] == 0
+    assert len(raw["values"]) == 30
+
+    minutes = store.query("cpu_usage", START, START + 3 * 3600)
+    assert minutes["resolution"] == 60
+    assert len(minutes["timestamps"]) == 180
+    assert minutes["count"][0] == 6
+    assert minutes["min"][0] == 0 and minutes["max"][0] == 5
+
+    quarter = store.query("cpu_usage", START, START + 3 * 3600, step=1800)
+    assert quarter["resolution"] == 900
+    assert quarter["count"] == [180.0] * 6
+    assert abs(quarter["avg"][0] - sum(i % 100 for i in range(180)) / 180) < 1e-9
+
+    # Память не растет с числом точек
+    fill(store)
+    assert store.get_stats()["memory_bytes"] == memory
+    assert store.append("cpu_usage", 1.0, START) is False
+
+
+def test_segments_survive_restart():
+    """Агрегаты восстанавливаются из сегментов на диске"""
+    with tempfile.TemporaryDirectory() as tmp:
+        fill(TimeSeriesStore(raw_capacity=100, segment_dir=tmp))
+        restored = TimeSeriesStore(raw_capacity=100, segment_dir=tmp)
+        hours = restored.query("cpu_usage", START, START + 3 * 3600, step=3600)
+        assert hours["resolution"] == 3600
+        assert hours["count"] == [360.0, 360.0]
+        assert "error" in restored.query("memory_usage")
+
+
+if __name__ == "__main__":
+    test_ring_buffer_and_rollups()
+    test_segments_survive_restart()
+    print("✅ Хранилище временных рядов работает корректно")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Тесты границ между генерациями в потоке токенов
+"""
+
+import asyncio
+
+import ai_engine
+from ai_engine import AIResponse, generate_ai_response, token_callback
+from semantic_cache import SemanticCache
+
+
+class FakeEngine:
+    """Движок, который стримит ответ двумя фрагментами"""
+
+    async def generate_response(self, prompt, model=None, system_prompt=None, on_token=None, **kwargs):
+        for part in (f"{prompt}: ", "готово"):
+            if on_token:
+                await on_token(part)
+        return AIResponse(content=f"{prompt}: готово", model="stub")
+
+
+class SegmentRecorder:
+    """Колбэк с new_segment, как TokenStream в chat_server"""
+
+    def __init__(self):
+        self.segments = []
+
+    async def new_segment(self):
+        self.segments.append("")
+
+    async def __call__(self, text: str):
+        self.segments[-1] += text
+
+
+def test_each_generation_starts_a_new_segment():
+    """README и requirements.txt одного обработчика не склеиваются в один текст"""
+    original_engine, original_cache = ai_engine.ai_engine.default_engine, ai_engine.semantic_cache
+    ai_engine.ai_engine.default_engine = FakeEngine()
+    ai_engine.semantic_cache = SemanticCache(capacity=8)
+    recorder = SegmentRecorder()
+
+    async def handler():
+        await generate_ai_response("README")
+        await generate_ai_response("requirements.txt")
+        # Ответ из семантического кэша - тоже отдельная генерация
+        await generate_ai_response("README")
+
+    async def run():
+        token = token_callback.set(recorder)
+        try:
+            await handler()
+        finally:
+            token_callback.reset(token)
+
+    try:
+        asyncio.run(run())
+    finally:
+        ai_engine.ai_engine.default_engine, ai_engine.semantic_cache = original_engine, original_cache
+    assert recorder.segments == ["README: готово", "requirements.txt: готово", "README: готово"]
+
+
+def test_plain_callback_still_receives_tokens():
+    """Обычная функция без new_segment работает как раньше"""
+    original_engine = ai_engine.ai_engine.default_engine
+    ai_engine.ai_engine.default_engine = FakeEngine()
+    tokens = []
+
+    async def on_token(text):
+        tokens.append(text)
+
+    try:
+        asyncio.run(ai_engine.ai_engine.generate_response("план", on_token=on_token))
+    finally:
+        ai_engine.ai_engine.default_engine = original_engine
+    assert tokens == ["план: ", "готово"]
+
+
+if __name__ == "__main__":
+    test_each_generation_starts_a_new_segment()
+    test_plain_callback_still_receives_tokens()
+    print("✅ Границы генераций в потоке токенов работают корректно")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Тесты векторного хранилища знаний агентов
+"""
+
+import asyncio
+import tempfile
+import threading
+
+from ai_engine import prompt_context
+from multi_agent_system import AgentMessage, AgentType, BaseAgent, SharedMemory
+from vector_store import IVFIndex, VectorStore, format_facts
+
+FACTS = [
+    "Ollama запускается командой ollama serve на порту 11434",
+    "Docker образ собирается через docker build",
+    "Тесты проекта запускаются через pytest",
+    "Мониторинг хранит метрики в кольцевых буферах",
+]
+
+
+def test_flat_search_and_dedup():
+    """Точный поиск находит ближайший факт, повторный текст не добавляется"""
+    store = VectorStore()
+    for fact in FACTS:
+        assert store.add(fact, {"source": "test"})
+    assert not store.add(FACTS[0])
+    assert len(store) == len(FACTS)
+
+    results = store.retrieve("как запустить ollama serve", k=2)
+    assert results[0]["text"] == FACTS[0]
+    assert results[0]["metadata"] == {"source": "test"}
+    assert results[0]["score"] >= results[1]["score"]
+    assert store.retrieve("", k=2) == []
+    assert store.get_stats()["index"] == "flat"
+
+
+def test_ivf_index_after_threshold():
+    """После порога поиск идет по IVF индексу и находит тот же факт"""
+    store = VectorStore(index_threshold=200, nprobe=4)
+    for i in range(300):
+        store.add(f"заметка номер {i} про сервис service_{i}")
+    store.add(FACTS[1])
+    assert store.retrieve("docker build образ", k=1)[0]["text"] == FACTS[1]
+    assert store.wait_for_index(timeout=10)
+    assert store.get_stats()["index"] == "ivf"
+    assert store.retrieve("docker build образ", k=1)[0]["text"] == FACTS[1]
+
+    # Добавленные после построения индекса элементы тоже находятся
+    store.add(FACTS[2])
+    assert store.retrieve("pytest тесты", k=1)[0]["text"] == FACTS[2]
+
+
+def test_index_builds_in_background():
+    """Поиск не ждет построения индекса; строки, добавленные во время построения, находятся"""
+    store = VectorStore(index_threshold=200, nprobe=4)
+    for i in range(250):
+        store.add(f"заметка номер {i} про сервис service_{i}")
+
+    release = threading.Event()
+    build = IVFIndex.build
+
+    def gated_build(index, matrix, *args, **kwargs):
+        release.wait(10)
+        build(index, matrix, *args, **kwargs)
+
+    IVFIndex.build = gated_build
+    try:
+        assert store.retrieve("заметка номер 7", k=1)
+        assert store.get_stats()["index_building"]
+        # Пока индекс строится, поиск идет точным перебором
+        store.add(FACTS[0])
+        assert store.retrieve("ollama serve", k=1)[0]["text"] == FACTS[0]
+        assert store.get_stats()["index"] == "flat"
+    finally:
+        release.set()
+        IVFIndex.build = build
+
+    assert store.wait_for_index(timeout=10)
+    stats = store.get_stats()
+    assert (stats["index"], stats["index_building"]) == ("ivf", False)
+    assert store._index.pending == [250]
+    assert store.retrieve("ollama serve", k=1)[0]["text"] == FACTS[0]
+
+
+def test_persistence_and_truncated_tail():
+    """Хранилище на диске переживает перезапуск, оборванная запись отбрасывается"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VectorStore(path=tmp)
+        for fact in FACTS:
+            store.add(fact)
+        with open(store._vector_file, "ab") as f:
+            f.write(b"\x00" * 10)
+
+        reloaded = VectorStore(path=tmp)
+        assert len(reloaded) == len(FACTS)
+        assert not reloaded.add(FACTS[3])
+        assert reloaded.retrieve("метрики мониторинга", k=1)[0]["text"] == FACTS[3]
+        assert reloaded.add("Новый факт после перезапуска")
+        assert len(VectorStore(path=tmp)) == len(FACTS) + 1
+
+
+def test_format_facts_budget():
+    """Блок фактов укладывается в бюджет символов"""
+    facts = [{"text": "а" * 50}, {"text": "б" * 50}, {"text": "в" * 50}]
+    block = format_facts(facts, max_chars=110)
+    assert block.count("\n- ") == 2
+    assert len(format_facts([{"text": "г" * 500}], max_chars=100)) <= 100 + len("Известные факты:\n")
+    assert format_facts([]) == ""
+
+
+def test_agent_prompt_context():
+    """Обработчик агента видит релевантные факты, после обработки контекст сброшен"""
+    memory = SharedMemory()
+    for i, fact in enumerate(FACTS):
+        memory.store_knowledge(f"fact_{i}", fact, "tester")
+    agent = BaseAgent("agent_1", AgentType.GENERAL_ASSISTANT, "Тестовый", "")
+    agent.set_shared_memory(memory)
+
+    seen = []
+
+    async def handler(content):
+        seen.append(prompt_context.get())
+        return {"ok": True}
+
+    agent.add_skill("ask", handler)
+    message = AgentMessage("m1", "user", "agent_1", "ask", {"question": "как запустить ollama serve"},
+                           "2024-01-01T00:00:00")
+    assert asyncio.run(agent.process_message(message)) == {"ok": True}
+    assert seen[0].startswith("Известные факты:")
+    assert FACTS[0] in seen[0]
+    assert prompt_context.get() is None
+
+
+if __name__ == "__main__":
+    test_flat_search_and_dedup()
+    test_ivf_index_after_threshold()
+    test_index_builds_in_background()
+    test_persistence_and_truncated_tail()
+    test_format_facts_budget()
+    test_agent_prompt_context()
+    print("✅ Векторное хранилище работает корректно")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Полнотекстовый индекс знаний JARVIS
+Инвертированный индекс токенов для ранжирования BM25 и триграммный
+индекс словаря для поиска по подстроке и префиксу. Документы
+добавляются и обновляются по одному, без перестройки индекса
+"""
+
+import heapq
+import math
+import re
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from rw_lock import ReadWriteLock
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Токены текста в нижнем регистре"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class TextIndex:
+    """Инвертированный индекс с ранжированием BM25
+
+    Термин запроса сопоставляется с токеном целиком, а если он длиннее
+    двух символов - еще и с токенами, содержащими его как подстроку
+    (кандидаты отбираются по триграммам, вес частичного совпадения ниже).
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, partial_weight: float = 0.5,
+                 max_expansions: int = 50):
+        self.k1 = k1
+        self.b = b
+        self.partial_weight = partial_weight
+        self.max_expansions = max_expansions
+        self.postings: Dict[str, Dict[Hashable, int]] = defaultdict(dict)  # токен -> {doc_id: tf}
+        self.trigram_index: Dict[str, Set[str]] = defaultdict(set)  # триграмма -> токены
+        self.doc_terms: Dict[Hashable, Dict[str, int]] = {}
+        self.doc_lengths: Dict[Hashable, int] = {}
+        self.total_length = 0
+        self._lock = ReadWriteLock()  # поиски идут параллельно
+
+    def add(self, doc_id: Hashable, text: str) -> None:
+        """Добавить или заменить документ"""
+        terms: Dict[str, int] = defaultdict(int)
+        for token in tokenize(text):
+            terms[token] += 1
+        with self._lock.write():
+            self._add(doc_id, terms)
+    
+    def _add(self, doc_id: Hashable, terms: Dict[str, int]) -> None:
+        self._remove(doc_id)
+        for token, count in terms.items():
+            postings = self.postings[token]
+            if not postings:
+                for gram in trigrams(token):
+                    self.trigram_index[gram].add(token)
+            postings[doc_id] = count
+        self.doc_terms[doc_id] = dict(terms)
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+
+    def add_many(self, documents: Iterable[Tuple[Hashable, str]]) -> None:
+        """Добавить пачку документов (doc_id, text) под одной блокировкой"""
+        prepared = []
+        for doc_id, text in documents:
+            terms: Dict[str, int] = defaultdict(int)
+            for token in tokenize(text):
+                terms[token] += 1
+            prepared.append((doc_id, terms))
+        with self._lock.write():
+            for doc_id, terms in prepared:
+                self._add(doc_id, terms)
+    
+    def remove(self, doc_id: Hashable) -> None:
+        """Удалить документ из индекса"""
+        with self._lock.write():
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: Hashable) -> None:
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for token in terms:
+            postings = self.postings[token]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[token]
+                for gram in trigrams(token):
+                    tokens = self.trigram_index.get(gram)
+                    if tokens is not None:
+                        tokens.discard(token)
+                        if not tokens:
+                            del self.trigram_index[gram]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def _expand(self, term: str) -> Dict[str, float]:
+        """Токены словаря, подходящие под термин, с весами"""
+        matches = {term: 1.0} if term in self.postings else {}
+        grams = trigrams(term)
+        if not grams:
+            return matches
+        # Пересечение начинаем с самой редкой триграммы
+        candidate_sets = sorted((self.trigram_index.get(gram, set()) for gram in grams), key=len)
+        candidates = set(candidate_sets[0])
+        for tokens in candidate_sets[1:]:
+            candidates &= tokens
+            if not candidates:
+                break
+        # Как max_expansions в поисковых движках: префиксные и короткие совпадения первыми
+        partial = [token for token in candidates if token != term and term in token]
+        partial = heapq.nsmallest(self.max_expansions, partial,
+                                  key=lambda token: (not token.startswith(term), len(token), token))
+        for token in partial:
+            matches[token] = self.partial_weight
+        return matches
+
+    def search(self, query: str, limit: int = 10,
+               boost: Optional[Callable[[Hashable], float]] = None) -> List[Tuple[Hashable, float]]:
+        """Документы по убыванию релевантности: [(doc_id, score)]
+
+        boost - необязательный множитель оценки документа (например, по частоте использования)
+        """
+        with self._lock.read():
+            doc_count = len(self.doc_lengths)
+            if not doc_count:
+                return []
+            average_length = self.total_length / doc_count or 1.0
+            expanded: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                for token, weight in self._expand(term).items():
+                    expanded[token] = max(weight, expanded.get(token, 0.0))
+            # Токены из большинства документов почти не влияют на ранг (idf ~ 0),
+            # а обходить их списки дорого - пропускаем, если в запросе есть более редкие
+            common = {token for token in expanded if len(self.postings[token]) > doc_count / 2}
+            if len(common) < len(expanded):
+                for token in common:
+                    del expanded[token]
+
+            scores: Dict[Hashable, float] = defaultdict(float)
+            for token, weight in expanded.items():
+                postings = self.postings[token]
+                df = len(postings)
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                    scores[doc_id] += weight * idf * tf * (self.k1 + 1) / (tf + norm)
+        if boost is not None:
+            for doc_id in scores:
+                scores[doc_id] *= boost(doc_id)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Хранилище временных рядов метрик JARVIS
+Для каждой метрики - заранее выделенные кольцевые буферы NumPy:
+сырые точки и агрегаты за 1 мин, 15 мин и 1 час (min/max/avg/p95).
+Закрытые агрегаты можно дописывать в файлы-сегменты на диске,
+чтобы история переживала перезапуск
+"""
+
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RAW_DTYPE = np.dtype([("timestamp", "f8"), ("value", "f8")])
+ROLLUP_DTYPE = np.dtype([
+    ("timestamp", "f8"), ("min", "f8"), ("max", "f8"),
+    ("avg", "f8"), ("p95", "f8"), ("count", "f8")
+])
+
+# (шаг в секундах, емкость буфера): 1 мин - 7 дней, 15 мин - 30 дней, 1 час - 90 дней
+DEFAULT_ROLLUPS = ((60, 7 * 24 * 60), (900, 30 * 24 * 4), (3600, 90 * 24))
+DEFAULT_RAW_CAPACITY = 2880
+
+
+class RingBuffer:
+    """Кольцевой буфер структурированных записей, упорядоченных по timestamp"""
+
+    def __init__(self, capacity: int, dtype: np.dtype):
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.capacity = capacity
+        self.head = 0
+        self.size = 0
+
+    def append(self, row: Tuple) -> None:
+        self.data[self.head] = row
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _segments(self) -> List[np.ndarray]:
+        """Части буфера в хронологическом порядке (без копирования)"""
+        if self.size < self.capacity:
+            return [self.data[:self.size]]
+        return [self.data[self.head:], self.data[:self.head]]
+
+    def last_timestamp(self) -> Optional[float]:
+        if not self.size:
+            return None
+        return float(self.data[(self.head - 1) % self.capacity]["timestamp"])
+
+    def first_timestamp(self) -> Optional[float]:
+        if not self.size:
+            return None
+        return float(self._segments()[0][0]["timestamp"])
+
+    def range(self, start: float, end: float) -> np.ndarray:
+        """Записи с start <= timestamp <= end (бинарный поиск по каждой части)"""
+        parts = []
+        for segment in self._segments():
+            timestamps = segment["timestamp"]
+            i = np.searchsorted(timestamps, start, side="left")
+            j = np.searchsorted(timestamps, end, side="right")
+            if j > i:
+                parts.append(segment[i:j])
+        if not parts:
+            return np.empty(0, dtype=self.data.dtype)
+        return parts[0].copy() if len(parts) == 1 else np.concatenate(parts)
+
+
+def aggregate(values: np.ndarray) -> Tuple[float, float, float, float, float]:
+    """min, max, avg, p95, count набора значений"""
+    return (
+        float(values.min()), float(values.max()), float(values.mean()),
+        float(np.percentile(values, 95)), float(len(values))
+    )
+
+
+class RollupTier:
+    """Агрегаты метрики с фиксированным шагом"""
+
+    def __init__(self, step: int, capacity: int):
+        self.step = step
+        self.buffer = RingBuffer(capacity, ROLLUP_DTYPE)
+        self._bucket: Optional[float] = None
+        self._pending: List[float] = []
+
+    def add(self, timestamp: float, value: float) -> Optional[Tuple]:
+        """Добавить точку; возвращает закрытый агрегат, если интервал сменился"""
+        bucket = timestamp - timestamp % self.step
+        closed = None
+        if self._bucket is not None and bucket != self._bucket:
+            closed = self._close()
+        self._bucket = bucket
+        self._pending.append(value)
+        return closed
+
+    def _close(self) -> Tuple:
+        row = (self._bucket,) + aggregate(np.asarray(self._pending))
+        self.buffer.append(row)
+        self._pending = []
+        return row
+
+    def range(self, start: float, end: float) -> np.ndarray:
+        """Закрытые агрегаты плюс текущий незавершенный интервал"""
+        rows = self.buffer.range(start, end)
+        if self._pending and start <= self._bucket <= end:
+            current = np.array([(self._bucket,) + aggregate(np.asarray(self._pending))], dtype=ROLLUP_DTYPE)
+            rows = np.concatenate([rows, current])
+        return rows
+
+
+class MetricSeries:
+    """Сырые точки и агрегаты одной метрики"""
+
+    def __init__(self, raw_capacity: int, rollups):
+        self.raw = RingBuffer(raw_capacity, RAW_DTYPE)
+        self.tiers = [RollupTier(step, capacity) for step, capacity in rollups]
+
+
+class SegmentWriter:
+    """Дописываемые файлы-сегменты закрытых агрегатов: <dir>/<метрика>/<шаг>s/<дата>.bin"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _tier_dir(self, name: str, step: int) -> Path:
+        # Имя метрики становится частью пути - оставляем только безопасные символы
+        return self.directory / re.sub(r"[^A-Za-z0-9_.-]", "_", name) / f"{step}s"
+
+    def append(self, name: str, step: int, row: Tuple, retention: float) -> None:
+        tier_dir = self._tier_dir(name, step)
+        path = tier_dir / (time.strftime("%Y-%m-%d", time.gmtime(row[0])) + ".bin")
+        if not path.exists():
+            tier_dir.mkdir(parents=True, exist_ok=True)
+            # Новый сегмент начинается раз в сутки - заодно удаляем устаревшие
+            self._expire(tier_dir, row[0] - retention)
+        with open(path, "ab") as f:
+            f.write(np.array([row], dtype=ROLLUP_DTYPE).tobytes())
+
+    def _expire(self, tier_dir: Path, cutoff: float) -> None:
+        cutoff_day = time.strftime("%Y-%m-%d", time.gmtime(cutoff))
+        for segment in tier_dir.glob("*.bin"):
+            if segment.stem < cutoff_day:
+                segment.unlink()
+
+    def load(self, name: str, step: int, capacity: int) -> np.ndarray:
+        """Последние capacity агрегатов метрики из сегментов"""
+        tier_dir = self._tier_dir(name, step)
+        if not tier_dir.exists():
+            return np.empty(0, dtype=ROLLUP_DTYPE)
+        rows, total = [], 0
+        for segment in sorted(tier_dir.glob("*.bin"), reverse=True):
+            data = np.fromfile(segment, dtype=ROLLUP_DTYPE)
+            rows.append(data)
+            total += len(data)
+            if total >= capacity:
+                break
+        if not rows:
+            return np.empty(0, dtype=ROLLUP_DTYPE)
+        return np.concatenate(rows[::-1])[-capacity:]
+
+    def metric_names(self) -> List[str]:
+        return [path.name for path in self.directory.iterdir() if path.is_dir()]
+
+
+class TimeSeriesStore:
+    """Хранилище временных рядов с фиксированным расходом памяти"""
+
+    def __init__(self, raw_capacity: int = DEFAULT_RAW_CAPACITY, rollups=DEFAULT_ROLLUPS,
+                 segment_dir: Optional[str] = None):
+        self.raw_capacity = raw_capacity
+        self.rollups = tuple(rollups)
+        self.series: Dict[str, MetricSeries] = {}
+        self.units: Dict[str, str] = {}
+        self.total_samples = 0
+        # Запись идет из потока мониторинга, чтение - из API
+        self._lock = threading.Lock()
+        self.segments = SegmentWriter(segment_dir) if segment_dir else None
+        if self.segments:
+            self._load_segments()
+
+    def _get_series(self, name: str) -> MetricSeries:
+        series = self.series.get(name)
+        if series is None:
+            series = self.series[name] = MetricSeries(self.raw_capacity, self.rollups)
+        return series
+
+    def _load_segments(self):
+        """Восстановление агрегатов из сегментов на диске"""
+        for name in self.segments.metric_names():
+            series = self._get_series(name)
+            for tier in series.tiers:
+                for row in self.segments.load(name, tier.step, tier.buffer.capacity):
+                    tier.buffer.append(tuple(row))
+        if self.series:
+            logger.info(f"📊 История метрик загружена с диска: {len(self.series)} метрик")
+
+    def append(self, name: str, value: float, timestamp: Optional[float] = None, unit: str = "") -> bool:
+        """Добавить точку; точки старше последней отбрасываются"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            series = self._get_series(name)
+            last = series.raw.last_timestamp()
+            if last is not None and timestamp < last:
+                return False
+            series.raw.append((timestamp, value))
+            if unit:
+                self.units[name] = unit
+            self.total_samples += 1
+            for tier in series.tiers:
+                closed = tier.add(timestamp, value)
+                if closed and self.segments:
+                    try:
+                        self.segments.append(name, tier.step, closed, tier.step * tier.buffer.capacity)
+                    except OSError as e:
+                        logger.error(f"❌ Ошибка записи сегмента метрики {name}: {e}")
+        return True
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(self.series)
+
+    def _choose_resolution(self, series: MetricSeries, start: float, step: Optional[float]) -> int:
+        """Самое грубое разрешение не крупнее step, покрывающее начало диапазона"""
+        resolutions = [(0, series.raw)] + [(tier.step, tier.buffer) for tier in series.tiers]
+        candidates = [(res, buf) for res, buf in resolutions if step is None or res <= step] or resolutions[:1]
+        if step is not None:
+            candidates = candidates[::-1]
+        for res, buffer in candidates:
+            first = buffer.first_timestamp()
+            if first is not None and first <= start:
+                return res
+        # Диапазон старше хранимого в подходящих буферах - берем ряд с самой длинной историей
+        for res, buffer in reversed(resolutions):
+            first = buffer.first_timestamp()
+            if first is not None and first <= start:
+                return res
+        return candidates[0][0]
+
+    def query(self, name: str, start: Optional[float] = None, end: Optional[float] = None,
+              step: Optional[float] = None) -> Dict[str, Any]:
+        """Ряд метрики за диапазон [start, end] в виде массивов
+
+        Без step возвращаются точки самого подробного ряда, покрывающего диапазон.
+        Со step данные берутся из подходящих агрегатов и группируются по step;
+        p95 группы из нескольких агрегатов - максимум их p95 (оценка сверху).
+        """
+        end = time.time() if end is None else end
+        start = end - 3600 if start is None else start
+        with self._lock:
+            series = self.series.get(name)
+            if series is None:
+                return {"name": name, "error": f"Метрика {name} не найдена"}
+            resolution = self._choose_resolution(series, start, step)
+            if resolution == 0:
+                rows = series.raw.range(start, end)
+            else:
+                tier = next(t for t in series.tiers if t.step == resolution)
+                rows = tier.range(start, end)
+
+        result = {"name": name, "unit": self.units.get(name, ""), "from": start, "to": end,
+                  "resolution": resolution}
+        if step and step > resolution and len(rows):
+            result.update(self._downsample(rows, resolution, start, step))
+            result["step"] = step
+        elif resolution == 0:
+            result.update({"timestamps": rows["timestamp"].tolist(), "values": rows["value"].tolist()})
+        else:
+            result.update({field: rows[field].tolist() for field in ROLLUP_DTYPE.names})
+            result["timestamps"] = result.pop("timestamp")
+        return result
+
+    def _downsample(self, rows: np.ndarray, resolution: int, start: float, step: float) -> Dict[str, List]:
+        """Группировка записей по интервалам step"""
+        groups = np.floor((rows["timestamp"] - start) / step).astype(np.int64)
+        boundaries = np.flatnonzero(np.diff(groups)) + 1
+        starts = np.concatenate([[0], boundaries])
+        timestamps = start + groups[starts] * step
+        if resolution == 0:
+            values = rows["value"]
+            stats = [aggregate(chunk) for chunk in np.split(values, boundaries)]
+            mins, maxs, avgs, p95s, counts = (list(column) for column in zip(*stats))
+        else:
+            counts = np.add.reduceat(rows["count"], starts)
+            mins = np.minimum.reduceat(rows["min"], starts).tolist()
+            maxs = np.maximum.reduceat(rows["max"], starts).tolist()
+            avgs = (np.add.reduceat(rows["avg"] * rows["count"], starts) / counts).tolist()
+            p95s = np.maximum.reduceat(rows["p95"], starts).tolist()
+            counts = counts.tolist()
+        return {"timestamps": timestamps.tolist(), "min": mins, "max": maxs,
+                "avg": avgs, "p95": p95s, "count": counts}
+
+    def latest(self, name: str) -> Optional[Tuple[float, float]]:
+        """Последняя точка метрики (timestamp, value)"""
+        with self._lock:
+            series = self.series.get(name)
+            if series is None or not series.raw.size:
+                return None
+            row = series.raw.data[(series.raw.head - 1) % series.raw.capacity]
+            return float(row["timestamp"]), float(row["value"])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика хранилища"""
+        with self._lock:
+            memory = sum(
+                series.raw.data.nbytes + sum(tier.buffer.data.nbytes for tier in series.tiers)
+                for series in self.series.values()
+            )
+            return {
+                "metrics": len(self.series),
+                "total_samples": self.total_samples,
+                "memory_bytes": memory,
+                "raw_capacity": self.raw_capacity,
+                "rollups": [{"step": step, "capacity": capacity} for step, capacity in self.rollups],
+                "segment_dir": str(self.segments.directory) if self.segments else None
+            }
+
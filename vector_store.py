@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Векторное хранилище знаний агентов
+Матрица float32 (в памяти или в дописываемом файле через mmap),
+точный косинусный поиск для небольших объемов и IVF индекс
+(кластеры k-means, строится в фоновом потоке) после порога. Используется для подстановки
+в промпт нескольких релевантных фактов вместо длинной истории
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from semantic_cache import create_embedder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.getenv("AGENT_VECTOR_STORE_DIR")
+DEFAULT_EMBEDDER = os.getenv("AGENT_VECTOR_EMBEDDER", "hashing")
+
+
+class IVFIndex:
+    """Инвертированный индекс по кластерам: поиск только в ближайших nprobe кластерах"""
+
+    def __init__(self, nlist: int, nprobe: int = 8, iterations: int = 10, seed: int = 0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.rng = np.random.default_rng(seed)
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[List[int]] = []
+        # Строки, добавленные после построения: просматриваются целиком до перестройки,
+        # центроиды по старым данным не гарантируют, что новый текст попадет в nprobe
+        self.pending: List[int] = []
+        self.built_size = 0
+
+    def build(self, matrix: np.ndarray, chunk: int = 8192) -> None:
+        """k-means на выборке и распределение всех строк по кластерам"""
+        size = len(matrix)
+        sample_size = min(size, self.nlist * 64)
+        sample = np.asarray(matrix[self.rng.choice(size, sample_size, replace=False)])
+        centroids = sample[self.rng.choice(sample_size, self.nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(self.nlist):
+                members = sample[assignment == cluster]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[cluster] = centroid / norm if norm else centroid
+        self.centroids = centroids
+        self.lists = [[] for _ in range(self.nlist)]
+        for start in range(0, size, chunk):
+            assignment = np.argmax(np.asarray(matrix[start:start + chunk]) @ centroids.T, axis=1)
+            for offset, cluster in enumerate(assignment):
+                self.lists[cluster].append(start + offset)
+        self.built_size = size
+
+    def add(self, row: int) -> None:
+        self.pending.append(row)
+
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        probes = np.argsort(self.centroids @ query)[-self.nprobe:]
+        rows = [self.lists[cluster] for cluster in probes if self.lists[cluster]]
+        if self.pending:
+            rows.append(self.pending)
+        if not rows:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.asarray(r, dtype=np.int64) for r in rows])
+
+
+class VectorStore:
+    """Хранилище текстов с эмбеддингами и поиском ближайших
+
+    Без path матрица живет в памяти. С path векторы дописываются в
+    vectors.f32, тексты - в items.jsonl, а поиск идет по отображению
+    файла в память, поэтому знания переживают перезапуск.
+    """
+
+    def __init__(self, path: Optional[str] = None, embedder=None,
+                 index_threshold: int = 20000, nprobe: int = 8):
+        self.embedder = embedder or create_embedder(DEFAULT_EMBEDDER)
+        self.dim = self.embedder.dim
+        self.index_threshold = index_threshold
+        self.nprobe = nprobe
+        self.items: List[Dict[str, Any]] = []
+        self._hashes: Dict[str, int] = {}
+        self._index: Optional[IVFIndex] = None
+        # Построение индекса идет в фоновом потоке, поиск тем временем
+        # обслуживает прежний индекс (или точный перебор) вместе с pending
+        self._build_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.path = Path(path) if path else None
+        # В памяти - матрица с удвоением емкости, на диске - отображение файла
+        self._vectors = np.zeros((0 if self.path else 1024, self.dim), dtype=np.float32)
+        self._mapped: Optional[np.ndarray] = None
+        if self.path:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._vector_file = self.path / "vectors.f32"
+            self._items_file = self.path / "items.jsonl"
+            self._load()
+
+    def _load(self):
+        """Загрузка элементов, записанных целиком (обрыв записи при сбое отбрасывается)"""
+        items = []
+        if self._items_file.exists():
+            with open(self._items_file, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        items.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+        vector_rows = self._vector_file.stat().st_size // (4 * self.dim) if self._vector_file.exists() else 0
+        count = min(len(items), vector_rows)
+        if count < len(items) or count < vector_rows:
+            # Выравниваем файлы по последней полной записи
+            with open(self._vector_file, "r+b" if self._vector_file.exists() else "wb") as f:
+                f.truncate(count * 4 * self.dim)
+            with open(self._items_file, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in items[:count])
+        self.items = items[:count]
+        self._hashes = {item["hash"]: row for row, item in enumerate(self.items)}
+        if self.items:
+            logger.info(f"📚 Векторное хранилище загружено: {len(self.items)} элементов")
+
+    def _matrix(self) -> np.ndarray:
+        """Матрица всех векторов (n, dim)"""
+        count = len(self.items)
+        if not self.path:
+            return self._vectors[:count]
+        if self._mapped is None or len(self._mapped) != count:
+            self._mapped = (np.memmap(self._vector_file, dtype=np.float32, mode="r", shape=(count, self.dim))
+                            if count else np.zeros((0, self.dim), dtype=np.float32))
+        return self._mapped
+
+    def add(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """Добавить текст; повторный текст не дублируется"""
+        text_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if text_hash in self._hashes:
+            return False
+        vector = self.embedder.embed(text).astype(np.float32)
+        item = {"text": text, "metadata": metadata or {}, "hash": text_hash}
+        with self._lock:
+            if text_hash in self._hashes:
+                return False
+            row = len(self.items)
+            if self.path:
+                with open(self._vector_file, "ab") as f:
+                    f.write(vector.tobytes())
+                with open(self._items_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            else:
+                if row == len(self._vectors):
+                    self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+                self._vectors[row] = vector
+            self.items.append(item)
+            self._hashes[text_hash] = row
+            if self._index is not None:
+                self._index.add(row)
+        return True
+
+    def _needs_index(self, size: int) -> bool:
+        """IVF индекс нужен после порога и перестраивается, когда новых строк больше четверти"""
+        if size < self.index_threshold:
+            return False
+        return self._index is None or len(self._index.pending) > self._index.built_size // 4
+
+    def _start_index_build(self, matrix: np.ndarray) -> None:
+        """Запуск построения индекса в фоне (вызывается под self._lock)"""
+        if self._build_thread is not None and self._build_thread.is_alive():
+            return
+        self._build_thread = threading.Thread(target=self._build_index, args=(matrix,),
+                                              name="vector-index", daemon=True)
+        self._build_thread.start()
+
+    def _build_index(self, matrix: np.ndarray) -> None:
+        """k-means по снимку матрицы без блокировки, затем замена индекса под блокировкой"""
+        size = len(matrix)
+        try:
+            index = IVFIndex(nlist=int(np.sqrt(size)), nprobe=self.nprobe)
+            index.build(matrix)
+        except Exception as e:
+            logger.error(f"❌ Ошибка построения IVF индекса: {e}")
+            return
+        with self._lock:
+            # Строки, добавленные во время построения, просматриваются целиком
+            index.pending = list(range(size, len(self.items)))
+            self._index = index
+        logger.info(f"📚 IVF индекс построен: {size} векторов, {index.nlist} кластеров")
+
+    def wait_for_index(self, timeout: Optional[float] = None) -> bool:
+        """Дождаться фонового построения индекса; True, если построение не идет"""
+        thread = self._build_thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def retrieve(self, query: str, k: int = 3, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """k ближайших по косинусу текстов: [{text, score, metadata}]"""
+        query_vector = self.embedder.embed(query).astype(np.float32)
+        with self._lock:
+            matrix = self._matrix()
+            if not len(matrix) or not query_vector.any():
+                return []
+            if self._needs_index(len(matrix)):
+                self._start_index_build(matrix)
+            index = self._index
+            if index is not None:
+                rows = index.candidates(query_vector)
+                scores = np.asarray(matrix[rows]) @ query_vector
+            else:
+                rows = None
+                scores = np.asarray(matrix) @ query_vector
+            top = min(k, len(scores))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            results = []
+            for position in best:
+                score = float(scores[position])
+                if score < min_score:
+                    break
+                item = self.items[int(rows[position]) if rows is not None else int(position)]
+                results.append({"text": item["text"], "score": score, "metadata": item["metadata"]})
+            return results
+
+    async def aretrieve(self, query: str, k: int = 3, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """retrieve для event loop: тяжелые эмбеддеры считаются в потоке"""
+        if getattr(self.embedder, "blocking", False):
+            return await asyncio.to_thread(self.retrieve, query, k, min_score)
+        return self.retrieve(query, k, min_score)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика хранилища"""
+        return {
+            "items": len(self.items),
+            "dim": self.dim,
+            "embedder": self.embedder.name,
+            "index": "ivf" if self._index is not None else "flat",
+            "index_building": self._build_thread is not None and self._build_thread.is_alive(),
+            "path": str(self.path) if self.path else None
+        }
+
+
+def create_vector_store(name: str) -> VectorStore:
+    """Хранилище для компонента: на диске в AGENT_VECTOR_STORE_DIR/<name>, если каталог задан"""
+    return VectorStore(path=os.path.join(DEFAULT_STORE_DIR, name) if DEFAULT_STORE_DIR else None)
+
+
+def format_facts(facts: List[Dict[str, Any]], max_chars: int = 1200) -> str:
+    """Блок релевантных фактов для промпта в пределах бюджета символов"""
+    lines = []
+    used = 0
+    for fact in facts:
+        line = f"- {fact['text']}"
+        if used + len(line) > max_chars:
+            # Обрезаем только единственный факт, остальные не помещаются целиком
+            if lines:
+                break
+            line = line[:max_chars]
+        lines.append(line)
+        used += len(line) + 1
+    return "Известные факты:\n" + "\n".join(lines) if lines else ""